@@ -21,6 +21,15 @@ from typing import Dict, Optional, List
 from dataclasses import dataclass
 import sys
 
+from broadcast_hub import BroadcastHub, deflate_extensions, select_subprotocol
+from event_bridge import EventBridgeServer, Throughput
+from expense_store import ExpenseStore
+from fill_sensor import GPIO_AVAILABLE, FillSampler, SimulatedSensor, UltrasonicBackend
+from fleet_aggregator import FleetAggregator, FleetDiscovery, ZEROCONF_AVAILABLE
+from metrics import Registry, monitor_loop_lag, start_http_server
+from rollups import RollupEngine
+from sensor_log import FIELDS as SENSOR_LOG_FIELDS, SensorLog
+
 # Try to ensure Windows console can print UTF-8 (emojis) to avoid logging errors
 try:
 	if hasattr(sys.stdout, "reconfigure"):
@@ -61,7 +70,7 @@ class IPDiscovery:
 
 # ============ mDNS DISCOVERY ============
 class MDNSBroadcaster:
-	def __init__(self):
+	def __init__(self, bin_id: str = "trash_bin_01", port: int = 8765):
 		try:
 			from zeroconf import ServiceInfo, Zeroconf
 			local_ip = IPDiscovery.get_local_ip()
@@ -69,11 +78,11 @@ class MDNSBroadcaster:
             
 			self.service_info = ServiceInfo(
 				"_trashbin._tcp.local.",
-				f"Smart Trash Bin._trashbin._tcp.local.",
+				f"Smart Trash Bin {bin_id}._trashbin._tcp.local.",  # Unique per bin on a shared network
 				addresses=[socket.inet_aton(local_ip)],
-				port=8765,
+				port=port,
 				properties={
-					'bin_id': 'trash_bin_01',
+					'bin_id': bin_id,
 					'version': '2.2',
 					'hostname': hostname,
 					'features': 'trash_monitoring,expense_tracking,iot'
@@ -82,7 +91,7 @@ class MDNSBroadcaster:
             
 			self.zeroconf = Zeroconf()
 			self.zeroconf.register_service(self.service_info)
-			logger.info(f"✓ mDNS Broadcaster running at {local_ip}:8765")
+			logger.info(f"✓ mDNS Broadcaster running at {local_ip}:{port}")
 		except:
 			logger.warning("mDNS not available")
 			self.zeroconf = None
@@ -115,23 +124,347 @@ class Config:
     
 	# Sensor
 	SENSOR_READ_INTERVAL: int = 5
+	SENSOR_SAMPLE_RATE_HZ: float = 10.0  # Pings per second on the sampler thread
+	SENSOR_MEDIAN_WINDOW: int = 5  # Samples in the glitch-rejecting median
+	SENSOR_EMA_ALPHA: float = 0.3  # Smoothing after the median, 1 = none
+	SENSOR_TRIGGER_PIN: int = 24  # Clear of every servo pin in object_detection.LANES
+	SENSOR_ECHO_PIN: int = 7
+	SENSOR_SIMULATED: bool = False  # Also used automatically when RPi.GPIO is missing
 	REPORT_INTERVAL: int = 10
     
 	# Logging
 	ENABLE_LOGGING: bool = True
-	LOG_FILE: str = "trash_bin_data.csv"
+	LOG_FILE: str = "trash_bin_data.csv"  # Old flat log; readings now go to LOG_DIR
+	LOG_DIR: str = "sensor_log"  # Rotating CSV segments + compacted .npy history
+	LOG_FLUSH_ROWS: int = 60  # Readings buffered before a write
+	LOG_FLUSH_SECONDS: float = 300.0  # ...or this long since the last write
+	LOG_ROTATE_MB: float = 5.0  # Segment size that triggers rotation (also rotates daily)
     
 	# Expense Tracking (NEW)
 	ENABLE_EXPENSE_TRACKING: bool = True
-	EXPENSE_DB_FILE: str = "expenses.json"
+	EXPENSE_DB_FILE: str = "expenses.db"  # SQLite, WAL mode
+	EXPENSE_JSON_FILE: str = "expenses.json"  # Old store, imported once on startup
+    
+	# Rollups
+	ROLLUP_SNAPSHOT_FILE: str = "rollups.json"
+	ROLLUP_SNAPSHOT_INTERVAL: float = 300.0  # Seconds between snapshots
     
 	# mDNS
 	ENABLE_MDNS: bool = True
     
+	# Fleet aggregator mode: serve a merged view of every bin found over mDNS
+	AGGREGATOR_MODE: bool = False
+	AGGREGATOR_PORT: int = 8766
+	AGGREGATOR_STATIC_BINS: str = ""  # "bin_id=ws://host:port,..." for bins without mDNS
+	RECONNECT_BACKOFF_MAX: float = 60.0  # Longest wait between reconnect attempts (s)
+    
+	# Broadcast
+	BROADCAST_QUEUE_SIZE: int = 8  # Messages queued per client before the oldest is dropped
+	WS_COMPRESSION: bool = True  # permessage-deflate
+	WS_DEFLATE_LEVEL: int = 1  # zlib level, 1 = fastest
+	WS_DEFLATE_WINDOW_BITS: int = 12  # Smaller window = less memory per client
+	WS_NO_CONTEXT_TAKEOVER: bool = False  # True resets the compressor after every message
+	SNAPSHOT_EVERY: int = 30  # Full status to delta clients every N reports
+	EVENT_SOCKET_PATH: str = "/tmp/trashbin-events.sock"  # Sort events from object_detection.py
+	THROUGHPUT_WINDOW: float = 300.0  # Seconds of sort events behind items/min
+	THROUGHPUT_INTERVAL: float = 5.0  # Seconds between throughput pushes
+	METRICS_PORT: int = 9102  # Prometheus text on http://127.0.0.1:9102/metrics, 0 disables
+	METRICS_INTERVAL: float = 0.5  # Event-loop lag probe and gauge refresh (s)
+    
 	def __post_init__(self):
 		if self.MAX_CAPACITY_LITERS is None:
 			self.MAX_CAPACITY_LITERS = math.pi * (self.BIN_RADIUS_CM ** 2) * self.BIN_HEIGHT_CM / 1000
 
 config = Config()
 
+# ============ BROADCAST ============
+def websocket_serve_options(cfg: Config) -> Dict:
+	"""Keyword arguments for websockets.serve(): compression and wire-format negotiation"""
+	options = {"select_subprotocol": select_subprotocol}
+	if not cfg.WS_COMPRESSION:
+		options["compression"] = None
+	else:
+		options["extensions"] = deflate_extensions(
+			level=cfg.WS_DEFLATE_LEVEL,
+			window_bits=cfg.WS_DEFLATE_WINDOW_BITS,
+			no_context_takeover=cfg.WS_NO_CONTEXT_TAKEOVER,
+		)
+	return options
+
+# Status pushes go through hub.publish(status, key="status") so each message is
+# serialized once per wire format and a slow client only ever has the latest
+# status queued. Clients asking for a delta subprotocol get JSON-patch updates;
+# a {"type": "resync"} request from them maps to hub.resync(websocket)
+hub = BroadcastHub(config.BROADCAST_QUEUE_SIZE, config.SNAPSHOT_EVERY)
+
+# ============ EVENT BRIDGE ============
+async def run_event_bridge(cfg: Config, hub: BroadcastHub, throughput: Optional[Throughput] = None):
+	"""Relay sort events from the detector to clients, with live throughput"""
+	throughput = throughput or Throughput(cfg.THROUGHPUT_WINDOW)
+
+	def publish_throughput():
+		hub.publish({"type": "throughput", "timestamp": time.time(),
+					 "items_per_minute": round(throughput.per_minute(), 2),
+					 "items_total": throughput.total}, key="throughput")
+
+	def on_event(event):
+		if event.get("type") == "sort":
+			throughput.add()
+		hub.publish(event)  # Unkeyed: every sort event reaches every client
+		publish_throughput()
+
+	async with EventBridgeServer(on_event, cfg.EVENT_SOCKET_PATH):
+		logger.info(f"✓ Listening for sort events on {cfg.EVENT_SOCKET_PATH}")
+		while True:
+			await asyncio.sleep(cfg.THROUGHPUT_INTERVAL)
+			publish_throughput()  # Lets items/min decay once sorting stops
+
+# ============ METRICS ============
+async def run_metrics(cfg: Config, hub: BroadcastHub, throughput: Optional[Throughput] = None):
+	"""Serve /metrics and keep the event-loop lag and client gauges up to date"""
+	registry = Registry()
+	clients = registry.gauge("trashbin_websocket_clients", "Connected WebSocket clients")
+	queued = registry.gauge("trashbin_send_queue_depth", "Messages waiting in client send queues")
+	deepest = registry.gauge("trashbin_send_queue_max", "Longest single client send queue")
+	published = registry.counter("trashbin_messages_published_total", "Messages published to clients")
+	dropped = registry.counter("trashbin_messages_dropped_total", "Messages dropped from full client queues")
+	items_per_minute = registry.gauge("trashbin_items_per_minute", "Items sorted per minute")
+
+	def update():
+		# Runs on the event loop, so the hub is never read from the HTTP thread
+		stats = hub.stats()
+		clients.set(stats["clients"])
+		queued.set(stats["queued"])
+		deepest.set(max((len(c.pending) for c in hub.clients.values()), default=0))
+		published.labels().set(stats["published"])
+		dropped.labels().set(stats["dropped"])
+		if throughput is not None:
+			items_per_minute.set(throughput.per_minute())
+
+	server = start_http_server(registry, cfg.METRICS_PORT)
+	logger.info(f"✓ Metrics on http://127.0.0.1:{cfg.METRICS_PORT}/metrics")
+	try:
+		await monitor_loop_lag(registry, cfg.METRICS_INTERVAL, update)
+	finally:
+		server.shutdown()
+		server.server_close()
+
+# ============ EXPENSE STORE ============
+def open_expense_store(cfg: Config) -> Optional[ExpenseStore]:
+	"""Open the SQLite expense store, importing the old JSON file on first run"""
+	if not cfg.ENABLE_EXPENSE_TRACKING:
+		return None
+	store = ExpenseStore(cfg.EXPENSE_DB_FILE, bin_id=cfg.BIN_ID)
+	try:
+		store.migrate_json(cfg.EXPENSE_JSON_FILE)
+	except (OSError, ValueError) as e:
+		logger.error(f"Expense migration from {cfg.EXPENSE_JSON_FILE} failed: {e}")
+	logger.info(f"✓ Expense store: {store.count()} records in {cfg.EXPENSE_DB_FILE}")
+	return store
+
+# ============ SENSOR LOG ============
+def open_sensor_log(cfg: Config) -> Optional[SensorLog]:
+	"""Buffered sensor log; history queries read only the blocks they need"""
+	if not cfg.ENABLE_LOGGING:
+		return None
+	return SensorLog(
+		cfg.LOG_DIR,
+		flush_rows=cfg.LOG_FLUSH_ROWS,
+		flush_seconds=cfg.LOG_FLUSH_SECONDS,
+		rotate_bytes=int(cfg.LOG_ROTATE_MB * 2**20),
+	)
+
+# ============ FILL SENSOR ============
+def start_fill_sampler(cfg: Config, sensor_log: Optional[SensorLog] = None,
+					   rollups: Optional[RollupEngine] = None) -> FillSampler:
+	"""Sample the fill sensor on its own thread; the event loop only reads sampler.latest"""
+	if cfg.SENSOR_SIMULATED or not GPIO_AVAILABLE:
+		logger.warning("Using the simulated fill sensor")
+		backend = SimulatedSensor(cfg.BIN_HEIGHT_CM)
+	else:
+		backend = UltrasonicBackend(cfg.SENSOR_TRIGGER_PIN, cfg.SENSOR_ECHO_PIN)
+
+	listeners = []
+	if sensor_log is not None:
+		listeners.append(sensor_log.append)
+	if rollups is not None:
+		listeners.append(lambda reading: rollups.add_reading(reading.timestamp, reading.fill_percentage))
+	sampler = FillSampler(
+		backend,
+		bin_height_cm=cfg.BIN_HEIGHT_CM,
+		bin_radius_cm=cfg.BIN_RADIUS_CM,
+		capacity_liters=cfg.MAX_CAPACITY_LITERS,
+		rate_hz=cfg.SENSOR_SAMPLE_RATE_HZ,
+		median_window=cfg.SENSOR_MEDIAN_WINDOW,
+		ema_alpha=cfg.SENSOR_EMA_ALPHA,
+		listeners=listeners,
+		listener_interval=cfg.SENSOR_READ_INTERVAL,
+	)
+	sampler.start()
+	return sampler
+
+# ============ ROLLUPS ============
+def open_rollups(cfg: Config, sensor_log: Optional[SensorLog] = None,
+				 expense_store: Optional[ExpenseStore] = None) -> RollupEngine:
+	"""Load the rollup snapshot and catch up on what was stored after it"""
+	rollups = RollupEngine(cfg.ALERT_HIGH, cfg.ALERT_MEDIUM, cfg.ROLLUP_SNAPSHOT_FILE,
+						   cfg.ROLLUP_SNAPSHOT_INTERVAL)
+	if sensor_log is not None:
+		fill_column = SENSOR_LOG_FIELDS.index('fill_percentage')
+		rows = sensor_log.read(start=rollups.last_reading_time + 1e-6)
+		for row in rows:
+			rollups.add_reading(row[0], row[fill_column])
+		logger.info(f"✓ Rollups: replayed {len(rows)} readings since the last snapshot")
+	if expense_store is not None:
+		# Expenses can be edited or backdated, so rebuild their totals from the store
+		rollups.clear_expenses()
+		for expense in expense_store.query():
+			try:
+				rollups.add_expense(expense['date'], expense['category'], expense['amount'])
+			except ValueError:
+				logger.warning(f"Skipping expense {expense['id']} with unparseable date {expense['date']!r}")
+	return rollups
+
+# ============ FLEET AGGREGATOR ============
+async def run_fleet_aggregator(cfg: Config):
+	"""Follow every bin on the network and serve the merged fleet view on AGGREGATOR_PORT"""
+	aggregator = FleetAggregator(alert_high=cfg.ALERT_HIGH, backoff_max=cfg.RECONNECT_BACKOFF_MAX)
+	for entry in filter(None, cfg.AGGREGATOR_STATIC_BINS.split(',')):
+		bin_id, url = entry.split('=', 1)
+		aggregator.add_bin(bin_id.strip(), url.strip())
+
+	discovery = None
+	if ZEROCONF_AVAILABLE:
+		discovery = FleetDiscovery(aggregator)
+		await discovery.start()
+	else:
+		logger.warning("zeroconf not installed - only AGGREGATOR_STATIC_BINS are followed")
+
+	try:
+		async with websockets.serve(aggregator.serve, cfg.HOST, cfg.AGGREGATOR_PORT,
+									**websocket_serve_options(cfg)):
+			logger.info(f"✓ Fleet aggregator on port {cfg.AGGREGATOR_PORT}")
+			await asyncio.Future()
+	finally:
+		if discovery is not None:
+			await discovery.close()
+		await aggregator.close()
+
+# ============ SERVER ============
+def alert_level(cfg: Config, fill_percentage: float) -> str:
+	if fill_percentage >= cfg.ALERT_HIGH:
+		return "HIGH"
+	if fill_percentage >= cfg.ALERT_MEDIUM:
+		return "MEDIUM"
+	return "LOW"
+
+class BinServer:
+	"""One bin's server state: hub, stores, fill sampler and throughput
+
+	Built by build_server(); serve() runs it. close() stops the sampler and
+	flushes every store, so it can be built and torn down in a test.
+	"""
+
+	def __init__(self, cfg: Config, hub: BroadcastHub, expense_store: Optional[ExpenseStore],
+				 sensor_log: Optional[SensorLog], rollups: RollupEngine, sampler: FillSampler):
+		self.cfg = cfg
+		self.hub = hub
+		self.expense_store = expense_store
+		self.sensor_log = sensor_log
+		self.rollups = rollups
+		self.sampler = sampler
+		self.throughput = Throughput(cfg.THROUGHPUT_WINDOW)
+
+	def status(self) -> Optional[Dict]:
+		"""Latest fill reading as a status message, None before the first sample"""
+		reading = self.sampler.latest
+		if reading is None:
+			return None
+		today = datetime.datetime.combine(datetime.date.today(), datetime.time())
+		expenses = {category: entry["total"]
+					for category, entry in self.rollups.expense_totals('day', start=today).items()}
+		return {"type": "status", "bin_id": self.cfg.BIN_ID, "location": self.cfg.BIN_LOCATION,
+				"timestamp": round(reading.timestamp, 1),
+				"fill_percentage": round(reading.fill_percentage, 1),
+				"distance_cm": round(reading.distance_cm, 1),
+				"volume_liters": round(reading.volume_liters, 1),
+				"alert": alert_level(self.cfg, reading.fill_percentage),
+				"expenses": {"today": expenses, "total": round(sum(expenses.values()), 2)}}
+
+	async def publish_status(self):
+		"""Push the status to every client every REPORT_INTERVAL seconds"""
+		while True:
+			status = self.status()
+			if status is not None:
+				self.hub.publish(status, key="status")
+			await asyncio.sleep(self.cfg.REPORT_INTERVAL)
+
+	async def handle(self, websocket):
+		"""Connection handler: status pushes out, resync requests in"""
+		self.hub.register(websocket)
+		status = self.status()
+		if status is not None:
+			self.hub.send(websocket, status)
+		try:
+			async for raw in websocket:
+				try:
+					request = json.loads(raw)
+				except (TypeError, ValueError):
+					continue
+				if isinstance(request, dict) and request.get("type") == "resync":
+					self.hub.resync(websocket)
+		except websockets.ConnectionClosed:
+			pass
+		finally:
+			self.hub.unregister(websocket)
+
+	def close(self):
+		self.sampler.stop()
+		if self.sensor_log is not None:
+			self.sensor_log.close()
+		if self.rollups.snapshot_path is not None:
+			self.rollups.save()
+		if self.expense_store is not None:
+			self.expense_store.close()
+
+def build_server(cfg: Config = config, hub: Optional[BroadcastHub] = None) -> BinServer:
+	"""Open the stores and start the fill sampler; nothing is bound to a port yet"""
+	if hub is None:
+		hub = BroadcastHub(cfg.BROADCAST_QUEUE_SIZE, cfg.SNAPSHOT_EVERY)
+	expense_store = open_expense_store(cfg)
+	sensor_log = open_sensor_log(cfg)
+	rollups = open_rollups(cfg, sensor_log, expense_store)
+	sampler = start_fill_sampler(cfg, sensor_log, rollups)
+	return BinServer(cfg, hub, expense_store, sensor_log, rollups, sampler)
+
+async def serve(cfg: Config = config, hub: Optional[BroadcastHub] = None,
+				stop: Optional[asyncio.Event] = None):
+	"""Run the bin server, or the fleet aggregator in AGGREGATOR_MODE, until stop is set"""
+	if cfg.AGGREGATOR_MODE:
+		await run_fleet_aggregator(cfg)
+		return
+
+	server = build_server(cfg, hub)
+	mdns = None
+	tasks = [asyncio.create_task(server.publish_status())]
+	if cfg.EVENT_SOCKET_PATH:
+		tasks.append(asyncio.create_task(run_event_bridge(cfg, server.hub, server.throughput)))
+	if cfg.METRICS_PORT:
+		tasks.append(asyncio.create_task(run_metrics(cfg, server.hub, server.throughput)))
+	try:
+		async with websockets.serve(server.handle, cfg.HOST, cfg.PORT,
+									**websocket_serve_options(cfg)):
+			logger.info(f"✓ Bin {cfg.BIN_ID} serving on port {cfg.PORT}")
+			if cfg.ENABLE_MDNS:
+				# Registration blocks on the network for a moment
+				mdns = await asyncio.to_thread(MDNSBroadcaster, cfg.BIN_ID, cfg.PORT)
+			await (stop.wait() if stop is not None else asyncio.Future())
+	finally:
+		for task in tasks:
+			task.cancel()
+		await asyncio.gather(*tasks, return_exceptions=True)
+		if mdns is not None:
+			mdns.cleanup()
+		server.close()
+
 # ...existing code continues unchanged...
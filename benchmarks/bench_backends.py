@@ -0,0 +1,68 @@
+"""Compare accuracy and latency of each inference backend on the validation split
+
+Exports the model for every installed runtime (ONNX Runtime, OpenVINO, NCNN,
+PyTorch) and runs Ultralytics validation on the data.yaml val split, e.g.:
+
+    python benchmarks/bench_backends.py --data data.yaml --int8
+"""
+import argparse
+import json
+
+from bench_utils import REPO_ROOT
+
+from model_backends import INT8_BACKENDS, available_backends, exported_path, export_model
+from object_detection import MODEL_PATH
+
+
+def bench_backend(model_path, backend, data, imgsz, int8=False):
+    from ultralytics import YOLO
+
+    path = exported_path(model_path, backend, int8)
+    if backend != 'pytorch' and not path.exists():
+        path = export_model(model_path, backend, int8, data)
+
+    model = YOLO(str(path), task='detect')
+    metrics = model.val(data=data, split='val', imgsz=imgsz, batch=1,
+                        device='cpu', plots=False, verbose=False)
+    return {
+        "backend": backend,
+        "int8": int8,
+        "mAP50": float(metrics.box.map50),
+        "mAP50-95": float(metrics.box.map),
+        "preprocess_ms": metrics.speed['preprocess'],
+        "inference_ms": metrics.speed['inference'],
+        "postprocess_ms": metrics.speed['postprocess'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default=str(MODEL_PATH))
+    parser.add_argument('--data', default=str(REPO_ROOT / 'data.yaml'))
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--backends', nargs='*', help="Default: every installed backend")
+    parser.add_argument('--int8', action='store_true', help="Also benchmark INT8 exports")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    backends = args.backends or available_backends()
+    results = []
+    for backend in backends:
+        results.append(bench_backend(args.model, backend, args.data, args.imgsz))
+        if args.int8 and backend in INT8_BACKENDS:
+            results.append(bench_backend(args.model, backend, args.data, args.imgsz, int8=True))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'backend':<14} {'mAP50':>7} {'mAP50-95':>9} {'infer ms':>9} {'total ms':>9}")
+    for row in results:
+        name = row['backend'] + (' int8' if row['int8'] else '')
+        total = row['preprocess_ms'] + row['inference_ms'] + row['postprocess_ms']
+        print(f"{name:<14} {row['mAP50']:>7.3f} {row['mAP50-95']:>9.3f} "
+              f"{row['inference_ms']:>9.1f} {total:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark batched YOLO inference on recorded frames
+
+Reports frames per second and p50/p99 per-call latency for each batch size
+on CPU, e.g.:
+
+    python benchmarks/bench_batch_inference.py recordings/ --max-batch 8
+"""
+import argparse
+import json
+import time
+
+from bench_utils import load_frames, percentile
+
+from object_detection import MODEL_PATH
+
+
+def bench_batch_size(model, frames, batch_size, conf, warmup=2):
+    """Run all frames through the model in chunks of batch_size"""
+    batches = [frames[i:i + batch_size] for i in range(0, len(frames), batch_size)]
+    for batch in batches[:warmup]:
+        model(batch, conf=conf, device='cpu', verbose=False)
+
+    latencies = []
+    start = time.perf_counter()
+    for batch in batches:
+        t0 = time.perf_counter()
+        model(batch, conf=conf, device='cpu', verbose=False)
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "batch_size": batch_size,
+        "frames": len(frames),
+        "fps": len(frames) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('frames', help="Directory of images or a video file")
+    parser.add_argument('--model', default=str(MODEL_PATH))
+    parser.add_argument('--max-batch', type=int, default=8)
+    parser.add_argument('--limit', type=int, default=200, help="Max frames to load")
+    parser.add_argument('--conf', type=float, default=0.25)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    from ultralytics import YOLO
+
+    frames = load_frames(args.frames, args.limit)
+    model = YOLO(args.model)
+
+    results = [bench_batch_size(model, frames, n, args.conf)
+               for n in range(1, args.max_batch + 1)]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'batch':>5} {'fps':>8} {'p50 ms':>9} {'p99 ms':>9}")
+    for row in results:
+        print(f"{row['batch_size']:>5} {row['fps']:>8.2f} {row['p50_ms']:>9.1f} {row['p99_ms']:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Compare bytes on the wire and encode time for each status wire format
+
+Publishes a synthetic stream of bin-status reports (fill creeping up, alerts
+and expense totals changing now and then) through BroadcastHub to one client
+per subprotocol, and reports bytes per message before and after
+permessage-deflate style compression:
+
+    python benchmarks/bench_encodings.py --messages 2000
+"""
+import argparse
+import asyncio
+import json
+import random
+import zlib
+
+import bench_utils  # noqa: F401  (sets up the import path)
+
+from broadcast_hub import BroadcastHub, supported_subprotocols
+
+
+class RecordingSocket:
+    """Stands in for a connection: keeps the size of every frame sent"""
+
+    def __init__(self, subprotocol):
+        self.subprotocol = subprotocol
+        self.sizes = []
+        # permessage-deflate keeps one compressor per connection
+        self._deflate = zlib.compressobj(1, zlib.DEFLATED, -12, 5)
+        self.compressed = []
+        self.compressed_no_takeover = []  # Fresh compressor per message
+
+    async def send(self, payload, text=None):
+        self.sizes.append(len(payload))
+        data = self._deflate.compress(payload) + self._deflate.flush(zlib.Z_SYNC_FLUSH)
+        self.compressed.append(len(data) - 4)  # Trailing 00 00 ff ff is not sent
+        fresh = zlib.compressobj(1, zlib.DEFLATED, -12, 5)
+        data = fresh.compress(payload) + fresh.flush(zlib.Z_SYNC_FLUSH)
+        self.compressed_no_takeover.append(len(data) - 4)
+
+
+def status_stream(rng, count, history):
+    fill = 5.0
+    expenses = {"food": 12.5, "transport": 4.0, "other": 0.0}
+    for seq in range(count):
+        fill = min(100.0, fill + rng.choice([0, 0, 0, 0.5]))
+        if rng.random() < 0.05:
+            category = rng.choice(list(expenses))
+            expenses[category] = round(expenses[category] + rng.uniform(1, 20), 2)
+        level = "HIGH" if fill >= 80 else "MEDIUM" if fill >= 60 else "LOW"
+        yield {"type": "status", "bin_id": "trash_bin_01", "location": "Default Location",
+               "timestamp": round(1_700_000_000 + seq * 10.0, 1),
+               "fill_percentage": round(fill, 1), "distance_cm": round(100 - fill, 1),
+               "volume_liters": round(fill / 100 * 282.7, 1), "alert": level,
+               "expenses": {"today": dict(expenses), "total": round(sum(expenses.values()), 2)},
+               "history": [round(max(fill - i * 0.5, 0), 1) for i in range(history)]}
+
+
+async def run(args):
+    hub = BroadcastHub(max_queue=args.messages, snapshot_every=args.snapshot_every)
+    sockets = {name: RecordingSocket(name) for name in [None] + supported_subprotocols()}
+    for websocket in sockets.values():
+        hub.register(websocket)
+
+    rng = random.Random(args.seed)
+    for message in status_stream(rng, args.messages, args.history):
+        hub.publish(message, key="status")
+        await asyncio.sleep(0)  # Let the writers send before the next report
+    for websocket in sockets.values():
+        hub.unregister(websocket)
+
+    rows = []
+    for name, websocket in sockets.items():
+        sent = max(len(websocket.sizes), 1)
+        rows.append({"subprotocol": name or "(none)",
+                     "messages": len(websocket.sizes),
+                     "bytes_per_message": sum(websocket.sizes) / sent,
+                     "deflated_bytes_per_message": sum(websocket.compressed) / sent,
+                     "deflated_no_takeover_bytes_per_message":
+                         sum(websocket.compressed_no_takeover) / sent})
+    return {"messages": args.messages, "formats": rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--history', type=int, default=0, help="Fill readings attached to each status")
+    parser.add_argument('--snapshot-every', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{report['messages']} status messages, deflate level 1 / 12 window bits")
+    print(f"{'subprotocol':<24} {'sent':>6} {'bytes/msg':>10} {'deflated':>9} {'no ctx':>7}")
+    for row in report['formats']:
+        print(f"{row['subprotocol']:<24} {row['messages']:>6} {row['bytes_per_message']:>10.1f} "
+              f"{row['deflated_bytes_per_message']:>9.1f} "
+              f"{row['deflated_no_takeover_bytes_per_message']:>7.1f}")
+
+
+if __name__ == '__main__':
+    main()
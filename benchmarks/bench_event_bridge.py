@@ -0,0 +1,115 @@
+"""Latency and cost of the detector -> server event bridge
+
+A publisher process sends --events sort events at --rate per second through
+EventPublisher while this process receives them with EventBridgeServer on an
+asyncio loop. --stall-ms blocks the server's loop every second to show that
+the detector side keeps going; during a stall only net.unix.max_dgram_qlen
+datagrams queue up and the rest are counted as dropped:
+
+    python benchmarks/bench_event_bridge.py --events 5000 --rate 1000 --stall-ms 200
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+import bench_utils  # noqa: F401  (sets up the import path)
+
+from bench_utils import percentile
+from event_bridge import EventBridgeServer, EventPublisher
+
+
+def publish_events(path, count, rate, results):
+    publisher = EventPublisher(path)
+    costs = []
+    start = time.perf_counter()
+    for i in range(count):
+        delay = start + i / rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        event = {"type": "sort", "waste_type": "RECYCLABLE", "confidence": 0.91,
+                 "timestamp": time.time(), "items_sorted": i + 1}
+        t0 = time.perf_counter()
+        publisher.publish(event)
+        costs.append(time.perf_counter() - t0)
+    publisher.close()
+    results.put({"sent": publisher.sent, "dropped": publisher.dropped, "costs": costs})
+
+
+def publish_cost_without_server(count):
+    """publish() when nothing is listening, i.e. the server is down"""
+    publisher = EventPublisher(os.path.join(tempfile.gettempdir(), f"missing-{os.getpid()}.sock"))
+    start = time.perf_counter()
+    for i in range(count):
+        publisher.publish({"type": "sort", "timestamp": time.time(), "items_sorted": i})
+    elapsed = time.perf_counter() - start
+    publisher.close()
+    return elapsed / count
+
+
+async def run(args, path):
+    latencies = []
+
+    def on_event(event):
+        latencies.append(time.time() - event["timestamp"])
+
+    async def stall():
+        while True:
+            await asyncio.sleep(1.0)
+            time.sleep(args.stall_ms / 1000)  # Blocks the whole loop, like a slow handler
+
+    results = multiprocessing.Queue()
+    async with EventBridgeServer(on_event, path) as bridge:
+        staller = asyncio.create_task(stall()) if args.stall_ms else None
+        process = multiprocessing.Process(target=publish_events,
+                                          args=(path, args.events, args.rate, results))
+        process.start()
+        while process.is_alive():
+            await asyncio.sleep(0.05)
+        await asyncio.sleep(0.2)  # Drain what is still in the socket buffer
+        if staller is not None:
+            staller.cancel()
+        received = bridge.received
+    publisher = results.get()
+    process.join()
+    costs = publisher["costs"]
+    return {"events": args.events, "rate": args.rate, "stall_ms": args.stall_ms,
+            "sent": publisher["sent"], "dropped_at_publisher": publisher["dropped"],
+            "received": received,
+            "latency_p50_ms": percentile(latencies, 50) * 1000,
+            "latency_p99_ms": percentile(latencies, 99) * 1000,
+            "latency_max_ms": max(latencies, default=0.0) * 1000,
+            "publish_p50_us": percentile(costs, 50) * 1e6,
+            "publish_p99_us": percentile(costs, 99) * 1e6,
+            "publish_no_server_us": publish_cost_without_server(args.events) * 1e6}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=2000)
+    parser.add_argument('--rate', type=float, default=500.0, help="Events per second")
+    parser.add_argument('--stall-ms', type=float, default=0.0,
+                        help="Block the server loop this long once a second")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        report = asyncio.run(run(args, os.path.join(tmp, 'events.sock')))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{report['sent']}/{report['events']} sent at {report['rate']:.0f}/s, "
+          f"{report['received']} received, {report['dropped_at_publisher']} dropped")
+    print(f"Latency: p50 {report['latency_p50_ms']:.2f} ms, p99 {report['latency_p99_ms']:.2f} ms, "
+          f"max {report['latency_max_ms']:.1f} ms")
+    print(f"publish(): p50 {report['publish_p50_us']:.1f} µs, p99 {report['publish_p99_us']:.1f} µs, "
+          f"server down {report['publish_no_server_us']:.1f} µs")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Compare the SQLite expense store with rewriting expenses.json
+
+Fills both stores with --records synthetic expenses, then times adding one
+expense, a one-week range query and totals by category for each:
+
+    python benchmarks/bench_expense_store.py --records 1000 10000 100000
+"""
+import argparse
+import datetime
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import bench_utils  # noqa: F401  (sets up the import path)
+
+from expense_store import ExpenseStore
+
+CATEGORIES = ['food', 'transport', 'shopping', 'bills', 'other']
+
+
+def synthetic_expenses(rng, count, days=365):
+    start = datetime.datetime(2025, 1, 1)
+    for i in range(count):
+        date = start + datetime.timedelta(seconds=rng.uniform(0, days * 86400))
+        yield {"id": str(i), "amount": round(rng.uniform(1, 80), 2),
+               "category": rng.choice(CATEGORIES), "date": date.isoformat(timespec='seconds'),
+               "bin_id": "trash_bin_01", "description": f"expense {i}"}
+
+
+class JsonStore:
+    """The old way: the whole list in one JSON document"""
+
+    def __init__(self, path, records):
+        self.path = path
+        self.path.write_text(json.dumps({"expenses": records}))
+
+    def add(self, expense):
+        data = json.loads(self.path.read_text())
+        data["expenses"].append(expense)
+        self.path.write_text(json.dumps(data))
+
+    def query(self, start, end):
+        data = json.loads(self.path.read_text())
+        return [e for e in data["expenses"] if start <= e["date"] < end]
+
+    def totals_by_category(self):
+        totals = {}
+        for e in json.loads(self.path.read_text())["expenses"]:
+            totals[e["category"]] = totals.get(e["category"], 0) + e["amount"]
+        return totals
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def bench(records, repeat, directory):
+    rng = random.Random(0)
+    expenses = list(synthetic_expenses(rng, records))
+    new = {"amount": 9.5, "category": "food", "date": "2025-06-01T12:00:00"}
+    week = ("2025-06-01", "2025-06-08")
+
+    json_store = JsonStore(directory / f"expenses_{records}.json", expenses)
+    sqlite_store = ExpenseStore(directory / f"expenses_{records}.db")
+    for expense in expenses:
+        sqlite_store.add(expense)
+
+    results = []
+    for name, store, query, totals in (
+            ("json", json_store, lambda: json_store.query(*week), json_store.totals_by_category),
+            ("sqlite", sqlite_store, lambda: sqlite_store.query(*week),
+             sqlite_store.totals_by_category)):
+        results.append({"store": name, "records": records,
+                        "add_ms": timed(lambda: store.add(dict(new)), repeat),
+                        "week_query_ms": timed(query, repeat),
+                        "category_totals_ms": timed(totals, repeat)})
+    sqlite_store.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [row for n in args.records for row in bench(n, args.repeat, Path(tmp))]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'store':<7} {'records':>8} {'add':>9} {'week query':>11} {'by category':>12}")
+    for row in results:
+        print(f"{row['store']:<7} {row['records']:>8} {row['add_ms']:>7.2f}ms "
+              f"{row['week_query_ms']:>9.2f}ms {row['category_totals_ms']:>10.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
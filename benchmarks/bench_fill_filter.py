@@ -0,0 +1,76 @@
+"""Measure how well FillSampler's median + EMA filter tracks the true fill level
+
+Drives FillSampler.sample() against SimulatedSensor on a virtual clock (noise,
+stray-echo spikes and missed echoes) and compares the error of the raw
+distance, the median alone and median + EMA:
+
+    python benchmarks/bench_fill_filter.py --spike-rate 0.05
+"""
+import argparse
+import json
+import statistics
+
+import bench_utils  # noqa: F401  (sets up the import path)
+
+from bench_utils import percentile
+from fill_sensor import FillSampler, SimulatedSensor
+from sort_simulator import VirtualClock
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--samples', type=int, default=20000)
+    parser.add_argument('--rate', type=float, default=10.0, help="Samples per second")
+    parser.add_argument('--noise', type=float, default=0.8, help="Sensor noise (cm)")
+    parser.add_argument('--spike-rate', type=float, default=0.03)
+    parser.add_argument('--dropout-rate', type=float, default=0.02)
+    parser.add_argument('--window', type=int, default=5, help="Median window")
+    parser.add_argument('--alpha', type=float, default=0.3, help="EMA alpha")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    clock = VirtualClock()
+    sensor = SimulatedSensor(100, start_fill_cm=10, fill_rate=20, noise_cm=args.noise,
+                             spike_rate=args.spike_rate, dropout_rate=args.dropout_rate,
+                             seed=args.seed, clock=clock)
+    sampler = FillSampler(sensor, 100, 30, median_window=args.window, ema_alpha=args.alpha,
+                          clock=clock)
+    raw_backend = sensor.read_distance_cm
+    raw_values = []
+
+    def recording_read():
+        value = raw_backend()
+        raw_values.append(value)
+        return value
+
+    sensor.read_distance_cm = recording_read
+    errors = {"raw": [], "median": [], "median_ema": []}
+    for _ in range(args.samples):
+        clock.now += 1.0 / args.rate
+        reading = sampler.sample()
+        raw = raw_values[-1]
+        if raw is None:
+            continue
+        truth = sensor.true_distance_cm()
+        errors["raw"].append(abs(raw - truth))
+        errors["median"].append(abs(statistics.median(sampler.window) - truth))
+        errors["median_ema"].append(abs(reading.distance_cm - truth))
+
+    report = {name: {"mean_cm": sum(e) / len(e), "p99_cm": percentile(e, 99), "max_cm": max(e)}
+              for name, e in errors.items()}
+    report["missed_echoes"] = sampler.misses
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{args.samples} samples, {sampler.misses} missed echoes")
+    print(f"{'filter':<11} {'mean':>8} {'p99':>8} {'max':>8}")
+    for name in errors:
+        row = report[name]
+        print(f"{name:<11} {row['mean_cm']:>6.2f}cm {row['p99_cm']:>6.2f}cm {row['max_cm']:>6.2f}cm")
+
+
+if __name__ == '__main__':
+    main()
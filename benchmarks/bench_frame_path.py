@@ -0,0 +1,111 @@
+"""Allocation churn of the capture -> model input path, with and without reuse
+
+Feeds synthetic 1280x720 frames through CameraSource and prepares the model
+input each frame, either the old way (new array per capture, per-call
+letterbox like Ultralytics does) or with a FrameRing and the persistent
+Letterbox. A few frames are kept alive at a time, like the renderer/writer
+queues do. No camera or model needed:
+
+    python benchmarks/bench_frame_path.py --frames 500
+"""
+import argparse
+import json
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+import bench_utils  # noqa: F401  (sets up the import path)
+
+from camera import CameraSource
+from frame_buffers import AllocationMonitor, FrameRing, release
+from preprocessing import Letterbox
+
+FRAME_SHAPE = (720, 1280, 3)
+
+
+class SyntheticCapture:
+    """cv2.VideoCapture stand-in that honours read(image) like OpenCV does"""
+
+    def __init__(self, seed=0):
+        rng = np.random.default_rng(seed)
+        self.frames = [rng.integers(0, 255, FRAME_SHAPE, dtype=np.uint8) for _ in range(4)]
+        self.index = 0
+
+    def read(self, image=None):
+        source = self.frames[self.index % len(self.frames)]
+        self.index += 1
+        if image is None or image.shape != source.shape:
+            return True, source.copy()
+        np.copyto(image, source)
+        return True, image
+
+    def release(self):
+        pass
+
+
+def letterbox_per_call(frame, size=640):
+    """Roughly what Ultralytics' LetterBox + to-tensor does for each call"""
+    height, width = frame.shape[:2]
+    scale = min(size / height, size / width)
+    resized = cv2.resize(frame, (round(width * scale), round(height * scale)))
+    pad_y, pad_x = size - resized.shape[0], size - resized.shape[1]
+    padded = cv2.copyMakeBorder(resized, pad_y // 2, pad_y - pad_y // 2, pad_x // 2,
+                                pad_x - pad_x // 2, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+    image = np.ascontiguousarray(padded[..., ::-1].transpose(2, 0, 1)[None])
+    return image.astype(np.float32) / 255
+
+
+def run(mode, frames, keep):
+    ring = FrameRing(keep + 4) if mode == "reuse" else None
+    camera = CameraSource(cap=SyntheticCapture(), ring=ring)
+    letterbox = Letterbox(640) if mode == "reuse" else None
+    alive = deque()  # Frames still queued for rendering/saving
+    monitor = AllocationMonitor(every=frames, report=None).start()
+    start = time.perf_counter()
+    for _ in range(frames):
+        frame = camera.read()
+        model_input = letterbox(frame) if letterbox is not None else letterbox_per_call(frame)
+        if mode != "reuse":
+            frame = frame.copy()  # The old overlay copy
+        alive.append(frame)
+        while len(alive) > keep:
+            release(alive.popleft())
+        summary = monitor.frame_done()
+        del model_input
+    elapsed = time.perf_counter() - start
+    monitor.stop()
+    report = {"mode": mode, "ms_per_frame": elapsed / frames * 1000,
+              "peak_kb_per_frame": summary["peak_kb_per_frame"],
+              "gc_collections": summary["gc_collections"]}
+    if ring is not None:
+        report["ring"] = ring.stats()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--keep', type=int, default=6, help="Frames kept alive at a time")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    reports = [run(mode, args.frames, args.keep) for mode in ("per_frame", "reuse")]
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+
+    print(f"{args.frames} frames of {FRAME_SHAPE[1]}x{FRAME_SHAPE[0]}, {args.keep} kept alive "
+          f"(timings include tracemalloc overhead)")
+    print(f"{'mode':<10} {'ms/frame':>9} {'alloc peak/frame':>17} {'GC gen0/1/2':>12}")
+    for report in reports:
+        gc_counts = "/".join(str(n) for n in report["gc_collections"])
+        print(f"{report['mode']:<10} {report['ms_per_frame']:>9.2f} "
+              f"{report['peak_kb_per_frame']:>14.0f} KB {gc_counts:>12}")
+    ring = reports[-1]["ring"]
+    print(f"Ring: {ring['slots']} slots, {ring['reused']} reused, {ring['overflow']} overflow")
+
+
+if __name__ == '__main__':
+    main()
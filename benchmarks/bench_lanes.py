@@ -0,0 +1,208 @@
+"""Aggregate items per minute as lanes are added to one shared inference pool
+
+Every lane runs the real Lane / InferencePool code (shared-memory frames,
+round-robin dispatch, tracker and SortingEngine). A lane's camera replays
+pre-rendered frames of whatever its simulated chute (sort_simulator's
+SimulatedChute, which is also the lane's actuator) has in view, paced like
+a live camera on the wall clock, so slower inference means fewer frames and
+later decisions. The workers run a stub detector that spends --infer-ms of
+CPU per frame, so no model or camera is needed:
+
+    python benchmarks/bench_lanes.py --lanes 1,2,4 --workers 2 --seconds 30
+
+--speed shortens the FSM's waits (bin open, gate open, clear wait) to get
+more items per run; the chute's physical timings stay real, since those
+are what inference latency races against (late detections let a second item
+drop in).
+"""
+import argparse
+import functools
+import json
+import random
+import time
+
+import numpy as np
+
+import bench_utils  # noqa: F401  (sets up the import path)
+
+from lanes import InferencePool, Lane
+from object_detection import sort_timings
+from sort_simulator import LANDFILL, RECYCLABLE, ChuteModel, SimulatedChute, VirtualClock
+
+FRAME_SHAPE = (720, 1280, 3)
+ITEM_BOX = (560, 260, 720, 500)  # x1, y1, x2, y2 of an item in view
+ITEM_SHADES = {RECYCLABLE: 220, LANDFILL: 60}  # Stub model class 0 / class 1 by brightness
+JAM_TIMEOUT = 5.0  # Short runs: clear a stuck chute quickly
+
+
+class _Array:
+    def __init__(self, values):
+        self.values = np.asarray(values, dtype=np.float32)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.values
+
+
+class _Boxes:
+    def __init__(self, xyxy, cls, conf):
+        self.xyxy, self.cls, self.conf = _Array(xyxy), _Array(cls), _Array(conf)
+
+    def __len__(self):
+        return len(self.cls.values)
+
+
+class _Result:
+    def __init__(self, boxes):
+        self.boxes = boxes
+
+
+class StubModel:
+    """Ultralytics-shaped detector that burns infer_ms of CPU and reads the item shade"""
+
+    names = {0: 'bottle-plastic', 1: 'cup-disposable'}
+
+    def __init__(self, infer_ms=50.0):
+        self.infer_seconds = infer_ms / 1000
+
+    def __call__(self, image, conf=0.25, verbose=False):
+        deadline = time.perf_counter() + self.infer_seconds
+        while time.perf_counter() < deadline:
+            pass
+        x1, y1, x2, y2 = ITEM_BOX
+        shade = int(image[(y1 + y2) // 2, (x1 + x2) // 2, 0])
+        for cls, category in enumerate((RECYCLABLE, LANDFILL)):
+            if abs(shade - ITEM_SHADES[category]) < 20:
+                return [_Result(_Boxes([ITEM_BOX], [cls], [0.9]))]
+        return [_Result(_Boxes(np.empty((0, 4)), [], []))]
+
+
+def render_frames():
+    """Empty chute, and one frame per category with an item in view"""
+    empty = np.full(FRAME_SHAPE, 128, dtype=np.uint8)
+    frames = {None: empty}
+    x1, y1, x2, y2 = ITEM_BOX
+    for category, shade in ITEM_SHADES.items():
+        frame = empty.copy()
+        frame[y1:y2, x1:x2] = shade
+        frames[category] = frame
+    return frames
+
+
+class ChuteCamera:
+    """Live-camera stand-in: the frame for what the chute holds right now"""
+
+    def __init__(self, chute, clock, frames, fps):
+        self.chute = chute
+        self.clock = clock
+        self.frames = frames
+        self.period = 1.0 / fps
+        self.start = time.monotonic()
+        self.deadline = None
+        self._next_time = self.start
+        self._binned = 0
+        self._progress = 0.0
+
+    def read(self):
+        now = time.monotonic()
+        if self._next_time > now:
+            time.sleep(self._next_time - now)
+        self._next_time = max(now, self._next_time) + self.period
+        elapsed = time.monotonic() - self.start
+        if self.deadline is not None and elapsed > self.deadline:
+            return None
+        self.chute.advance(elapsed)
+        if len(self.chute.binned) != self._binned:
+            self._binned, self._progress = len(self.chute.binned), elapsed
+        elif self.chute.in_view and elapsed - self._progress > self.chute.model.jam_timeout:
+            self.chute.clear_jam()
+        return self.frames[self.chute.in_view[0] if self.chute.in_view else None]
+
+
+def scaled_timings(speed):
+    """sort_timings() with the FSM's waits divided by speed"""
+    timings = sort_timings()
+    for name in ('bin_open_duration', 'gate_open_duration', 'clear_wait_time',
+                 'idle_sleep_time', 'gate1_timeout'):
+        setattr(timings, name, getattr(timings, name) / speed)
+    return timings
+
+
+def run(pool, lanes, seconds, fps, speed, seed=0):
+    timings = scaled_timings(speed)
+    chute_model = ChuteModel(jam_timeout=JAM_TIMEOUT)
+    frames = render_frames()
+    running, chutes = [], []
+    for i in range(lanes):
+        clock = VirtualClock()
+        chute = SimulatedChute(clock, chute_model, random.Random(seed + i))
+        camera = ChuteCamera(chute, clock, frames, fps)
+        lane = Lane(f"lane{i + 1}", camera, chute, pool, clock=clock, log=None)
+        lane.engine.timings = timings
+        camera.deadline = seconds
+        running.append(lane)
+        chutes.append(chute)
+    for lane in running:
+        lane.start()
+    for lane in running:
+        lane.join()
+    for lane in running:
+        if lane.error is not None:
+            raise lane.error
+
+    items = sum(len(chute.binned) for chute in chutes)
+    correct = sum(1 for chute in chutes for category, target in chute.binned if category == target)
+    lane_fps = [lane.fps for lane in running]
+    waits = [lane.wait_seconds / max(1, lane.frames) * 1000 for lane in running]
+    # Jain's index over frames served per lane: 1.0 = perfectly even
+    served = np.array([lane.frames for lane in running], dtype=float)
+    fairness = served.sum() ** 2 / (len(served) * (served ** 2).sum()) if served.any() else 0.0
+    return {"lanes": lanes, "items": items, "items_per_minute": items / seconds * 60,
+            "accuracy": correct / items if items else 0.0,
+            "double_feeds": sum(chute.double_feeds for chute in chutes),
+            "jams": sum(chute.jams for chute in chutes),
+            "fps_min": min(lane_fps), "fps_max": max(lane_fps),
+            "wait_ms_mean": sum(waits) / len(waits), "fairness": fairness}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lanes', default="1,2,4", help="Comma-separated lane counts")
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=30.0, help="Run time per lane count")
+    parser.add_argument('--infer-ms', type=float, default=50.0, help="Stub model CPU time per frame")
+    parser.add_argument('--fps', type=float, default=30.0, help="Camera frame rate per lane")
+    parser.add_argument('--speed', type=float, default=4.0, help="Divide FSM/chute timings by this")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    # Stub model: the tensor letterbox needs torch, and the stub reads raw frames anyway
+    pool = InferencePool(functools.partial(StubModel, args.infer_ms), args.workers,
+                         persistent_input=False).start()
+    try:
+        results = [run(pool, int(n), args.seconds, args.fps, args.speed)
+                   for n in args.lanes.split(',')]
+    finally:
+        pool.close()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    single = results[0]["items_per_minute"] / results[0]["lanes"] if results[0]["items"] else 0.0
+    print(f"{args.workers} workers, stub inference {args.infer_ms:.0f} ms, camera {args.fps:.0f} fps, "
+          f"timings / {args.speed:g}, {args.seconds:.0f}s per run")
+    print(f"{'lanes':>5} {'items/min':>10} {'scaling':>8} {'accuracy':>9} {'double':>7} "
+          f"{'fps min-max':>12} {'wait ms':>8} {'fairness':>9}")
+    for row in results:
+        scaling = row["items_per_minute"] / (single * row["lanes"]) if single else 0.0
+        fps_range = f"{row['fps_min']:.1f}-{row['fps_max']:.1f}"
+        print(f"{row['lanes']:>5} {row['items_per_minute']:>10.1f} {scaling:>7.0%} "
+              f"{row['accuracy']:>9.1%} {row['double_feeds']:>7} {fps_range:>12} {row['wait_ms_mean']:>8.1f} "
+              f"{row['fairness']:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Cost of the metrics instrumentation per detection frame
+
+Times the five stage timers run_detection wraps around every frame, a bare
+histogram observe(), and rendering the registry for one scrape:
+
+    python benchmarks/bench_metrics.py --frames 100000
+"""
+import argparse
+import json
+import time
+
+import bench_utils  # noqa: F401  (sets up the import path)
+
+from metrics import Registry, StageTimers
+
+STAGES = ('capture', 'inference', 'post_process', 'actuation', 'render')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=100000)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    registry = Registry()
+    stages = StageTimers(registry)
+    frames = registry.counter("trashbin_frames_total", "Frames processed")
+    wrapped = stages.wrap('render', lambda: None)
+
+    start = time.perf_counter()
+    for _ in range(args.frames):
+        for stage in STAGES[:-1]:
+            with stages.stage(stage):
+                pass
+        wrapped()
+        frames.inc()
+    per_frame = (time.perf_counter() - start) / args.frames
+
+    histogram = stages.histogram.labels('inference')
+    start = time.perf_counter()
+    for i in range(args.frames):
+        histogram.observe(i * 1e-6)
+    per_observe = (time.perf_counter() - start) / args.frames
+
+    start = time.perf_counter()
+    body = registry.render()
+    scrape = time.perf_counter() - start
+
+    report = {"frames": args.frames, "per_frame_us": per_frame * 1e6,
+              "observe_us": per_observe * 1e6, "scrape_ms": scrape * 1000,
+              "scrape_bytes": len(body)}
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{len(STAGES)} stage timers + frame counter: {report['per_frame_us']:.1f} µs per frame")
+    print(f"Histogram observe(): {report['observe_us']:.2f} µs")
+    print(f"Scrape: {report['scrape_ms']:.2f} ms, {report['scrape_bytes']} bytes")
+
+
+if __name__ == '__main__':
+    main()
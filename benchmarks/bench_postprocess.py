@@ -0,0 +1,95 @@
+"""Micro-benchmark: per-box post-processing loop vs vectorized summarize_detections
+
+    python benchmarks/bench_postprocess.py --boxes 1 10 50 200
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from bench_utils import percentile
+
+from object_detection import (LANDFILL_ITEMS, RECYCLABLE_ITEMS, build_category_lookup,
+                              summarize_detections)
+
+NAMES = {0: 'bottle-glass', 1: 'bottle-plastic', 2: 'cup-disposable', 3: 'cup-handle',
+         4: 'glass-mug', 5: 'glass-normal', 6: 'glass-wine', 7: 'gym bottle', 8: 'tin can'}
+
+
+def make_results(num_boxes, rng):
+    """Build an Ultralytics Results object with num_boxes random detections"""
+    import torch
+    from ultralytics.engine.results import Results
+
+    xy = rng.uniform(0, 600, size=(num_boxes, 2))
+    wh = rng.uniform(20, 120, size=(num_boxes, 2))
+    data = np.column_stack([xy, xy + wh,
+                            rng.uniform(0.25, 1.0, num_boxes),
+                            rng.integers(0, len(NAMES), num_boxes)])
+    image = np.zeros((720, 1280, 3), dtype=np.uint8)
+    return [Results(image, path='bench.jpg', names=NAMES,
+                    boxes=torch.tensor(data, dtype=torch.float32))]
+
+
+def legacy_postprocess(results, names):
+    """The original per-box loop, including the per-call list rebuilds"""
+    recyclable = landfill = unknown = 0
+    for result in results:
+        for box in result.boxes:
+            x1, y1, x2, y2 = map(int, box.xyxy[0])
+            class_name = names[int(box.cls[0])]
+            confidence = float(box.conf[0])
+            class_lower = class_name.lower()
+            if class_lower in [item.lower() for item in RECYCLABLE_ITEMS]:
+                recyclable += 1
+            elif class_lower in [item.lower() for item in LANDFILL_ITEMS]:
+                landfill += 1
+            else:
+                unknown += 1
+    return recyclable, landfill, unknown
+
+
+def time_calls(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return percentile(samples, 50) * 1e6, percentile(samples, 99) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--boxes', type=int, nargs='*', default=[1, 5, 20, 50, 100, 300])
+    parser.add_argument('--repeats', type=int, default=500)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    lookup = build_category_lookup(NAMES)
+    rows = []
+    for num_boxes in args.boxes:
+        results = make_results(num_boxes, rng)
+        counts = summarize_detections(results, lookup).counts.tolist()
+        assert tuple(counts) == legacy_postprocess(results, NAMES)
+
+        legacy_p50, legacy_p99 = time_calls(lambda: legacy_postprocess(results, NAMES), args.repeats)
+        fast_p50, fast_p99 = time_calls(lambda: summarize_detections(results, lookup), args.repeats)
+        rows.append({"boxes": num_boxes,
+                     "legacy_p50_us": legacy_p50, "legacy_p99_us": legacy_p99,
+                     "vectorized_p50_us": fast_p50, "vectorized_p99_us": fast_p99})
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(f"{'boxes':>5} {'legacy p50 us':>14} {'vector p50 us':>14} {'speedup':>8}")
+    for row in rows:
+        speedup = row['legacy_p50_us'] / max(row['vectorized_p50_us'], 1e-9)
+        print(f"{row['boxes']:>5} {row['legacy_p50_us']:>14.1f} "
+              f"{row['vectorized_p50_us']:>14.1f} {speedup:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Compare RollupEngine summaries with recomputing them from raw readings
+
+Feeds --days of readings every --interval seconds to a RollupEngine, then
+times the daily fill trend, weekly trend and 30-day alert counts against the
+same numbers computed from the raw readings with NumPy:
+
+    python benchmarks/bench_rollups.py --days 90
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+import bench_utils  # noqa: F401  (sets up the import path)
+
+from rollups import RollupEngine
+
+START = 1735689600.0  # 2025-01-01 00:00 UTC
+ALERT_HIGH, ALERT_MEDIUM = 80, 60
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--interval', type=float, default=5.0, help="Seconds between readings")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    t = START + np.arange(0, args.days * 86400, args.interval)
+    fill = (np.arange(len(t)) * 0.01) % 100
+    engine = RollupEngine(ALERT_HIGH, ALERT_MEDIUM)
+    start = time.perf_counter()
+    for ti, fi in zip(t.tolist(), fill.tolist()):
+        engine.add_reading(ti, fi)
+    add_us = (time.perf_counter() - start) / len(t) * 1e6
+
+    utc_offset = time.localtime().tm_gmtoff
+    last_month = t[-1] - 30 * 86400
+
+    def raw_daily_trend():
+        days = ((t + utc_offset) // 86400).astype(np.int64)
+        counts = np.bincount(days - days[0])
+        return np.bincount(days - days[0], weights=fill) / np.maximum(counts, 1)
+
+    def raw_alerts():
+        recent = fill[t >= last_month]
+        return int((recent >= ALERT_HIGH).sum()), int(((recent >= ALERT_MEDIUM)
+                                                       & (recent < ALERT_HIGH)).sum())
+
+    queries = {
+        "daily_trend": (lambda: engine.fill_trend('day'), raw_daily_trend),
+        "weekly_trend": (lambda: engine.fill_trend('day', group=7), raw_daily_trend),
+        "alerts_30_days": (lambda: engine.alert_counts('hour', start=last_month), raw_alerts),
+    }
+    report = {"readings": len(t), "add_reading_us": add_us, "queries": {}}
+    for name, (rollup, raw) in queries.items():
+        report["queries"][name] = {"rollup_ms": timed(rollup, args.repeat),
+                                   "raw_numpy_ms": timed(raw, args.repeat)}
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{report['readings']} readings, add_reading {report['add_reading_us']:.1f} µs each")
+    print(f"{'query':<16} {'rollup':>9} {'raw numpy':>10}")
+    for name, row in report["queries"].items():
+        print(f"{name:<16} {row['rollup_ms']:>7.2f}ms {row['raw_numpy_ms']:>8.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Compare history queries on SensorLog with re-parsing one flat CSV
+
+Logs --days of readings every --interval seconds to both a single CSV (the
+old LOG_FILE) and a SensorLog, then times reading the last day and a random
+hour back from each:
+
+    python benchmarks/bench_sensor_log.py --days 30
+"""
+import argparse
+import csv
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import bench_utils  # noqa: F401  (sets up the import path)
+
+from sensor_log import FIELDS, SensorLog
+
+START = 1735689600.0  # 2025-01-01 00:00 UTC
+
+
+def readings(days, interval):
+    fill = 0.0
+    for i in range(int(days * 86400 / interval)):
+        fill = (fill + 0.01) % 100
+        yield (START + i * interval, 100 - fill, fill, fill * 2.83)
+
+
+def read_flat_csv(path, start, end):
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        next(reader)
+        return [row for row in reader if start <= float(row[0]) < end]
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=float, default=30)
+    parser.add_argument('--interval', type=float, default=5.0, help="Seconds between readings")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        flat = Path(tmp) / 'trash_bin_data.csv'
+        log = SensorLog(Path(tmp) / 'sensor_log', flush_rows=60, flush_seconds=float('inf'))
+        t0 = time.perf_counter()
+        with open(flat, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(FIELDS)
+            for reading in readings(args.days, args.interval):
+                writer.writerow(reading)
+                log.append(reading)
+        log.close()
+        write_seconds = time.perf_counter() - t0
+
+        end = START + args.days * 86400
+        hour = START + random.Random(0).uniform(0, args.days * 86400 - 3600)
+        queries = {"last_day": (end - 86400, end), "random_hour": (hour, hour + 3600)}
+        report = {"readings": int(args.days * 86400 / args.interval),
+                  "write_seconds_both": write_seconds,
+                  "flat_csv_mb": flat.stat().st_size / 2**20,
+                  "queries": {}}
+        for name, (lo, hi) in queries.items():
+            csv_ms, csv_rows = timed(lambda: read_flat_csv(flat, lo, hi), args.repeat)
+            log_ms, log_rows = timed(lambda: log.read(lo, hi), args.repeat)
+            report["queries"][name] = {"rows": log_rows, "flat_csv_ms": csv_ms,
+                                       "sensor_log_ms": log_ms, "rows_match": csv_rows == log_rows}
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{report['readings']} readings, flat CSV {report['flat_csv_mb']:.1f} MB")
+    print(f"{'query':<12} {'rows':>6} {'flat CSV':>10} {'SensorLog':>10}")
+    for name, row in report["queries"].items():
+        print(f"{name:<12} {row['rows']:>6} {row['flat_csv_ms']:>8.1f}ms "
+              f"{row['sensor_log_ms']:>8.2f}ms{'' if row['rows_match'] else '  (row mismatch!)'}")
+
+
+if __name__ == '__main__':
+    main()
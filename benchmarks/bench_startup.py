@@ -0,0 +1,112 @@
+"""Startup cost of the CLI/server and control latency of the detector daemon
+
+Times fresh interpreter imports of the entry points (heavy modules are
+imported lazily), then runs DetectorService behind its control socket with a
+stub model and a synthetic camera and times start / reconfigure / stop:
+
+    python benchmarks/bench_startup.py --repeat 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import bench_utils  # noqa: F401  (sets up the import path)
+
+from bench_frame_path import SyntheticCapture
+from bench_utils import REPO_ROOT
+
+IMPORTS = {
+    "object_detection": "import object_detection",
+    "app_server": "import SmartTrashBinAppServer",
+    "daemon_client": "import detector_daemon",
+    "cv2+numpy (deferred)": "import cv2, numpy",
+}
+
+
+class StubModel:
+    names = {0: 'bottle-plastic', 1: 'cup-disposable'}
+
+    def __call__(self, image, **kwargs):
+        time.sleep(0.005)
+        return []
+
+
+def import_seconds(statement, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], cwd=REPO_ROOT, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def control_latencies(repeat):
+    import object_detection
+    from camera import CameraSource
+    from detector_daemon import ControlServer, DetectorService, send_command
+    from frame_buffers import FrameRing
+
+    object_detection.PERSISTENT_INPUT = False
+    with tempfile.TemporaryDirectory() as tmp:
+        object_detection.SAVE_DIR = os.path.join(tmp, 'detections')
+        service = DetectorService()
+        service.model = StubModel()
+        service.camera = CameraSource(cap=SyntheticCapture(), ring=FrameRing(8))
+        path = os.path.join(tmp, 'control.sock')
+        server = ControlServer(service, path)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        timings = {"status": [], "start": [], "set": [], "stop": []}
+        for i in range(repeat):
+            for command, settings in (("status", None), ("start", {"headless": True}),
+                                      ("set", {"conf_threshold": 0.3 + i / 100}), ("stop", None)):
+                start = time.perf_counter()
+                reply = send_command(command, settings, path)
+                timings[command].append(time.perf_counter() - start)
+                assert reply["ok"], reply
+                time.sleep(0.2)
+        runs = service.runs
+        server.shutdown()
+        server.server_close()
+        service.close()
+    return {command: min(values) * 1000 for command, values in timings.items()}, runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    imports = {name: import_seconds(statement, args.repeat) for name, statement in IMPORTS.items()}
+    baseline = import_seconds("pass", args.repeat)
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')  # run_detection is chatty
+    try:
+        control_ms, runs = control_latencies(args.repeat)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    report = {"interpreter_s": baseline, "import_s": imports, "control_ms": control_ms,
+              "detection_runs": runs}
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"Fresh interpreter: {baseline * 1000:.0f} ms")
+    for name, seconds in imports.items():
+        print(f"  {name:<22} {seconds * 1000:>6.0f} ms")
+    print("Daemon control round trip (stub model, synthetic camera):")
+    for command, ms in control_ms.items():
+        print(f"  {command:<7} {ms:>7.1f} ms")
+    print(f"  ({runs} detection runs on one warm model and camera)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""Shared helpers for the benchmark scripts"""
+import math
+import sys
+from pathlib import Path
+
+# Make the top-level project modules importable when run as a script
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+IMAGE_SUFFIXES = {'.jpg', '.jpeg', '.png', '.bmp'}
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of values (q in 0-100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(q / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def load_frames(source, limit=None):
+    """Load recorded frames from an image directory or a video file"""
+    import cv2
+
+    source = Path(source)
+    frames = []
+    if source.is_dir():
+        for path in sorted(source.iterdir()):
+            if path.suffix.lower() not in IMAGE_SUFFIXES:
+                continue
+            frame = cv2.imread(str(path))
+            if frame is not None:
+                frames.append(frame)
+            if limit and len(frames) >= limit:
+                break
+    else:
+        cap = cv2.VideoCapture(str(source))
+        while not limit or len(frames) < limit:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+
+    if not frames:
+        raise SystemExit(f"❌ No frames found in {source}")
+    return frames
@@ -0,0 +1,295 @@
+"""Evaluate the whole sorter offline on a labelled split, an image folder or a video
+
+Runs run_detection() headless on a ReplaySource, with the servos on a
+MockBackend, and reports:
+
+- precision/recall per category (RECYCLABLE / LANDFILL / UNKNOWN): YOLO
+  labels and predictions both go through classify_waste_type, and boxes
+  match at IoU >= --iou
+- the sort decision each labelled image would trigger (recyclable,
+  landfill, both or nothing) against the one its labels call for
+- frames per second through the full loop (capture, inference,
+  post-processing, FSM, saving)
+- per-item decision latency: first detection of an item while Gate 1 is
+  open until the bins are commanded, from the FSM on the mocked servos
+
+Labels are looked up YOLO-style (.../images/x.jpg -> .../labels/x.txt).
+Stills are independent, so labelled image folders run with tracking and
+motion gating off; a video keeps the configured pipeline and is paced at
+its own frame rate, which is what the FSM timings and item latency need.
+
+    python benchmarks/eval_replay.py --split test --dataset-root ~/datasets/TrashCan
+    python benchmarks/eval_replay.py --source recordings/chute.mp4 --output eval.json
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+import bench_utils  # noqa: F401  (sets up the import path)
+from bench_utils import REPO_ROOT, percentile
+
+import object_detection
+from camera import ReplaySource
+from model_backends import load_model
+from object_detection import (CATEGORY_LANDFILL, CATEGORY_NAMES, CATEGORY_RECYCLABLE,
+                              SERVO_GROUPS, build_category_lookup, create_servo_controller,
+                              warm_up)
+from servo_controller import MockBackend
+from sorting_engine import CLASSIFYING, GATE1_OPEN
+
+DECISIONS = ("RECYCLABLE", "LANDFILL", "BOTH", "NONE")
+
+
+def resolve_split(data_path, split, dataset_root=None):
+    """Image directory of a data.yaml split; the yaml may carry Windows paths"""
+    with open(data_path) as f:
+        data = yaml.safe_load(f)
+    root = Path(dataset_root) if dataset_root else Path(str(data.get('path', '')).replace('\\', '/'))
+    if not root.is_absolute():
+        root = Path(data_path).parent / root
+    directory = root / str(data[split]).replace('\\', '/')
+    if not directory.is_dir():
+        raise SystemExit(f"❌ {split} images not found at {directory} (set --dataset-root)")
+    return directory, list(data['names'])
+
+
+def labels_for(image_path, labels_dir=None):
+    """Label file of an image: labels_dir/x.txt, or the sibling labels/ directory"""
+    if labels_dir is not None:
+        return Path(labels_dir) / f"{image_path.stem}.txt"
+    parts = list(image_path.parts)
+    for i in range(len(parts) - 2, -1, -1):
+        if parts[i] == 'images':
+            parts[i] = 'labels'
+            break
+    return Path(*parts).with_suffix('.txt')
+
+
+def read_labels(path, width, height, lookup):
+    """YOLO label file as (boxes (N, 4) in pixels, categories (N,))"""
+    rows = []
+    if path.exists():
+        rows = [line.split() for line in path.read_text().splitlines() if line.strip()]
+    if not rows:
+        return np.empty((0, 4)), np.empty(0, dtype=np.intp)
+    values = np.array([[float(v) for v in row[:5]] for row in rows])
+    cx, cy, w, h = values[:, 1] * width, values[:, 2] * height, values[:, 3] * width, values[:, 4] * height
+    boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+    return boxes, lookup[values[:, 0].astype(np.intp)]
+
+
+def box_iou(a, b):
+    """IoU matrix between (N, 4) and (M, 4) xyxy boxes"""
+    a, b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.clip(bottom_right - top_left, 0, None).prod(axis=2)
+    area_a = (a[:, 2:] - a[:, :2]).prod(axis=1)
+    area_b = (b[:, 2:] - b[:, :2]).prod(axis=1)
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def sort_decision(recyclable, landfill):
+    """Which bins SortingEngine opens for these counts"""
+    if recyclable and landfill:
+        return "BOTH"
+    if recyclable:
+        return "RECYCLABLE"
+    if landfill:
+        return "LANDFILL"
+    return "NONE"
+
+
+class Scorer:
+    """Box matching per category and per-image decisions against YOLO labels"""
+
+    def __init__(self, names, iou_threshold=0.5):
+        self.lookup = build_category_lookup(dict(enumerate(names)))
+        self.iou_threshold = iou_threshold
+        self.counts = {name: {"tp": 0, "fp": 0, "fn": 0} for name in CATEGORY_NAMES}
+        self.confusion = {truth: dict.fromkeys(DECISIONS, 0) for truth in DECISIONS}
+        self.images = 0
+
+    def add(self, label_path, frame, detections):
+        height, width = frame.shape[:2]
+        truth_boxes, truth_categories = read_labels(label_path, width, height, self.lookup)
+        for category, name in enumerate(CATEGORY_NAMES):
+            predicted = detections.categories == category
+            boxes = detections.boxes[predicted]
+            order = np.argsort(-detections.confidences[predicted])
+            truth = truth_boxes[truth_categories == category]
+            matched = np.zeros(len(truth), dtype=bool)
+            ious = box_iou(boxes, truth) if len(boxes) and len(truth) else None
+            for i in order:
+                if ious is not None:
+                    candidates = np.where(matched, -1.0, ious[i])
+                    best = int(candidates.argmax())
+                    if candidates[best] >= self.iou_threshold:
+                        matched[best] = True
+                        self.counts[name]["tp"] += 1
+                        continue
+                self.counts[name]["fp"] += 1
+            self.counts[name]["fn"] += int((~matched).sum())
+
+        truth_counts = np.bincount(truth_categories, minlength=3)
+        truth = sort_decision(truth_counts[CATEGORY_RECYCLABLE], truth_counts[CATEGORY_LANDFILL])
+        predicted = sort_decision(detections.counts[CATEGORY_RECYCLABLE],
+                                  detections.counts[CATEGORY_LANDFILL])
+        self.confusion[truth][predicted] += 1
+        self.images += 1
+
+    def report(self):
+        per_class = {}
+        for name, c in self.counts.items():
+            if not c["tp"] + c["fp"] + c["fn"]:
+                continue
+            precision = c["tp"] / (c["tp"] + c["fp"]) if c["tp"] + c["fp"] else 0.0
+            recall = c["tp"] / (c["tp"] + c["fn"]) if c["tp"] + c["fn"] else 0.0
+            per_class[name] = {**c, "precision": precision, "recall": recall}
+        correct = sum(self.confusion[d][d] for d in DECISIONS)
+        return {"per_class": per_class,
+                "decisions": {"images": self.images,
+                              "accuracy": correct / self.images if self.images else 0.0,
+                              "confusion": self.confusion}}
+
+
+class DecisionLatency:
+    """Per item: first detection while Gate 1 is open -> bins commanded"""
+
+    def __init__(self):
+        self.items = []  # {"seconds", "frames", "decision"}
+        self._pending = None  # (time, frame index) of the item's first detection
+
+    def update(self, now, frame_index, detections, engine):
+        waiting = engine.state == GATE1_OPEN or (
+            engine.state == CLASSIFYING and engine.detected_waste_type is None)
+        if waiting:
+            if self._pending is None and len(detections.categories):
+                self._pending = (now, frame_index)
+        elif engine.state == CLASSIFYING and self._pending is not None:
+            seen_at, seen_frame = self._pending
+            self.items.append({"seconds": now - seen_at, "frames": frame_index - seen_frame,
+                               "decision": engine.detected_waste_type})
+            self._pending = None
+        else:
+            self._pending = None
+
+    def report(self):
+        seconds = [item["seconds"] for item in self.items]
+        frames = [item["frames"] for item in self.items]
+        return {"count": len(self.items),
+                "latency_ms_p50": percentile(seconds, 50) * 1000,
+                "latency_ms_p90": percentile(seconds, 90) * 1000,
+                "latency_ms_max": max(seconds, default=0.0) * 1000,
+                "frames_p50": percentile(frames, 50),
+                "decisions": {d: sum(1 for item in self.items if item["decision"] == d)
+                              for d in DECISIONS[:3]}}
+
+
+def evaluate(model, source, names=None, labels_dir=None, conf=0.25, iou=0.5, fps=None,
+             save_dir=None):
+    """Replay source through run_detection(); returns the report dict"""
+    replay = ReplaySource(source, fps)
+    labelled = replay.paths is not None and names is not None
+    if replay.paths is None and fps is None:
+        replay.fps = replay.native_fps
+    scorer = Scorer(names, iou) if labelled else None
+    latency = DecisionLatency()
+    times = []
+
+    def on_frame(frame, detections, engine):
+        now = time.perf_counter()
+        times.append(now)
+        if scorer is not None:
+            scorer.add(labels_for(replay.current, labels_dir), frame, detections)
+        if engine is not None:
+            latency.update(now, len(times), detections, engine)
+
+    # Stills are unrelated frames: no smoothing across them, no skipped inference
+    settings = {"tracking": object_detection.TRACKING and not labelled,
+                "motion_gating": object_detection.MOTION_GATING and not labelled}
+    servos = create_servo_controller(
+        MockBackend([pin for pins in SERVO_GROUPS.values() for pin in pins]))
+    try:
+        with tempfile.TemporaryDirectory() as scratch:
+            object_detection.run_detection(conf_threshold=conf, headless=True, enable_servo=True,
+                                           model=model, camera=replay, servos=servos,
+                                           frame_listener=on_frame, publish_events=False,
+                                           save_dir=save_dir or scratch, **settings)
+    finally:
+        servos.close()
+        replay.release()
+
+    elapsed = times[-1] - times[0] if len(times) > 1 else 0.0
+    report = {"source": str(source), "frames": len(times), "seconds": elapsed,
+              "fps": (len(times) - 1) / elapsed if elapsed else 0.0,
+              "settings": {"conf": conf, "iou": iou, "replay_fps": replay.fps, **settings},
+              "items": latency.report()}
+    if scorer is not None:
+        report.update(scorer.report())
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data', default=str(REPO_ROOT / 'data.yaml'))
+    parser.add_argument('--split', default='test', choices=['train', 'val', 'test'])
+    parser.add_argument('--dataset-root', help="Overrides the path: in data.yaml")
+    parser.add_argument('--source', help="Image directory or video instead of a data.yaml split")
+    parser.add_argument('--labels', help="Label directory for --source images (default: sibling labels/)")
+    parser.add_argument('--model', default=str(object_detection.MODEL_PATH))
+    parser.add_argument('--backend', default=object_detection.MODEL_BACKEND)
+    parser.add_argument('--int8', action='store_true')
+    parser.add_argument('--conf', type=float, default=0.25)
+    parser.add_argument('--iou', type=float, default=0.5, help="IoU for a box to count as found")
+    parser.add_argument('--fps', type=float, help="Replay pace (default: video rate, stills unpaced)")
+    parser.add_argument('--save-dir', help="Keep the annotated frames here")
+    parser.add_argument('--output', help="Also write the JSON report to this file")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    names = None
+    if args.source:
+        source = Path(args.source)
+        if source.is_dir():
+            with open(args.data) as f:
+                names = list(yaml.safe_load(f)['names'])
+    else:
+        source, names = resolve_split(args.data, args.split, args.dataset_root)
+
+    model, backend = load_model(Path(args.model), backend=args.backend, int8=args.int8,
+                                data=args.data)
+    warm_up(model)
+    report = evaluate(model, source, names, args.labels, args.conf, args.iou, args.fps,
+                      args.save_dir)
+    report.update({"model": args.model, "backend": backend, "int8": args.int8})
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"\n{report['frames']} frames from {report['source']} in {report['seconds']:.1f}s "
+          f"({report['fps']:.1f} fps, {report['backend']})")
+    if "per_class" in report:
+        print(f"{'category':<11} {'TP':>5} {'FP':>5} {'FN':>5} {'precision':>10} {'recall':>7}")
+        for name, row in report["per_class"].items():
+            print(f"{name:<11} {row['tp']:>5} {row['fp']:>5} {row['fn']:>5} "
+                  f"{row['precision']:>10.3f} {row['recall']:>7.3f}")
+        decisions = report["decisions"]
+        print(f"Sort decision correct on {decisions['accuracy']:.1%} of {decisions['images']} images")
+    items = report["items"]
+    if items["count"]:
+        print(f"{items['count']} items decided, latency p50 {items['latency_ms_p50']:.0f} ms "
+              f"({items['frames_p50']} frames), p90 {items['latency_ms_p90']:.0f} ms")
+    else:
+        print("No items went through the gates (expected for independent stills)")
+
+
+if __name__ == '__main__':
+    main()
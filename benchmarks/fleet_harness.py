@@ -0,0 +1,146 @@
+"""Run FleetAggregator against N simulated bin servers on localhost
+
+Each simulated bin publishes a status every --interval seconds; with
+--restarts, random bins go down for a few seconds and come back on the same
+port, so reconnect backoff is exercised. A fleet client connected to the
+aggregator measures how fresh the merged view is:
+
+    python benchmarks/fleet_harness.py --bins 200 --duration 30 --restarts 20
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import websockets
+
+from bench_utils import percentile
+
+from broadcast_hub import BroadcastHub
+from fleet_aggregator import FleetAggregator
+
+
+class SimulatedBin:
+    def __init__(self, bin_id, interval, rng):
+        self.bin_id = bin_id
+        self.interval = interval
+        self.rng = rng
+        self.hub = BroadcastHub()
+        self.fill = rng.uniform(0, 90)
+        self.port = 0
+        self.server = None
+        self.task = None
+
+    async def start(self):
+        self.server = await websockets.serve(self.hub.serve, "127.0.0.1", self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.task = asyncio.create_task(self._report())
+
+    async def stop(self):
+        self.task.cancel()
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _report(self):
+        await asyncio.sleep(self.rng.uniform(0, self.interval))
+        while True:
+            self.fill = min(100.0, self.fill + self.rng.uniform(0, 0.5))
+            self.hub.publish({"type": "status", "bin_id": self.bin_id, "timestamp": time.time(),
+                              "fill_percentage": round(self.fill, 1)}, key="status")
+            await asyncio.sleep(self.interval)
+
+
+async def fleet_client(url, latencies, counts):
+    async with websockets.connect(url) as ws:
+        async for raw in ws:
+            message = json.loads(raw)
+            counts[message["type"]] = counts.get(message["type"], 0) + 1
+            status = message.get("message")
+            if message["type"] == "bin_status" and status:
+                latencies.append(time.time() - status["timestamp"])
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    bins = [SimulatedBin(f"bin_{i:03d}", args.interval, rng) for i in range(args.bins)]
+    for simulated in bins:
+        await simulated.start()
+
+    aggregator = FleetAggregator(backoff_base=args.backoff_base, backoff_max=args.backoff_max)
+    latencies, counts = [], {}
+    async with websockets.serve(aggregator.serve, "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        client = asyncio.create_task(fleet_client(f"ws://127.0.0.1:{port}", latencies, counts))
+
+        start = time.perf_counter()
+        for simulated in bins:
+            aggregator.add_bin(simulated.bin_id, f"ws://127.0.0.1:{simulated.port}")
+        while sum(s.connected for s in aggregator.bins.values()) < len(bins):
+            await asyncio.sleep(0.05)
+        all_connected = time.perf_counter() - start
+
+        async def outage(simulated):
+            await simulated.stop()
+            await asyncio.sleep(rng.uniform(1.0, args.outage))
+            await simulated.start()
+
+        outages = []
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        end = started + args.duration
+        restart_times = sorted(rng.uniform(0, args.duration / 2) for _ in range(args.restarts))
+        for t, simulated in zip(restart_times, rng.sample(bins, min(args.restarts, len(bins)))):
+            await asyncio.sleep(max(0.0, started + t - loop.time()))
+            outages.append(asyncio.create_task(outage(simulated)))
+        await asyncio.gather(*outages, return_exceptions=True)
+        await asyncio.sleep(max(0.0, end - loop.time()))
+
+        connected = sum(s.connected for s in aggregator.bins.values())
+        connects = sum(s.connects for s in aggregator.bins.values())
+        client.cancel()
+        await asyncio.gather(client, return_exceptions=True)
+        hub_stats = aggregator.hub.stats()
+        await aggregator.close()
+
+    for simulated in bins:
+        await simulated.stop()
+
+    return {"bins": args.bins, "seconds_to_all_connected": all_connected,
+            "connected_at_end": connected, "reconnects": connects - args.bins,
+            "outages": args.restarts, "client_messages": counts,
+            "status_age_p50_ms": percentile(latencies, 50) * 1000,
+            "status_age_p99_ms": percentile(latencies, 99) * 1000,
+            "hub": hub_stats}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bins', type=int, default=100)
+    parser.add_argument('--interval', type=float, default=1.0, help="Seconds between bin reports")
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--restarts', type=int, default=10,
+                        help="Bins that go down once in the first half of the run")
+    parser.add_argument('--outage', type=float, default=5.0, help="Longest outage (s)")
+    parser.add_argument('--backoff-base', type=float, default=0.5)
+    parser.add_argument('--backoff-max', type=float, default=4.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"Bins: {report['bins']}, all connected after {report['seconds_to_all_connected']:.2f}s")
+    print(f"Outages: {report['outages']}, reconnects: {report['reconnects']}, "
+          f"connected at end: {report['connected_at_end']}/{report['bins']}")
+    print(f"Fleet client messages: {report['client_messages']}")
+    print(f"Status age at the fleet client: p50 {report['status_age_p50_ms']:.1f} ms, "
+          f"p99 {report['status_age_p99_ms']:.1f} ms")
+    print(f"Hub: {report['hub']['dropped']} dropped, {report['hub']['coalesced']} coalesced")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""Load test the WebSocket broadcast hub with many concurrent local clients
+
+Starts a server that publishes a bin-status message every --interval seconds
+through BroadcastHub, connects --clients clients from separate processes
+(--slow of them never read, so their sockets back up) and samples the
+server's event-loop lag. Lag per time window should stay flat:
+
+    python benchmarks/load_test_ws.py --clients 1000 --duration 30
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import socket
+import time
+
+import websockets
+
+from bench_utils import percentile
+
+from broadcast_hub import BroadcastHub, deflate_extensions
+
+LAG_PERIOD = 0.01  # Event-loop lag sampling period (s)
+SLOW_BUFFER = 4096  # Socket buffers of the clients that never read (bytes)
+
+
+async def run_clients(port, count, slow):
+    """Connect count clients and read until the server closes; returns fast-client counts"""
+    received = [0] * count
+
+    async def client(i):
+        sock = socket.socket()
+        if i < slow:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SLOW_BUFFER)  # see handler()
+        sock.setblocking(False)
+        await asyncio.get_running_loop().sock_connect(sock, ("127.0.0.1", port))
+        path = "/slow" if i < slow else "/"
+        async with websockets.connect(f"ws://127.0.0.1:{port}{path}", sock=sock,
+                                      open_timeout=60, max_queue=4) as ws:
+            if i < slow:
+                await ws.wait_closed()  # Never read
+                return
+            try:
+                async for _ in ws:
+                    received[i] += 1
+            except websockets.ConnectionClosedError:
+                pass
+
+    await asyncio.gather(*(client(i) for i in range(count)), return_exceptions=True)
+    return received[slow:]
+
+
+def client_process(port, count, slow, results):
+    results.put(asyncio.run(run_clients(port, count, slow)))
+
+
+def status_message(seq, history=0, bin_id="trash_bin_01"):
+    fill = 40 + 30 * random.random()
+    return {"type": "status", "seq": seq, "bin_id": bin_id,
+            "timestamp": time.time(), "fill_percentage": round(fill, 1),
+            "distance_cm": round(100 - fill, 1), "alert": "MEDIUM" if fill > 60 else "LOW",
+            "history": [round(fill - i * 0.1, 1) for i in range(history)]}
+
+
+async def run_server(args):
+    hub = BroadcastHub(args.queue)
+    options = {"compression": None}
+    if args.deflate:
+        options = {"extensions": deflate_extensions(level=args.deflate_level)}
+    loop = asyncio.get_running_loop()
+    lags, publish_times = [], []
+
+    async def sample_lag():
+        while True:
+            start = loop.time()
+            await asyncio.sleep(LAG_PERIOD)
+            lags.append((loop.time(), loop.time() - start - LAG_PERIOD))
+
+    async def handler(websocket):
+        if websocket.request.path == "/slow":
+            # Loopback buffers would absorb minutes of messages; shrink them so a
+            # client that stops reading backs up after a few, like a poor link
+            sock = websocket.transport.get_extra_info('socket')
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SLOW_BUFFER)
+            websocket.transport.set_write_buffer_limits(high=SLOW_BUFFER)
+        await hub.serve(websocket)
+
+    async with websockets.serve(handler, "127.0.0.1", 0, close_timeout=1,
+                                **options) as server:
+        port = server.sockets[0].getsockname()[1]
+        results = multiprocessing.Queue()
+        per_proc = [args.clients // args.procs + (i < args.clients % args.procs)
+                    for i in range(args.procs)]
+        slow_per_proc = [args.slow // args.procs + (i < args.slow % args.procs)
+                         for i in range(args.procs)]
+        connect_start = time.perf_counter()
+        procs = [multiprocessing.Process(target=client_process,
+                                         args=(port, n, s, results))
+                 for n, s in zip(per_proc, slow_per_proc)]
+        for p in procs:
+            p.start()
+        while len(hub.clients) < args.clients:
+            await asyncio.sleep(0.05)
+        connect_seconds = time.perf_counter() - connect_start
+
+        lag_task = asyncio.create_task(sample_lag())
+        start = loop.time()
+        seq = 0
+        while loop.time() - start < args.duration:
+            t0 = time.perf_counter()
+            hub.publish(status_message(seq, args.history), key="status")
+            publish_times.append(time.perf_counter() - t0)
+            seq += 1
+            await asyncio.sleep(args.interval)
+        lag_task.cancel()
+        stats = hub.stats()
+
+    # Leaving the server closes every connection, which ends the clients
+    fast = []
+    for _ in procs:
+        fast += await loop.run_in_executor(None, results.get)
+    for p in procs:
+        p.join()
+
+    windows = []
+    window_length = args.duration / args.windows
+    for w in range(args.windows):
+        lo, hi = start + w * window_length, start + (w + 1) * window_length
+        samples = [lag for t, lag in lags if lo <= t < hi]
+        windows.append({"p50_ms": percentile(samples, 50) * 1000,
+                        "p99_ms": percentile(samples, 99) * 1000,
+                        "max_ms": max(samples, default=0.0) * 1000})
+    return {
+        "clients": args.clients,
+        "slow_clients": args.slow,
+        "deflate": args.deflate,
+        "connect_seconds": connect_seconds,
+        "messages_published": seq,
+        "publish_p50_ms": percentile(publish_times, 50) * 1000,
+        "publish_p99_ms": percentile(publish_times, 99) * 1000,
+        "fast_client_min_received": min(fast, default=0),
+        "fast_client_mean_received": sum(fast) / max(len(fast), 1),
+        "lag_windows": windows,
+        "lag_p99_growth_ms": windows[-1]["p99_ms"] - windows[0]["p99_ms"],
+        "hub": stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--slow', type=int, default=50, help="Clients that never read")
+    parser.add_argument('--procs', type=int, default=4, help="Client processes")
+    parser.add_argument('--duration', type=float, default=20.0, help="Seconds of publishing")
+    parser.add_argument('--interval', type=float, default=0.1, help="Seconds between messages")
+    parser.add_argument('--history', type=int, default=50,
+                        help="Fill readings attached to each status (message size)")
+    parser.add_argument('--queue', type=int, default=8, help="Per-client send queue size")
+    parser.add_argument('--deflate', action='store_true', help="Enable permessage-deflate")
+    parser.add_argument('--deflate-level', type=int, default=1)
+    parser.add_argument('--windows', type=int, default=4, help="Lag report windows")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+    args.slow = min(args.slow, args.clients)
+
+    report = asyncio.run(run_server(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"Clients: {report['clients']} ({report['slow_clients']} slow), "
+          f"connected in {report['connect_seconds']:.1f}s")
+    print(f"Published {report['messages_published']} messages, "
+          f"publish p50 {report['publish_p50_ms']:.2f} ms / p99 {report['publish_p99_ms']:.2f} ms")
+    print(f"Fast clients received min {report['fast_client_min_received']} / "
+          f"mean {report['fast_client_mean_received']:.1f}")
+    print(f"{'window':>6} {'lag p50':>9} {'lag p99':>9} {'lag max':>9}")
+    for i, w in enumerate(report['lag_windows']):
+        print(f"{i:>6} {w['p50_ms']:>7.2f}ms {w['p99_ms']:>7.2f}ms {w['max_ms']:>7.2f}ms")
+    print(f"Lag p99 growth: {report['lag_p99_growth_ms']:+.2f} ms")
+    hub = report['hub']
+    print(f"Hub: {hub['dropped']} dropped, {hub['coalesced']} coalesced, {hub['queued']} queued")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""Replay recorded detection sequences and count servo actuations per item
+
+Each .jsonl file (written by run_detection(record_path=...)) is one item
+passing through the chute. The frames drive SortingEngine, starting with
+Gate 1 open, on a clock taken from the recording, twice: once with raw
+per-frame counts and once through ItemTracker. Every command the engine
+sends to the actuator is counted until it is ready for the next item, so
+flicker shows up as extra actuations per item.
+
+    python benchmarks/replay_actuations.py recordings/*.jsonl
+    python benchmarks/replay_actuations.py --synthetic 200 --flip 0.15 --miss 0.1
+"""
+import argparse
+import json
+import random
+from pathlib import Path
+
+import numpy as np
+
+import bench_utils  # noqa: F401  (sets up the import path)
+
+from object_detection import (CATEGORY_LANDFILL, CATEGORY_RECYCLABLE, TRACK_IOU_THRESHOLD,
+                              TRACK_MAX_MISSED, TRACK_MIN_VOTES, TRACK_WINDOW, sort_timings)
+from sort_simulator import VirtualClock
+from sorting_engine import CLASSIFYING, GATE1_OPEN, GATE2_OPEN, SortingEngine, WAITING_GATE1
+from tracking import ItemTracker, stable_counts
+
+FRAME_PERIOD = 0.1  # Used for synthetic frames and recordings without timestamps
+
+
+class CountingActuator:
+    """Counts gate and bin commands instead of moving servos"""
+
+    def __init__(self):
+        self.gate_moves = 0
+        self.bin_moves = 0
+
+    def open_gate1(self):
+        self.gate_moves += 1
+
+    def close_gate1(self):
+        self.gate_moves += 1
+
+    def set_bins(self, recycle_open, landfill_open):
+        self.bin_moves += 1
+
+    def open_gate2(self, delay=0.0):
+        self.gate_moves += 1
+
+    def close_gate2(self):
+        self.gate_moves += 1
+
+
+def load_sequence(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def synthetic_sequence(rng, frames=30, flip=0.15, miss=0.1):
+    """One item: a few empty frames, then a noisy detection of its true category"""
+    category = rng.choice([CATEGORY_RECYCLABLE, CATEGORY_LANDFILL])
+    x, y = rng.randint(200, 800), rng.randint(100, 400)
+    sequence = [{"boxes": [], "categories": [], "confidences": []} for _ in range(3)]
+    for _ in range(frames):
+        if rng.random() < miss:
+            sequence.append({"boxes": [], "categories": [], "confidences": []})
+            continue
+        observed = (CATEGORY_LANDFILL + CATEGORY_RECYCLABLE - category
+                    if rng.random() < flip else category)
+        jitter = [rng.randint(-6, 6) for _ in range(4)]
+        box = [x + jitter[0], y + jitter[1], x + 120 + jitter[2], y + 200 + jitter[3]]
+        sequence.append({"boxes": [box], "categories": [observed],
+                         "confidences": [round(rng.uniform(0.4, 0.95), 3)]})
+    sequence += [{"boxes": [], "categories": [], "confidences": []} for _ in range(5)]
+    return sequence
+
+
+def count_actuations(sequence, tracker=None, max_tail=600):
+    """Gate and bin commands SortingEngine issues for one recorded item
+
+    After the recording ends, empty frames keep coming until the engine is
+    back in WAITING_GATE1 (or max_tail frames have passed).
+    """
+    actuator = CountingActuator()
+    start = sequence[0].get("t", 0.0) if sequence else 0.0
+    clock = VirtualClock(start)
+    engine = SortingEngine(actuator, sort_timings(), clock=clock, log=None)
+    engine.state = GATE1_OPEN  # The item is on its way in
+
+    empty = {"boxes": [], "categories": [], "confidences": []}
+    frames = list(sequence) + [empty] * max_tail
+    seen_item = False
+    for i, frame in enumerate(frames):
+        if i < len(sequence):
+            clock.now = frame.get("t", start + i * FRAME_PERIOD)
+        else:
+            clock.now += FRAME_PERIOD
+        categories = np.asarray(frame["categories"], dtype=np.intp)
+        if tracker is not None:
+            items = tracker.update(frame["boxes"], categories, frame["confidences"])
+            counts = stable_counts(items)
+        else:
+            counts = np.bincount(categories, minlength=3)
+
+        state = engine.step(int(counts[CATEGORY_RECYCLABLE]), int(counts[CATEGORY_LANDFILL]))
+        seen_item = seen_item or state in (CLASSIFYING, GATE2_OPEN)
+        if seen_item and state == WAITING_GATE1:
+            break
+    return actuator.gate_moves, actuator.bin_moves
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('sequences', nargs='*', help="Recorded .jsonl files, one item each")
+    parser.add_argument('--synthetic', type=int, default=0, help="Generate N noisy items")
+    parser.add_argument('--flip', type=float, default=0.15, help="Synthetic misclassification rate")
+    parser.add_argument('--miss', type=float, default=0.1, help="Synthetic missed-detection rate")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    sequences = [load_sequence(Path(p)) for p in args.sequences]
+    rng = random.Random(args.seed)
+    sequences += [synthetic_sequence(rng, flip=args.flip, miss=args.miss)
+                  for _ in range(args.synthetic)]
+    if not sequences:
+        parser.error("give recorded sequences or --synthetic N")
+
+    totals = {"raw": [0, 0], "tracked": [0, 0]}
+    for sequence in sequences:
+        for mode in totals:
+            tracker = None
+            if mode == "tracked":
+                tracker = ItemTracker(TRACK_IOU_THRESHOLD, TRACK_WINDOW,
+                                      TRACK_MIN_VOTES, TRACK_MAX_MISSED)
+            gate_moves, bin_moves = count_actuations(sequence, tracker)
+            totals[mode][0] += gate_moves
+            totals[mode][1] += bin_moves
+
+    items = len(sequences)
+    report = {mode: {"gate_moves_per_item": gates / items,
+                     "bin_moves_per_item": bins / items,
+                     "actuations_per_item": (gates + bins) / items}
+              for mode, (gates, bins) in totals.items()}
+    report["items"] = items
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"Items: {items}")
+    print(f"{'mode':<8} {'gates/item':>11} {'bins/item':>10} {'total/item':>11}")
+    for mode in ("raw", "tracked"):
+        row = report[mode]
+        print(f"{mode:<8} {row['gate_moves_per_item']:>11.2f} {row['bin_moves_per_item']:>10.2f} "
+              f"{row['actuations_per_item']:>11.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Tune the sorting timings for items per hour with the discrete-event simulator
+
+Runs SortingEngine through thousands of synthetic items per timing
+combination, faster than real time, and ranks them by throughput while
+keeping sorting accuracy within --max-accuracy-drop of the current config:
+
+    python benchmarks/simulate_throughput.py --items 2000 --tracking
+"""
+import argparse
+import itertools
+import json
+from dataclasses import asdict
+
+import bench_utils  # noqa: F401  (sets up the import path)
+
+from object_detection import (TRACK_IOU_THRESHOLD, TRACK_MAX_MISSED, TRACK_MIN_VOTES,
+                              TRACK_WINDOW, sort_timings)
+from sort_simulator import ChuteModel, simulate
+from tracking import ItemTracker
+
+
+def parse_values(text):
+    return [float(v) for v in text.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=2000)
+    parser.add_argument('--bin-open', type=parse_values, default=[1.0, 1.5, 2.0, 2.5])
+    parser.add_argument('--clear-wait', type=parse_values, default=[0.5, 1.0, 1.5])
+    parser.add_argument('--gate-open', type=parse_values, default=[0.5, 1.0, 2.0])
+    parser.add_argument('--fps', type=float, default=10.0)
+    parser.add_argument('--miss-rate', type=float, default=0.05)
+    parser.add_argument('--flip-rate', type=float, default=0.05)
+    parser.add_argument('--arrival-interval', type=float, default=None,
+                        help="Mean seconds between items (default: always an item waiting)")
+    parser.add_argument('--tracking', action='store_true', help="Smooth counts with ItemTracker")
+    parser.add_argument('--max-accuracy-drop', type=float, default=0.01)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    model = ChuteModel(fps=args.fps, miss_rate=args.miss_rate, flip_rate=args.flip_rate,
+                       arrival_interval=args.arrival_interval)
+    tracker_factory = None
+    if args.tracking:
+        def tracker_factory():
+            return ItemTracker(TRACK_IOU_THRESHOLD, TRACK_WINDOW, TRACK_MIN_VOTES, TRACK_MAX_MISSED)
+
+    def run(timings):
+        return simulate(timings, args.items, model, args.seed, tracker_factory)
+
+    baseline = run(sort_timings())
+    results = []
+    for bin_open, clear_wait, gate_open in itertools.product(args.bin_open, args.clear_wait,
+                                                             args.gate_open):
+        timings = sort_timings()
+        timings.bin_open_duration = bin_open
+        timings.clear_wait_time = clear_wait
+        timings.gate_open_duration = gate_open
+        results.append(run(timings))
+
+    eligible = [r for r in results if r.accuracy >= baseline.accuracy - args.max_accuracy_drop]
+    eligible.sort(key=lambda r: r.items_per_hour, reverse=True)
+
+    def row(result):
+        return {**asdict(result.timings),
+                "items_per_hour": result.items_per_hour,
+                "accuracy": result.accuracy,
+                "double_feeds": result.double_feeds,
+                "jams": result.jams,
+                "actuations_per_item": result.actuations / max(result.items, 1),
+                "sim_seconds": result.sim_seconds}
+
+    if args.json:
+        print(json.dumps({"baseline": row(baseline),
+                          "ranked": [row(r) for r in eligible[:args.top]]}, indent=2))
+        return
+
+    print(f"{'bin_open':>8} {'clear':>6} {'gate2':>6} {'items/h':>8} {'accuracy':>9} "
+          f"{'dbl':>4} {'jams':>5}")
+
+    def show(result, tag=''):
+        t = result.timings
+        print(f"{t.bin_open_duration:>8.2f} {t.clear_wait_time:>6.2f} {t.gate_open_duration:>6.2f} "
+              f"{result.items_per_hour:>8.0f} {result.accuracy:>9.3f} "
+              f"{result.double_feeds:>4} {result.jams:>5} {tag}")
+
+    show(baseline, '(current)')
+    for result in eligible[:args.top]:
+        show(result)
+
+
+if __name__ == '__main__':
+    main()
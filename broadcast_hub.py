@@ -0,0 +1,308 @@
+"""Fan-out of server messages to many WebSocket clients
+
+Each message is serialized once per wire format and the same bytes are handed
+to every client's bounded send queue, which its own writer task drains. A slow
+client only loses its own stale messages; it never holds up the broadcast or
+the other clients.
+
+Clients pick a wire format with the WebSocket subprotocol (see SUBPROTOCOLS):
+plain JSON by default, MessagePack, and for either one a delta mode where
+keyed messages such as the bin status arrive as JSON-patch operations against
+the previous one, with a full snapshot every snapshot_every messages and
+whenever the client missed a delta.
+"""
+import asyncio
+import json
+from collections import OrderedDict
+
+from websockets.exceptions import ConnectionClosed
+from websockets.extensions.permessage_deflate import ServerPerMessageDeflateFactory
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+
+def encode_message(message):
+    """Serialize a message once for every client (UTF-8 JSON text)"""
+    return json.dumps(message, separators=(',', ':')).encode('utf-8')
+
+
+def encode_msgpack(message):
+    return msgpack.packb(message, use_bin_type=True)
+
+
+CODECS = {"json": encode_message}  # codec -> encoder
+if MSGPACK_AVAILABLE:
+    CODECS["msgpack"] = encode_msgpack
+
+# subprotocol -> (codec, delta); no subprotocol means plain JSON
+SUBPROTOCOLS = {
+    "trashbin.json": ("json", False),
+    "trashbin.json-delta": ("json", True),
+    "trashbin.msgpack": ("msgpack", False),
+    "trashbin.msgpack-delta": ("msgpack", True),
+}
+
+
+def supported_subprotocols():
+    return [name for name, (codec, _) in SUBPROTOCOLS.items() if codec in CODECS]
+
+
+def select_subprotocol(connection, offered):
+    """websockets.serve(select_subprotocol=...): first offered format we support
+
+    Clients that offer none, or none we know, still connect with plain JSON.
+    """
+    supported = supported_subprotocols()
+    for name in offered:
+        if name in supported:
+            return name
+    return None
+
+
+def _escape(key):
+    return str(key).replace('~', '~0').replace('/', '~1')
+
+
+def _unescape(token):
+    return token.replace('~1', '/').replace('~0', '~')
+
+
+def json_patch(old, new, path=''):
+    """RFC 6902 operations turning old into new
+
+    Objects are diffed key by key; lists and scalars are replaced whole.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in old:
+                ops.append({"op": "add", "path": child, "value": value})
+            else:
+                ops.extend(json_patch(old[key], value, child))
+        return ops
+    if type(old) is type(new) and old == new:
+        return []
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def apply_patch(document, ops):
+    """Apply json_patch() output to document; returns the patched document"""
+    for op in ops:
+        if op["path"] == '':
+            document = op["value"]
+            continue
+        *parents, last = [_unescape(t) for t in op["path"].split('/')[1:]]
+        target = document
+        for token in parents:
+            target = target[token]
+        if op["op"] == "remove":
+            del target[last]
+        else:
+            target[last] = op["value"]
+    return document
+
+
+def deflate_extensions(level=1, window_bits=12, mem_level=5, no_context_takeover=False):
+    """permessage-deflate settings for websockets.serve(extensions=...)
+
+    Fast compression with a small window keeps per-connection zlib memory
+    and CPU low on the Pi. no_context_takeover trades ratio for memory: no
+    compressor state is kept between messages.
+    """
+    return [ServerPerMessageDeflateFactory(
+        server_no_context_takeover=no_context_takeover,
+        server_max_window_bits=window_bits,
+        compress_settings={"level": level, "memLevel": mem_level},
+    )]
+
+
+class Outgoing:
+    """One published message, encoded lazily and at most once per wire format
+
+    Keyed messages also carry their sequence number and, when the hub could
+    diff it against the previous message with the same key, the patch from
+    seq base.
+    """
+
+    def __init__(self, message, key=None, seq=None, base=None, patch=None):
+        self.message = message
+        self.key = key
+        self.seq = seq
+        self.base = base
+        self.patch = patch
+        self._encoded = {}
+
+    def encoded(self, codec, kind='plain'):
+        cached = self._encoded.get((codec, kind))
+        if cached is None:
+            if kind == 'snapshot':
+                body = {"type": "snapshot", "key": self.key, "seq": self.seq,
+                        "data": self.message}
+            elif kind == 'delta':
+                body = {"type": "delta", "key": self.key, "seq": self.seq,
+                        "base": self.base, "patch": self.patch}
+            else:
+                body = self.message
+            cached = self._encoded[(codec, kind)] = CODECS[codec](body)
+        return cached
+
+
+class ClientChannel:
+    """Bounded send queue and writer task for one connection
+
+    A message published with a key replaces the queued message with the same
+    key (only the latest status matters). When the queue is still full the
+    oldest message is dropped. Delta clients get a snapshot instead of a
+    delta whenever they did not receive the delta's base.
+    """
+
+    def __init__(self, websocket, max_queue=8):
+        self.websocket = websocket
+        self.max_queue = max_queue
+        self.codec, self.delta = SUBPROTOCOLS.get(getattr(websocket, 'subprotocol', None),
+                                                  ("json", False))
+        self.pending = OrderedDict()  # key -> Outgoing, oldest first
+        self.last_seq = {}  # key -> seq of the last keyed message sent (delta mode)
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.task = None
+        self._wakeup = asyncio.Event()
+        self._seq = 0
+
+    def offer(self, outgoing):
+        key = outgoing.key
+        if key is not None and key in self.pending:
+            self.pending[key] = outgoing
+            self.coalesced += 1
+        else:
+            if len(self.pending) >= self.max_queue:
+                self.pending.popitem(last=False)
+                self.dropped += 1
+            if key is None:
+                self._seq += 1
+                key = ('_', self._seq)
+            self.pending[key] = outgoing
+        self._wakeup.set()
+
+    def payload(self, outgoing):
+        if not self.delta or outgoing.seq is None:
+            return outgoing.encoded(self.codec)
+        kind = 'snapshot'
+        if outgoing.patch is not None and self.last_seq.get(outgoing.key) == outgoing.base:
+            kind = 'delta'
+        self.last_seq[outgoing.key] = outgoing.seq
+        return outgoing.encoded(self.codec, kind)
+
+    async def run(self):
+        text = self.codec == "json"
+        try:
+            while True:
+                while not self.pending:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                _, outgoing = self.pending.popitem(last=False)
+                await self.websocket.send(self.payload(outgoing), text=text)
+                self.sent += 1
+        except ConnectionClosed:
+            pass
+
+
+class BroadcastHub:
+    """Connected clients and the messages published to all of them"""
+
+    def __init__(self, max_queue=8, snapshot_every=30):
+        self.max_queue = max_queue
+        self.snapshot_every = snapshot_every
+        self.clients = {}  # websocket -> ClientChannel
+        self.published = 0
+        self._latest = {}  # key -> (seq, message, deltas since the last snapshot)
+        self._closed_dropped = 0
+        self._closed_coalesced = 0
+
+    def register(self, websocket):
+        channel = ClientChannel(websocket, self.max_queue)
+        channel.task = asyncio.create_task(channel.run())
+        self.clients[websocket] = channel
+        return channel
+
+    def unregister(self, websocket):
+        channel = self.clients.pop(websocket, None)
+        if channel is not None:
+            channel.task.cancel()
+            self._closed_dropped += channel.dropped
+            self._closed_coalesced += channel.coalesced
+
+    async def serve(self, websocket):
+        """Connection handler for clients that only listen"""
+        self.register(websocket)
+        try:
+            await websocket.wait_closed()
+        finally:
+            self.unregister(websocket)
+
+    def publish(self, message, key=None):
+        """Queue message for every client; returns the number of clients
+
+        Messages with a key are coalesced per client and sent to delta
+        clients as patches against the previous message with that key.
+        """
+        self.published += 1
+        outgoing = Outgoing(message, key)
+        unchanged = False
+        if key is not None:
+            outgoing.seq = self.published
+            previous = self._latest.get(key)
+            deltas = 0
+            if previous is not None and previous[2] < self.snapshot_every and any(
+                    channel.delta for channel in self.clients.values()):
+                outgoing.base = previous[0]
+                outgoing.patch = json_patch(previous[1], message)
+                deltas = previous[2] + 1
+                unchanged = not outgoing.patch
+            if unchanged:
+                # Same content as seq previous[0]; still counts toward the next
+                # snapshot so a steady status resyncs every snapshot_every reports
+                outgoing.seq, outgoing.patch = previous[0], None
+                self._latest[key] = (previous[0], previous[1], deltas)
+            else:
+                self._latest[key] = (outgoing.seq, message, deltas)
+
+        for channel in self.clients.values():
+            if unchanged and channel.delta and channel.last_seq.get(key) == outgoing.seq:
+                continue  # Already has this status; it only wants changes
+            channel.offer(outgoing)
+        return len(self.clients)
+
+    def send(self, websocket, message, key=None):
+        """Queue message for one client, e.g. a reply to its request"""
+        channel = self.clients.get(websocket)
+        if channel is None:
+            return False
+        channel.offer(Outgoing(message, key))
+        return True
+
+    def resync(self, websocket):
+        """Make the next keyed messages to this client full snapshots"""
+        channel = self.clients.get(websocket)
+        if channel is not None:
+            channel.last_seq.clear()
+
+    def stats(self):
+        channels = list(self.clients.values())
+        return {
+            "clients": len(channels),
+            "delta_clients": sum(1 for c in channels if c.delta),
+            "published": self.published,
+            "queued": sum(len(c.pending) for c in channels),
+            "dropped": self._closed_dropped + sum(c.dropped for c in channels),
+            "coalesced": self._closed_coalesced + sum(c.coalesced for c in channels),
+        }
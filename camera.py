@@ -0,0 +1,176 @@
+"""Camera sources for the waste sorter (Picamera2 with an OpenCV fallback)"""
+import time
+from pathlib import Path
+
+from lazy_imports import lazy_import, module_available
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+# picamera2 (and libcamera behind it) is only imported when a camera is opened
+PICAMERA2_AVAILABLE = module_available('picamera2')
+
+FRAME_SIZE = (1280, 720)
+IMAGE_SUFFIXES = {'.jpg', '.jpeg', '.png', '.bmp'}
+
+
+class CameraSource:
+    """Uniform read/release wrapper around Picamera2 or cv2.VideoCapture
+
+    With a FrameRing (frame_buffers.py) frames are captured into its reused
+    buffers instead of a new array per frame. Each frame read() returns is
+    then held once by the caller, who gives it back with
+    frame_buffers.release(frame) (a no-op for frames from anywhere else).
+    """
+
+    def __init__(self, picam2=None, cap=None, ring=None):
+        self.picam2 = picam2
+        self.cap = cap
+        self.ring = ring
+        self._shape = None  # Learned from the first frame
+
+    def read(self):
+        """Return the next frame, or None if the camera failed"""
+        out = None
+        if self.ring is not None and self._shape is not None:
+            out = self.ring.acquire(self._shape)
+        if self.picam2 is not None:
+            frame = self._capture_picamera2(out)
+        else:
+            ret, frame = self.cap.read(out) if out is not None else self.cap.read()
+            if not ret:
+                frame = None
+        if out is not None and frame is not out:
+            self.ring.release(out)  # Failed, or OpenCV allocated a new array
+        if frame is not None:
+            self._shape = frame.shape
+        return frame
+
+    def _capture_picamera2(self, out):
+        if out is None:
+            return self.picam2.capture_array()
+        from picamera2 import MappedArray
+
+        # Copy straight out of the mapped camera buffer into the ring slot
+        with self.picam2.captured_request() as request:
+            with MappedArray(request, "main") as mapped:
+                height, width = out.shape[:2]
+                np.copyto(out, mapped.array[:height, :width])
+        return out
+
+    def release(self):
+        if self.picam2 is not None:
+            self.picam2.stop()
+        if self.cap is not None:
+            self.cap.release()
+
+
+class ReplaySource:
+    """Frames from an image directory or a video file, read like a camera
+
+    fps paces read() like a live camera would (None reads as fast as the
+    caller asks). current is the image path, or frame number for a video,
+    of the last frame returned.
+    """
+
+    def __init__(self, source, fps=None):
+        self.source = Path(source)
+        self.fps = fps
+        self.ring = None
+        self.paths = None
+        self.cap = None
+        if self.source.is_dir():
+            self.paths = sorted(p for p in self.source.iterdir()
+                                if p.suffix.lower() in IMAGE_SUFFIXES)
+        else:
+            self.cap = cv2.VideoCapture(str(self.source))
+            if not self.cap.isOpened():
+                raise FileNotFoundError(f"Cannot open video {self.source}")
+        self.frames_read = 0
+        self.current = None
+        self._next_time = None
+
+    @property
+    def native_fps(self):
+        """Frame rate stored in the video (None for image directories)"""
+        if self.cap is None:
+            return None
+        return self.cap.get(cv2.CAP_PROP_FPS) or None
+
+    def __len__(self):
+        if self.paths is not None:
+            return len(self.paths)
+        return int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    def read(self):
+        """Return the next frame, or None at the end"""
+        if self.fps:
+            now = time.monotonic()
+            if self._next_time is not None and self._next_time > now:
+                time.sleep(self._next_time - now)
+            self._next_time = max(now, self._next_time or now) + 1.0 / self.fps
+        if self.paths is not None:
+            frame = None
+            while frame is None and self.frames_read < len(self.paths):
+                self.current = self.paths[self.frames_read]
+                self.frames_read += 1
+                frame = cv2.imread(str(self.current))
+            return frame
+        ret, frame = self.cap.read()
+        if not ret:
+            return None
+        self.current = self.frames_read
+        self.frames_read += 1
+        return frame
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+
+
+def open_camera(size=FRAME_SIZE, ring=None, device=None):
+    """Open Picamera2 if available, otherwise the first working /dev/video0-2
+
+    device selects one camera instead, for multi-lane setups: an int is a
+    /dev/video index (OpenCV only), 'picamera2:N' is CSI camera N.
+    """
+    devices, camera_num = [0, 1, 2], 0
+    if isinstance(device, int):
+        devices = [device]
+    elif device is not None:
+        camera_num, devices = int(str(device).partition(':')[2] or 0), []
+
+    if PICAMERA2_AVAILABLE and not isinstance(device, int):
+        try:
+            from picamera2 import Picamera2
+
+            print(f"\nInitializing Picamera2 (camera {camera_num})...")
+            picam2 = Picamera2(camera_num)
+            config = picam2.create_preview_configuration(
+                main={"size": size, "format": "RGB888"}
+            )
+            picam2.configure(config)
+            picam2.start()
+            time.sleep(2)
+            print("✓ Picamera2 initialized")
+            return CameraSource(picam2=picam2, ring=ring)
+        except Exception as e:
+            print(f"⚠ Picamera2 failed: {e}")
+
+    elif not isinstance(device, int):
+        print("⚠ Warning: picamera2 not available, will try standard cv2")
+
+    print("Trying OpenCV VideoCapture...")
+    for device in devices:
+        test_cap = cv2.VideoCapture(device, cv2.CAP_V4L2)
+        if test_cap.isOpened():
+            ret, frame = test_cap.read()
+            if ret and frame is not None:
+                print(f"✓ Camera opened on device {device}")
+                test_cap.set(cv2.CAP_PROP_FRAME_WIDTH, size[0])
+                test_cap.set(cv2.CAP_PROP_FRAME_HEIGHT, size[1])
+                return CameraSource(cap=test_cap, ring=ring)
+            test_cap.release()
+
+    print("❌ Could not open camera")
+    return None
@@ -0,0 +1,273 @@
+"""Persistent detector service with a Unix-socket control channel
+
+`python detector_daemon.py serve` loads and warms up the model, opens the
+camera and initializes the servos once, then waits for commands. Each
+command is one JSON object per line on CONTROL_SOCKET_PATH and gets one JSON
+reply:
+
+    python detector_daemon.py start --headless --servo --conf 0.3
+    python detector_daemon.py set --conf 0.4      # restarts the run, stays warm
+    python detector_daemon.py status
+    python detector_daemon.py stop
+    python detector_daemon.py shutdown
+
+The client side only needs the standard library; object_detection (and with
+it OpenCV, NumPy and Ultralytics) is imported by `serve` alone.
+"""
+import argparse
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+
+CONTROL_SOCKET_PATH = '/tmp/trashbin-detector.sock'
+RUN_SETTINGS = {  # run_detection() keyword -> default
+    'headless': True,
+    'enable_servo': False,
+    'conf_threshold': 0.25,
+    'pipelined': False,
+    'batch_size': 1,
+}
+
+
+class DetectorService:
+    """Keeps model, camera and servos open and runs run_detection() on a thread"""
+
+    def __init__(self, backend=None, int8=None, detection=None):
+        if detection is None:
+            import object_detection as detection
+        self.detection = detection
+        self.backend = backend
+        self.loaded_backend = None  # Runtime the model actually loaded on
+        self.int8 = int8
+        self.settings = dict(RUN_SETTINGS)
+        self.metrics = detection.DetectionMetrics()  # Shared by every run; serve() exposes it
+        self.model = None
+        self.camera = None
+        self.servos = None
+        self.startup = {}  # step -> seconds, from prepare()
+        self.runs = 0
+        self.error = None
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def prepare(self):
+        """Load and warm up the model, open the camera, move the servos home"""
+        detection = self.detection
+        started = time.perf_counter()
+        if self.model is None:
+            self.model, self.loaded_backend = detection.load_model(
+                detection.MODEL_PATH,
+                backend=self.backend or detection.MODEL_BACKEND,
+                int8=detection.MODEL_INT8 if self.int8 is None else self.int8,
+                data=str(detection.DATASET_YAML))
+            self.startup['model_load'] = time.perf_counter() - started
+            self.startup['warm_up'] = detection.warm_up(self.model)
+        if self.camera is None:
+            step = time.perf_counter()
+            ring = detection.FrameRing(detection.FRAME_POOL_SLOTS) if detection.FRAME_POOL_SLOTS else None
+            self.camera = detection.open_camera(ring=ring)
+            if self.camera is None:
+                raise RuntimeError("Could not open camera")
+            self.startup['camera'] = time.perf_counter() - step
+        if self.servos is None and detection.GPIO_AVAILABLE:
+            step = time.perf_counter()
+            self.servos = detection.init_servos()
+            self.startup['servos'] = time.perf_counter() - step
+        self.startup['total'] = time.perf_counter() - started
+        return self
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, **settings):
+        with self._lock:
+            self._update(settings)
+            if not self.running:
+                self._start_run()
+        return self.status()
+
+    def stop(self):
+        with self._lock:
+            self._stop_run()
+        return self.status()
+
+    def reconfigure(self, **settings):
+        """Apply new settings; a running detection restarts with them (the model stays loaded)"""
+        with self._lock:
+            changed = self._update(settings)
+            if changed and self.running:
+                self._stop_run()
+                self._start_run()
+        return self.status()
+
+    def status(self):
+        return {"running": self.running, "runs": self.runs, "settings": self.settings,
+                "servos": self.servos is not None, "startup": self.startup,
+                "error": None if self.error is None else str(self.error)}
+
+    def close(self):
+        self.stop()
+        if self.servos is not None:
+            self.servos.close()
+            self.servos = None
+        if self.camera is not None:
+            self.camera.release()
+            self.camera = None
+
+    def _update(self, settings):
+        unknown = set(settings) - set(RUN_SETTINGS)
+        if unknown:
+            raise ValueError(f"Unknown settings: {', '.join(sorted(unknown))}")
+        batch_size = settings.get('batch_size', self.settings['batch_size'])
+        backend = self.loaded_backend
+        if batch_size > 1 and backend is not None and backend not in self.detection.DYNAMIC_BACKENDS:
+            raise ValueError(f"{backend} takes one frame per call; batching needs "
+                             f"{', '.join(sorted(self.detection.DYNAMIC_BACKENDS))}")
+        changed = {k: v for k, v in settings.items() if self.settings[k] != v}
+        self.settings.update(changed)
+        return changed
+
+    def _start_run(self):
+        self._stop_event = threading.Event()
+        self.error = None
+        self.runs += 1
+        self._thread = threading.Thread(target=self._run, args=(dict(self.settings), self._stop_event),
+                                        name="detector-run", daemon=True)
+        self._thread.start()
+
+    def _stop_run(self):
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, settings, stop_event):
+        try:
+            self.detection.run_detection(model=self.model, camera=self.camera, servos=self.servos,
+                                         backend=self.loaded_backend, stop_event=stop_event,
+                                         metrics=self.metrics, **settings)
+        except Exception as e:
+            self.error = e
+            print(f"❌ Detection run failed: {e}")
+
+
+class _ControlHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                reply = self.server.dispatch(request)
+            except Exception as e:
+                reply = {"ok": False, "error": str(e)}
+            self.wfile.write((json.dumps(reply) + "\n").encode('utf-8'))
+            if reply.get("shutdown"):
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+
+
+class ControlServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """JSON-lines control socket in front of a DetectorService"""
+
+    daemon_threads = True
+
+    def __init__(self, service, path=CONTROL_SOCKET_PATH):
+        if os.path.exists(path):
+            os.unlink(path)  # Left over from a previous run
+        super().__init__(path, _ControlHandler)
+        self.service = service
+        self.path = path
+
+    def dispatch(self, request):
+        command = request.get("command")
+        settings = request.get("settings") or {}
+        if command == "start":
+            status = self.service.start(**settings)
+        elif command == "stop":
+            status = self.service.stop()
+        elif command == "set":
+            status = self.service.reconfigure(**settings)
+        elif command == "status":
+            status = self.service.status()
+        elif command == "shutdown":
+            self.service.stop()
+            return {"ok": True, "shutdown": True}
+        else:
+            raise ValueError(f"Unknown command {command!r}")
+        return {"ok": True, **status}
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+def send_command(command, settings=None, path=CONTROL_SOCKET_PATH, timeout=30.0):
+    """Send one command to a running daemon and return its reply"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        sock.sendall((json.dumps({"command": command, "settings": settings or {}}) + "\n").encode())
+        with sock.makefile('r', encoding='utf-8') as reply:
+            return json.loads(reply.readline())
+
+
+def serve(args):
+    service = DetectorService(backend=args.backend, int8=args.int8 or None)
+    print("Preparing detector (model, camera, servos)...")
+    service.prepare()
+    print(f"✓ Ready in {service.startup['total']:.1f}s: "
+          + ", ".join(f"{k} {v:.2f}s" for k, v in service.startup.items() if k != 'total'))
+    metrics_server = service.metrics.serve()
+    server = ControlServer(service, args.socket)
+    print(f"✓ Listening on {args.socket}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⚠️ Stopped by user")
+    finally:
+        server.server_close()
+        service.close()
+        if metrics_server is not None:
+            metrics_server.shutdown()
+            metrics_server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Persistent waste detector")
+    parser.add_argument('--socket', default=CONTROL_SOCKET_PATH)
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve_parser = commands.add_parser('serve', help="Run the daemon")
+    serve_parser.add_argument('--backend', default=None, help="Inference runtime (default: auto)")
+    serve_parser.add_argument('--int8', action='store_true')
+    for name in ('start', 'set'):
+        sub = commands.add_parser(name, help=f"{name.capitalize()} detection")
+        sub.add_argument('--headless', action=argparse.BooleanOptionalAction, default=None)
+        sub.add_argument('--servo', dest='enable_servo', action=argparse.BooleanOptionalAction,
+                         default=None)
+        sub.add_argument('--pipelined', action=argparse.BooleanOptionalAction, default=None)
+        sub.add_argument('--conf', dest='conf_threshold', type=float, default=None)
+        sub.add_argument('--batch', dest='batch_size', type=int, default=None)
+    for name in ('stop', 'status', 'shutdown'):
+        commands.add_parser(name)
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        serve(args)
+        return
+    settings = {key: getattr(args, key) for key in RUN_SETTINGS
+                if getattr(args, key, None) is not None}
+    try:
+        reply = send_command(args.command, settings, args.socket)
+    except (FileNotFoundError, ConnectionRefusedError):
+        raise SystemExit(f"No detector daemon on {args.socket} (start one with: "
+                         f"python detector_daemon.py serve)")
+    print(json.dumps(reply, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""Sort events from the detector to the app server over a Unix datagram socket
+
+The detector and the server are separate programs. EventPublisher sends each
+event as one JSON datagram with a non-blocking sendto(): when the server is
+not running or its receive queue is full the event is counted as dropped, so
+the detection loop never waits on the server. EventBridgeServer receives the
+datagrams on the server's event loop and hands them to a callback, typically
+BroadcastHub.publish. Datagrams keep message boundaries and ordering on a
+local socket, so there is no framing or reconnect logic on either side.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from collections import deque
+
+from sorting_engine import CLASSIFYING, GATE2_OPEN
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET_PATH = "/tmp/trashbin-events.sock"
+# SO_RCVBUF for the server socket. On Linux a Unix datagram socket also queues
+# at most net.unix.max_dgram_qlen datagrams (often 10) whatever the buffer size,
+# so a busy server loop only absorbs that many events before sends are dropped.
+RECEIVE_BUFFER = 256 * 1024
+
+
+class EventPublisher:
+    """Detector side: fire-and-forget JSON datagrams, safe to call from any thread"""
+
+    def __init__(self, path=DEFAULT_SOCKET_PATH):
+        self.path = str(path)
+        self.sent = 0
+        self.dropped = 0  # Server not listening or not keeping up
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+
+    def publish(self, event):
+        """Send event (a JSON-serializable dict); returns False if it was dropped"""
+        data = json.dumps(event, separators=(',', ':')).encode('utf-8')
+        try:
+            self.sock.sendto(data, self.path)
+        except (BlockingIOError, FileNotFoundError, ConnectionRefusedError):
+            self.dropped += 1
+            return False
+        except OSError as e:
+            self.dropped += 1
+            logger.debug(f"Event to {self.path} dropped: {e}")
+            return False
+        self.sent += 1
+        return True
+
+    def close(self):
+        self.sock.close()
+
+
+class SortEventReporter:
+    """Publishes one "sort" event per item the SortingEngine sorts
+
+    Register with attach(engine) and call observe(confidences) with each
+    frame's detection confidences; the event carries the highest confidence
+    seen while the item was being classified.
+    """
+
+    def __init__(self, publisher, bin_id=None, clock=time.time):
+        self.publisher = publisher
+        self.bin_id = bin_id
+        self.clock = clock
+        self.engine = None
+        self.confidence = 0.0
+        self.classify_started = None
+
+    def attach(self, engine):
+        self.engine = engine
+        engine.transition_listeners.append(self.on_transition)
+        return self
+
+    def observe(self, confidences):
+        if self.classify_started is not None and len(confidences):
+            self.confidence = max(self.confidence, float(max(confidences)))
+
+    def on_transition(self, old_state, new_state, now):
+        if new_state == CLASSIFYING:
+            self.classify_started = now
+            self.confidence = 0.0
+        elif old_state == CLASSIFYING and new_state == GATE2_OPEN:
+            self.publisher.publish({
+                "type": "sort",
+                "bin_id": self.bin_id,
+                "waste_type": self.engine.detected_waste_type,
+                "confidence": round(self.confidence, 3),
+                "timestamp": self.clock(),
+                "classify_seconds": round(now - self.classify_started, 3),
+                "items_sorted": self.engine.items_sorted,
+            })
+            self.classify_started = None
+
+
+class Throughput:
+    """Items per minute over a sliding window"""
+
+    def __init__(self, window=60.0, clock=time.time):
+        self.window = window
+        self.clock = clock
+        self.times = deque()
+        self.total = 0
+
+    def add(self, t=None):
+        self.times.append(self.clock() if t is None else t)
+        self.total += 1
+
+    def per_minute(self):
+        cutoff = self.clock() - self.window
+        while self.times and self.times[0] < cutoff:
+            self.times.popleft()
+        return len(self.times) * 60.0 / self.window
+
+
+class _BridgeProtocol(asyncio.DatagramProtocol):
+    def __init__(self, bridge):
+        self.bridge = bridge
+
+    def datagram_received(self, data, addr):
+        self.bridge._received(data)
+
+    def error_received(self, exc):
+        logger.warning(f"Event bridge socket error: {exc}")
+
+
+class EventBridgeServer:
+    """Server side: receives events on the running loop and calls on_event(event)"""
+
+    def __init__(self, on_event, path=DEFAULT_SOCKET_PATH):
+        self.on_event = on_event
+        self.path = str(path)
+        self.received = 0
+        self.invalid = 0
+        self.transport = None
+
+    async def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # Left over from a previous run
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER)
+        sock.bind(self.path)
+        sock.setblocking(False)
+        loop = asyncio.get_running_loop()
+        self.transport, _ = await loop.create_datagram_endpoint(
+            lambda: _BridgeProtocol(self), sock=sock)
+        return self
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    def _received(self, data):
+        try:
+            event = json.loads(data)
+        except ValueError:
+            self.invalid += 1
+            return
+        if not isinstance(event, dict):
+            self.invalid += 1
+            return
+        self.received += 1
+        try:
+            self.on_event(event)
+        except Exception:
+            logger.exception(f"Event handler failed for {event!r}")
@@ -0,0 +1,197 @@
+"""SQLite expense store for the app server
+
+Replaces the single expenses.json document: every add, edit or delete is one
+row written in its own transaction, and range and aggregate queries run in
+SQL on indexed columns. The database runs in WAL mode, so readers never block
+the writer and a crash mid-write leaves the previous state intact.
+
+Fields the app sends beyond the indexed columns are kept in the record's JSON
+and returned unchanged.
+"""
+import datetime
+import json
+import logging
+import sqlite3
+import threading
+import uuid
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ('id', 'amount', 'category', 'date', 'bin_id', 'description')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS expenses (
+    id TEXT PRIMARY KEY,
+    amount REAL NOT NULL DEFAULT 0,
+    category TEXT NOT NULL DEFAULT 'other',
+    date TEXT NOT NULL,
+    bin_id TEXT,
+    description TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_expenses_date ON expenses(date);
+-- amount makes per-category totals an index-only scan
+CREATE INDEX IF NOT EXISTS idx_expenses_category_date ON expenses(category, date, amount);
+CREATE INDEX IF NOT EXISTS idx_expenses_bin_date ON expenses(bin_id, date);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+INSERT_SQL = ("INSERT OR REPLACE INTO expenses (id, amount, category, date, bin_id, "
+              "description, data) VALUES (?, ?, ?, ?, ?, ?, ?)")
+
+
+def normalize_date(value):
+    """ISO-8601 text for a date given as ISO text, epoch seconds or datetime"""
+    if value is None:
+        return datetime.datetime.now().isoformat(timespec='seconds')
+    if isinstance(value, (int, float)):
+        return datetime.datetime.fromtimestamp(value).isoformat(timespec='seconds')
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def load_json_expenses(json_path):
+    """Records from the old expenses.json (a list, or a dict holding one)"""
+    with open(json_path, encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get('expenses', list(data.values()))
+    return [record for record in data if isinstance(record, dict)]
+
+
+class ExpenseStore:
+    """Expense records in SQLite, safe to share between threads"""
+
+    def __init__(self, path="expenses.db", bin_id=None):
+        self.path = Path(path)
+        self.bin_id = bin_id  # Default bin for records that don't name one
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")  # WAL keeps this crash-safe
+        self._conn.executescript(SCHEMA)
+
+    def _row(self, expense):
+        record = dict(expense)
+        record['id'] = str(record.get('id') or uuid.uuid4().hex)
+        record['amount'] = float(record.get('amount') or 0)
+        record['category'] = record.get('category') or 'other'
+        record['date'] = normalize_date(record.get('date'))
+        record.setdefault('bin_id', self.bin_id)
+        values = tuple(record.get(column) for column in COLUMNS)
+        return record, values + (json.dumps(record),)
+
+    def add(self, expense):
+        """Insert or replace one expense; returns the stored record"""
+        record, values = self._row(expense)
+        with self._lock, self._conn:
+            self._conn.execute(INSERT_SQL, values)
+        return record
+
+    def update(self, expense_id, changes):
+        """Merge changes into an expense; returns the record or None if missing"""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT data FROM expenses WHERE id = ?",
+                                     (str(expense_id),)).fetchone()
+            if row is None:
+                return None
+            record, values = self._row({**json.loads(row['data']), **changes,
+                                        'id': str(expense_id)})
+            self._conn.execute(
+                "UPDATE expenses SET amount = ?, category = ?, date = ?, bin_id = ?, "
+                "description = ?, data = ? WHERE id = ?", values[1:] + (values[0],))
+        return record
+
+    def delete(self, expense_id):
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM expenses WHERE id = ?", (str(expense_id),))
+        return cursor.rowcount > 0
+
+    def get(self, expense_id):
+        row = self._fetchone("SELECT data FROM expenses WHERE id = ?", (str(expense_id),))
+        return json.loads(row['data']) if row else None
+
+    def query(self, start=None, end=None, category=None, bin_id=None, limit=None, offset=0):
+        """Expenses with start <= date < end, newest first"""
+        where, params = self._filters(start, end, category, bin_id)
+        sql = f"SELECT data FROM expenses{where} ORDER BY date DESC"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [int(limit), int(offset)]
+        return [json.loads(row['data']) for row in self._fetchall(sql, params)]
+
+    def summary(self, start=None, end=None, category=None, bin_id=None):
+        where, params = self._filters(start, end, category, bin_id)
+        row = self._fetchone("SELECT COUNT(*) AS count, COALESCE(SUM(amount), 0) AS total, "
+                             "MIN(amount) AS min, MAX(amount) AS max, AVG(amount) AS average "
+                             f"FROM expenses{where}", params)
+        return dict(row)
+
+    def totals_by_category(self, start=None, end=None, bin_id=None):
+        where, params = self._filters(start, end, None, bin_id)
+        rows = self._fetchall("SELECT category, SUM(amount) AS total, COUNT(*) AS count "
+                              f"FROM expenses{where} GROUP BY category ORDER BY total DESC",
+                              params)
+        return {row['category']: {"total": row['total'], "count": row['count']} for row in rows}
+
+    def totals_by_day(self, start=None, end=None, category=None, bin_id=None):
+        where, params = self._filters(start, end, category, bin_id)
+        rows = self._fetchall("SELECT substr(date, 1, 10) AS day, SUM(amount) AS total, "
+                              f"COUNT(*) AS count FROM expenses{where} "
+                              "GROUP BY day ORDER BY day", params)
+        return [dict(row) for row in rows]
+
+    def migrate_json(self, json_path):
+        """Import the old expenses.json once; returns the number of records imported
+
+        The import runs in one transaction and is recorded in the database, and
+        the JSON file is renamed to *.migrated so it is never read again.
+        """
+        json_path = Path(json_path)
+        if not json_path.exists():
+            return 0
+        if self._fetchone("SELECT value FROM meta WHERE key = 'migrated_json'", ()):
+            return 0
+
+        rows = [self._row(record)[1] for record in load_json_expenses(json_path)]
+        with self._lock, self._conn:
+            self._conn.executemany(INSERT_SQL, rows)
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) "
+                               "VALUES ('migrated_json', ?)", (str(json_path),))
+        json_path.rename(json_path.with_name(json_path.name + '.migrated'))
+        logger.info(f"✓ Migrated {len(rows)} expenses from {json_path} to {self.path}")
+        return len(rows)
+
+    def count(self):
+        return self._fetchone("SELECT COUNT(*) AS n FROM expenses", ())['n']
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _filters(self, start, end, category, bin_id):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("date >= ?")
+            params.append(normalize_date(start))
+        if end is not None:
+            clauses.append("date < ?")
+            params.append(normalize_date(end))
+        if category is not None:
+            clauses.append("category = ?")
+            params.append(category)
+        if bin_id is not None:
+            clauses.append("bin_id = ?")
+            params.append(bin_id)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def _fetchone(self, sql, params):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def _fetchall(self, sql, params):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
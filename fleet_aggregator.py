@@ -0,0 +1,201 @@
+"""Fleet view over many bin servers
+
+FleetAggregator keeps one persistent WebSocket per bin, reconnecting with
+exponential backoff and jitter, and republishes every bin's messages through a
+BroadcastHub keyed by bin, so a fleet client that falls behind only gets the
+latest status of each bin. Bins are added by hand or found over zeroconf with
+FleetDiscovery.
+"""
+import asyncio
+import json
+import logging
+import random
+import time
+
+import websockets
+
+from broadcast_hub import BroadcastHub
+
+try:
+    from zeroconf import ServiceStateChange
+    from zeroconf.asyncio import AsyncServiceBrowser, AsyncServiceInfo, AsyncZeroconf
+    ZEROCONF_AVAILABLE = True
+except ImportError:
+    ZEROCONF_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SERVICE_TYPE = "_trashbin._tcp.local."
+CLIENT_QUEUE_SIZE = 1024  # Per fleet client; keyed per bin, so one slot per bin is enough
+
+
+class BinState:
+    def __init__(self, bin_id, url):
+        self.bin_id = bin_id
+        self.url = url
+        self.connected = False
+        self.latest = {}  # message type -> last message from the bin
+        self.last_seen = None
+        self.connects = 0
+        self.messages = 0
+        self.task = None
+
+    def view(self):
+        return {"bin_id": self.bin_id, "url": self.url, "connected": self.connected,
+                "last_seen": self.last_seen, "status": self.latest.get("status")}
+
+
+class FleetAggregator:
+    """Persistent connections to every bin and the merged fleet view"""
+
+    def __init__(self, hub=None, alert_high=80, backoff_base=1.0, backoff_max=60.0,
+                 summary_interval=2.0):
+        self.hub = hub or BroadcastHub(CLIENT_QUEUE_SIZE)
+        self.alert_high = alert_high
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.summary_interval = summary_interval
+        self.bins = {}  # bin_id -> BinState
+        self._summary_task = None
+
+    def add_bin(self, bin_id, url):
+        state = self.bins.get(bin_id)
+        if state is not None:
+            if state.url == url:
+                return state
+            self.remove_bin(bin_id)  # Bin moved: reconnect to the new address
+        state = self.bins[bin_id] = BinState(bin_id, url)
+        state.task = asyncio.create_task(self._follow(state))
+        if self._summary_task is None:
+            self._summary_task = asyncio.create_task(self._publish_summaries())
+        return state
+
+    def remove_bin(self, bin_id):
+        state = self.bins.pop(bin_id, None)
+        if state is not None:
+            state.task.cancel()
+            self.hub.publish({"type": "bin_removed", "bin_id": bin_id}, key=f"bin:{bin_id}")
+
+    async def close(self):
+        tasks = [state.task for state in self.bins.values()]
+        if self._summary_task is not None:
+            tasks.append(self._summary_task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.bins.clear()
+        self._summary_task = None
+
+    def summary(self):
+        statuses = [s.latest.get("status") or {} for s in self.bins.values()]
+        return {"type": "fleet", "timestamp": time.time(), "bins": len(self.bins),
+                "connected": sum(1 for s in self.bins.values() if s.connected),
+                "above_alert_high": sum(1 for status in statuses
+                                        if (status.get("fill_percentage") or 0)
+                                        >= self.alert_high)}
+
+    def fleet_view(self):
+        return {**self.summary(), "type": "fleet_view",
+                "bin_states": [state.view() for state in self.bins.values()]}
+
+    async def serve(self, websocket):
+        """Connection handler for fleet clients: full view first, then updates"""
+        self.hub.register(websocket)
+        self.hub.send(websocket, self.fleet_view())
+        try:
+            await websocket.wait_closed()
+        finally:
+            self.hub.unregister(websocket)
+
+    async def _follow(self, state):
+        attempt = 0
+        while True:
+            try:
+                async with websockets.connect(state.url, open_timeout=10) as ws:
+                    attempt = 0
+                    state.connected = True
+                    state.connects += 1
+                    logger.info(f"✓ Connected to bin {state.bin_id} at {state.url}")
+                    async for raw in ws:
+                        self._on_message(state, raw)
+            except asyncio.CancelledError:
+                raise
+            except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as e:
+                if state.connected or attempt == 0:
+                    logger.warning(f"Bin {state.bin_id} unreachable: {e}")
+            finally:
+                was_connected, state.connected = state.connected, False
+                if was_connected and self.bins.get(state.bin_id) is state:
+                    self.hub.publish({"type": "bin_status", "bin_id": state.bin_id,
+                                      "connected": False}, key=f"bin:{state.bin_id}")
+            delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+            attempt += 1
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+    def _on_message(self, state, raw):
+        try:
+            message = json.loads(raw)
+        except (TypeError, ValueError):
+            return
+        if not isinstance(message, dict):
+            return
+        state.latest[message.get("type", "status")] = message
+        state.last_seen = time.time()
+        state.messages += 1
+        self.hub.publish({"type": "bin_status", "bin_id": state.bin_id, "connected": True,
+                          "message": message}, key=f"bin:{state.bin_id}")
+
+    async def _publish_summaries(self):
+        last = None
+        while True:
+            await asyncio.sleep(self.summary_interval)
+            summary = self.summary()
+            counts = (summary["bins"], summary["connected"], summary["above_alert_high"])
+            if counts != last:
+                self.hub.publish(summary, key="fleet")
+                last = counts
+
+
+class FleetDiscovery:
+    """Adds and removes bins on a FleetAggregator as they appear on zeroconf"""
+
+    def __init__(self, aggregator, service_type=SERVICE_TYPE):
+        if not ZEROCONF_AVAILABLE:
+            raise RuntimeError("zeroconf is not installed (pip install zeroconf)")
+        self.aggregator = aggregator
+        self.service_type = service_type
+        self.names = {}  # service name -> bin_id
+        self.aiozc = None
+        self.browser = None
+
+    async def start(self):
+        self.aiozc = AsyncZeroconf()
+        self.browser = AsyncServiceBrowser(self.aiozc.zeroconf, [self.service_type],
+                                           handlers=[self._on_change])
+
+    async def close(self):
+        if self.browser is not None:
+            await self.browser.async_cancel()
+        if self.aiozc is not None:
+            await self.aiozc.async_close()
+
+    def _on_change(self, zeroconf, service_type, name, state_change):
+        if state_change is ServiceStateChange.Removed:
+            bin_id = self.names.pop(name, None)
+            if bin_id is not None:
+                logger.info(f"Bin {bin_id} left the network")
+                self.aggregator.remove_bin(bin_id)
+        else:
+            asyncio.ensure_future(self._resolve(service_type, name))
+
+    async def _resolve(self, service_type, name):
+        info = AsyncServiceInfo(service_type, name)
+        if not await info.async_request(self.aiozc.zeroconf, 3000):
+            return
+        addresses = info.parsed_addresses()
+        if not addresses:
+            return
+        properties = {k.decode(): (v or b'').decode() for k, v in info.properties.items()}
+        bin_id = properties.get('bin_id') or name
+        self.names[name] = bin_id
+        self.aggregator.add_bin(bin_id, f"ws://{addresses[0]}:{info.port}")
@@ -0,0 +1,189 @@
+"""Reusable frame buffers and allocation reporting for the capture path
+
+FrameRing lends out preallocated frame arrays. acquire() returns a buffer
+held once by the caller; anything that keeps the frame past its own call
+(the renderer, the JPEG writer, an inference batch, the display) retain()s
+it and release()s it when done, and the buffer goes back on the free list
+only when the last hold is released. So a frame still queued somewhere is
+never overwritten underneath it. If every buffer is held a new one is added,
+up to max_slots, and past that a throwaway array is returned rather than
+blocking capture.
+
+The module-level retain() and release() take any frame and do nothing for
+arrays that didn't come from a ring (replayed images, overflow arrays,
+crops), so consumers don't need to know where a frame came from.
+
+AllocationMonitor reports per-frame allocation peaks (tracemalloc) and
+garbage collector activity, to check allocator and GC churn on the Pi.
+"""
+import gc
+import logging
+import resource
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+_lenders = {}  # id(buffer) -> FrameRing it belongs to, for retain()/release()
+
+
+def retain(frame):
+    """Take another hold on a ring frame; returns frame. No-op for other arrays"""
+    ring = _lenders.get(id(frame))
+    if ring is not None:
+        ring.retain(frame)
+    return frame
+
+
+def release(frame):
+    """Drop one hold on a ring frame. No-op for other arrays and None"""
+    ring = _lenders.get(id(frame))
+    if ring is not None:
+        ring.release(frame)
+
+
+class FrameRing:
+    """Pool of same-shaped frame arrays, reused once every hold is released"""
+
+    def __init__(self, max_slots=16):
+        self.max_slots = max_slots
+        self.shape = None
+        self.dtype = None
+        self.allocated = 0  # Buffers added to the ring
+        self.reused = 0
+        self.overflow = 0  # Frames that got a throwaway array because every slot was busy
+        self._lock = threading.Lock()
+        self._buffers = {}  # id -> buffer of the current shape
+        self._holds = {}  # id -> outstanding holds
+        self._free = deque()  # Buffers nobody holds, least recently released first
+
+    def acquire(self, shape, dtype='uint8'):
+        """A buffer of shape/dtype held once by the caller; contents are stale"""
+        shape, dtype = tuple(shape), np.dtype(dtype)
+        with self._lock:
+            if shape != self.shape or dtype != self.dtype:
+                # Resolution changed: buffers still held are simply dropped when released
+                for key in self._buffers:
+                    _lenders.pop(key, None)
+                self._buffers.clear()
+                self._holds.clear()
+                self._free.clear()
+                self.shape, self.dtype = shape, dtype
+
+            if self._free:
+                buffer = self._free.popleft()
+                self.reused += 1
+            elif len(self._buffers) < self.max_slots:
+                buffer = np.empty(shape, dtype)
+                self._buffers[id(buffer)] = buffer
+                _lenders[id(buffer)] = self
+                self.allocated += 1
+            else:
+                self.overflow += 1
+                return np.empty(shape, dtype)
+            self._holds[id(buffer)] = 1
+            return buffer
+
+    def retain(self, frame):
+        with self._lock:
+            if self._holds.get(id(frame), 0) <= 0:
+                raise ValueError("Frame retained after its last hold was released")
+            self._holds[id(frame)] += 1
+
+    def release(self, frame):
+        with self._lock:
+            holds = self._holds.get(id(frame))
+            if holds is None:
+                return  # From before a resolution change
+            if holds <= 0:
+                raise ValueError("Frame released more often than it was held")
+            self._holds[id(frame)] = holds - 1
+            if holds == 1:
+                self._free.append(self._buffers[id(frame)])
+
+    def in_use(self):
+        with self._lock:
+            return sum(1 for holds in self._holds.values() if holds > 0)
+
+    def stats(self):
+        return {"slots": len(self._buffers), "in_use": self.in_use(),
+                "allocated": self.allocated, "reused": self.reused,
+                "overflow": self.overflow}
+
+
+class AllocationMonitor:
+    """Per-frame allocation peak, GC collections and RSS, summarized every N frames
+
+    tracemalloc slows down Python-level allocations noticeably, so this is
+    meant for checking a build, not for leaving on.
+    """
+
+    def __init__(self, every=300, report=print):
+        self.every = every
+        self.report = report
+        self.frames = 0
+        self.collections = [0, 0, 0]
+        self.collected = 0
+        self.gc_seconds = 0.0
+        self._peaks = []
+        self._gc_start = None
+        self._started_tracing = False
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        gc.callbacks.append(self._on_gc)
+        tracemalloc.reset_peak()
+        return self
+
+    def stop(self):
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def frame_done(self):
+        """Call once per frame; returns the summary dict every `every` frames"""
+        current, peak = tracemalloc.get_traced_memory()
+        self._peaks.append(peak - current)
+        tracemalloc.reset_peak()
+        self.frames += 1
+        if self.frames % self.every:
+            return None
+        summary = self.summary(current)
+        self._peaks.clear()
+        if self.report is not None:
+            self.report(f"🧮 Allocations: peak {summary['peak_kb_per_frame']:.0f} KB/frame above "
+                        f"live, traced {summary['traced_mb']:.1f} MB, GC gen0/1/2 "
+                        f"{summary['gc_collections']}, {summary['gc_ms']:.1f} ms in GC, "
+                        f"max RSS {summary['max_rss_mb']:.0f} MB")
+        return summary
+
+    def summary(self, current=None):
+        if current is None:
+            current = tracemalloc.get_traced_memory()[0]
+        peaks = self._peaks or [0]
+        return {"frames": self.frames,
+                "peak_kb_per_frame": sum(peaks) / len(peaks) / 1024,
+                "traced_mb": current / 2**20,
+                "gc_collections": list(self.collections),
+                "gc_collected": self.collected,
+                "gc_ms": self.gc_seconds * 1000,
+                "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+    def _on_gc(self, phase, info):
+        if phase == "start":
+            self._gc_start = time.perf_counter()
+        else:
+            self.collections[info["generation"]] += 1
+            self.collected += info.get("collected", 0)
+            if self._gc_start is not None:
+                self.gc_seconds += time.perf_counter() - self._gc_start
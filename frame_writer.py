@@ -0,0 +1,100 @@
+"""Background JPEG writer with back-pressure and a disk-usage cap"""
+import os
+import queue
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from frame_buffers import release, retain
+from lazy_imports import lazy_import
+
+cv2 = lazy_import('cv2')
+
+
+class AsyncFrameWriter(threading.Thread):
+    """Encodes and writes frames off the detection thread
+
+    The queue is bounded: when the SD card can't keep up, new frames are
+    dropped instead of stalling the caller. Files in the directory form a
+    ring buffer; once their total size exceeds max_disk_mb the oldest are
+    deleted.
+    """
+
+    def __init__(self, directory='detections', max_pending=8, jpeg_quality=80,
+                 scale=1.0, max_disk_mb=500):
+        super().__init__(name="frame-writer", daemon=True)
+        self.directory = Path(directory)
+        self.jpeg_quality = int(jpeg_quality)
+        self.scale = scale
+        self.max_disk_bytes = int(max_disk_mb * 1024 * 1024)
+        self.written = 0
+        self.dropped = 0
+        self.evicted = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._files = OrderedDict()  # path -> size, oldest first
+        self._disk_bytes = 0
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        existing = sorted(self.directory.glob('*.jpg'), key=lambda p: p.stat().st_mtime)
+        for path in existing:
+            self._track(path, path.stat().st_size)
+        self._evict()
+
+    def write(self, frame, filename):
+        """Queue frame to be saved as directory/filename; False if it was dropped"""
+        retain(frame)  # Until it is encoded
+        try:
+            self._queue.put_nowait((frame, filename))
+            return True
+        except queue.Full:
+            release(frame)
+            self.dropped += 1
+            return False
+
+    def run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            frame, filename = item
+            try:
+                self._save(frame, self.directory / filename)
+            except Exception as e:
+                print(f"❌ Failed to save {filename}: {e}")
+            finally:
+                release(frame)
+
+    def stop(self):
+        """Write everything already queued, then exit"""
+        self._queue.put(None)
+        self.join()
+
+    def _save(self, frame, path):
+        if self.scale != 1.0:
+            frame = cv2.resize(frame, None, fx=self.scale, fy=self.scale,
+                               interpolation=cv2.INTER_AREA)
+        ok, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            raise RuntimeError("JPEG encoding failed")
+        data = encoded.tobytes()
+        with open(path, 'wb') as f:
+            f.write(data)
+        self.written += 1
+        self._track(path, len(data))
+        self._evict()
+
+    def _track(self, path, size):
+        # An overwritten file (e.g. frame numbers restarting) replaces its old entry
+        self._disk_bytes -= self._files.pop(path, 0)
+        self._files[path] = size
+        self._disk_bytes += size
+
+    def _evict(self):
+        while self._disk_bytes > self.max_disk_bytes and self._files:
+            path, size = self._files.popitem(last=False)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._disk_bytes -= size
+            self.evicted += 1
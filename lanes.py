@@ -0,0 +1,463 @@
+"""Multi-lane sorting: several chutes on one board sharing an inference process pool
+
+Each Lane has its own camera, servo pin map, tracker and SortingEngine and
+runs on its own thread. The model runs in an InferencePool of worker
+processes that load it once each. Frames reach the workers through per-lane
+shared memory slots (multiprocessing.shared_memory), so only a small task
+tuple goes out and the detection arrays come back pickled.
+
+A lane captures its next frame while the current one is being inferred and
+never has more than one frame in the pool. Free workers are handed to the
+waiting lanes round-robin, so a lane with a faster camera can't starve the
+others. A worker process that dies fails the frame it was working on, so
+its lane stops with an error instead of waiting forever.
+
+    python lanes.py                            # LANES from object_detection.py
+    python lanes.py --replay a.mp4 b.mp4       # one lane per video, servos mocked
+"""
+import argparse
+import functools
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as ResultTimeout
+from multiprocessing import shared_memory
+
+from camera import ReplaySource, open_camera
+from frame_buffers import release
+from lazy_imports import lazy_import
+from model_backends import load_model
+from object_detection import (CLOSED_ANGLES, DATASET_YAML, LANE_FRAME_SLOTS, LANE_WORKERS,
+                              LANES, MODEL_BACKEND, MODEL_IMGSZ, MODEL_INT8, MODEL_PATH,
+                              PERSISTENT_INPUT, TRACK_IOU_THRESHOLD, TRACK_MAX_MISSED,
+                              TRACK_MIN_VOTES, TRACK_WINDOW, TRACKING, ServoActuator,
+                              build_category_lookup, create_servo_controller, sort_timings,
+                              summarize_detections, warm_up)
+from preprocessing import Letterbox
+from servo_controller import GPIO_AVAILABLE, MockBackend
+from sorting_engine import SortingEngine
+from tracking import ItemTracker, stable_counts
+
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 0.5  # Seconds between stop / dead-worker checks while blocked
+
+
+class SharedFrames:
+    """Frame slots in one shared memory block; workers attach to it by name"""
+
+    def __init__(self, shape, slots=LANE_FRAME_SLOTS, dtype='uint8'):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.slots = slots
+        size = int(np.prod(self.shape)) * self.dtype.itemsize * slots
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.frames = np.ndarray((slots, *self.shape), self.dtype, buffer=self.shm.buf)
+
+    @property
+    def spec(self):
+        """What a worker needs to map the block: (name, slots, shape, dtype)"""
+        return self.shm.name, self.slots, self.shape, self.dtype.str
+
+    def close(self):
+        self.frames = None  # The view must go before the mapping can close
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _attach(spec):
+    """Map a SharedFrames block created by another process"""
+    name, slots, shape, dtype = spec
+    # Spawned workers share the parent's resource tracker, which already knows
+    # the block and forgets it when the lane unlinks it
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray((slots, *shape), np.dtype(dtype), buffer=shm.buf)
+
+
+def _worker_main(worker_id, model_loader, persistent_input, threads, tasks, results):
+    """Inference worker process: load the model, then serve tasks until None"""
+    os.environ.setdefault('OMP_NUM_THREADS', str(threads))  # Before torch is imported
+    try:
+        model = model_loader()
+        lookup = build_category_lookup(model.names)
+        letterbox = Letterbox(MODEL_IMGSZ) if persistent_input else None
+    except Exception as e:
+        results.put(("ready", worker_id, repr(e)))
+        return
+    results.put(("ready", worker_id, None))
+
+    attached = {}  # shared memory name -> (SharedMemory, frames array)
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            task_id, spec, slot, roi, conf = task
+            try:
+                if spec[0] not in attached:
+                    attached[spec[0]] = _attach(spec)
+                frame = attached[spec[0]][1][slot]
+                offset = (0, 0)
+                if roi is not None:
+                    x1, y1, x2, y2 = roi
+                    frame, offset = frame[y1:y2, x1:x2], (x1, y1)
+                start = time.perf_counter()
+                image = letterbox.tensor(frame) if letterbox is not None else frame
+                detections = summarize_detections(model(image, conf=conf, verbose=False),
+                                                  lookup, offset, letterbox)
+                results.put((task_id, detections, time.perf_counter() - start, None))
+            except Exception as e:
+                results.put((task_id, None, 0.0, repr(e)))
+    finally:
+        for shm, _ in attached.values():
+            shm.close()
+
+
+def load_detector(backend=MODEL_BACKEND, int8=MODEL_INT8):
+    """Load and warm up MODEL_PATH; runs inside each inference worker"""
+    model, _ = load_model(MODEL_PATH, backend=backend, int8=int8, data=str(DATASET_YAML))
+    warm_up(model)
+    return model
+
+
+class InferencePool:
+    """Model worker processes shared by every lane, handed out round-robin
+
+    model_loader is called once in each worker (so it must be picklable, e.g.
+    a module-level function or functools.partial of one). Each worker has its
+    own task queue and gets a task only when it is idle; the rest wait here,
+    one per lane, so the scheduling decision stays in this process and every
+    in-flight task is known to be on a particular worker. If a worker exits,
+    its task's future fails with RuntimeError; once every worker is gone,
+    waiting and new tasks fail too.
+    """
+
+    def __init__(self, model_loader=load_detector, workers=LANE_WORKERS,
+                 persistent_input=PERSISTENT_INPUT):
+        context = multiprocessing.get_context('spawn')
+        self.workers = workers
+        self._tasks = [context.Queue() for _ in range(workers)]
+        self._results = context.Queue()
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        self._processes = [
+            context.Process(target=_worker_main, name=f"inference-{i}", daemon=True,
+                            args=(i, model_loader, persistent_input, threads,
+                                  self._tasks[i], self._results))
+            for i in range(workers)]
+        self._cond = threading.Condition()
+        self._waiting = {}  # lane -> (task, future) waiting for a free worker
+        self._order = []  # lanes in round-robin order
+        self._next = 0
+        self._idle = deque(range(workers))
+        self._dead = set()  # Workers that exited
+        self._closing = False
+        self._in_flight = {}  # task id -> (future, worker)
+        self._task_id = 0
+        self._collector = threading.Thread(target=self._collect, name="inference-results",
+                                           daemon=True)
+        self.dispatched = {}  # lane -> tasks sent to a worker
+
+    def start(self, timeout=300.0):
+        """Start the workers and wait until every one has loaded the model"""
+        for process in self._processes:
+            process.start()
+        for _ in self._processes:
+            _, worker_id, error = self._results.get(timeout=timeout)
+            if error is not None:
+                self.close()
+                raise RuntimeError(f"Inference worker {worker_id} failed to start: {error}")
+        self._collector.start()
+        return self
+
+    def submit(self, lane, frames, slot, roi=None, conf=0.25):
+        """Queue frames.frames[slot] for inference; Future of (Detections, seconds)"""
+        future = Future()
+        with self._cond:
+            if len(self._dead) == self.workers:
+                raise RuntimeError("Every inference worker has exited")
+            if lane not in self.dispatched:
+                self._order.append(lane)
+                self.dispatched[lane] = 0
+            if lane in self._waiting:
+                raise RuntimeError(f"Lane {lane} already has a frame waiting")
+            self._waiting[lane] = ((frames.spec, slot, roi, conf), future)
+            self._dispatch()
+        return future
+
+    def _dispatch(self):
+        # Called with _cond held: fill free workers, next lane in turn first
+        while self._waiting and self._idle:
+            count = len(self._order)
+            for i in range(count):
+                lane = self._order[(self._next + i) % count]
+                if lane in self._waiting:
+                    self._next = (self._next + i + 1) % count
+                    break
+            task, future = self._waiting.pop(lane)
+            worker = self._idle.popleft()
+            self._task_id += 1
+            self._in_flight[self._task_id] = (future, worker)
+            self.dispatched[lane] += 1
+            self._tasks[worker].put((self._task_id, *task))
+
+    def _collect(self):
+        while True:
+            self._check_workers()
+            try:
+                message = self._results.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            if message is None:
+                break
+            task_id, detections, seconds, error = message
+            with self._cond:
+                if task_id not in self._in_flight:
+                    continue  # Already failed by _check_workers
+                future, worker = self._in_flight.pop(task_id)
+                self._idle.append(worker)
+                self._dispatch()
+            if error is not None:
+                future.set_exception(RuntimeError(f"Inference failed: {error}"))
+            else:
+                future.set_result((detections, seconds))
+
+    def _check_workers(self):
+        """Fail the futures of workers that have exited"""
+        failed = []
+        with self._cond:
+            if self._closing:
+                return
+            for worker, process in enumerate(self._processes):
+                if worker in self._dead or process.exitcode is None:
+                    continue
+                self._dead.add(worker)
+                if worker in self._idle:
+                    self._idle.remove(worker)
+                error = RuntimeError(f"Inference worker {worker} exited with code {process.exitcode}")
+                logger.error("%s", error)
+                for task_id, (future, owner) in list(self._in_flight.items()):
+                    if owner == worker:
+                        del self._in_flight[task_id]
+                        failed.append((future, error))
+            if self._dead and len(self._dead) == self.workers:
+                error = RuntimeError("Every inference worker has exited")
+                failed.extend((future, error) for _, future in self._waiting.values())
+                self._waiting.clear()
+        for future, error in failed:
+            future.set_exception(error)
+
+    def close(self):
+        with self._cond:
+            self._closing = True
+        for tasks in self._tasks:
+            tasks.put(None)
+        for process in self._processes:
+            if process.pid is not None:
+                process.join(timeout=5.0)
+            if process.is_alive():
+                process.terminate()
+        if self._collector.is_alive():
+            self._results.put(None)
+            self._collector.join(timeout=2.0)
+        with self._cond:
+            for future, _ in self._in_flight.values():
+                future.cancel()
+            for _, future in self._waiting.values():
+                future.cancel()
+
+
+class Lane(threading.Thread):
+    """One chute: camera, actuator, tracker and FSM, inferring through the pool
+
+    The camera only needs read() (None ends the lane); the actuator is
+    whatever SortingEngine accepts, normally a ServoActuator on the lane's pins.
+    """
+
+    def __init__(self, name, camera, actuator, pool, roi=None, conf=0.25, tracking=TRACKING,
+                 clock=time.time, log=print):
+        super().__init__(name=f"lane-{name}", daemon=True)
+        self.lane = name
+        self.camera = camera
+        self.pool = pool
+        self.roi = roi
+        self.conf = conf
+        self.log = log
+        self.engine = SortingEngine(actuator, sort_timings(), clock=clock,
+                                    log=(lambda message: log(f"[{name}] {message}")) if log else None)
+        self.tracker = None
+        if tracking:
+            self.tracker = ItemTracker(TRACK_IOU_THRESHOLD, TRACK_WINDOW, TRACK_MIN_VOTES,
+                                       TRACK_MAX_MISSED)
+        self.frames = 0
+        self.infer_seconds = 0.0  # Model time in the workers
+        self.wait_seconds = 0.0  # Time this lane spent blocked on a result
+        self.started = None
+        self.stopped = None
+        self.error = None
+        self._shared = None
+        self._stop_event = threading.Event()
+
+    @property
+    def fps(self):
+        elapsed = (self.stopped or time.monotonic()) - (self.started or time.monotonic())
+        return self.frames / elapsed if elapsed > 0 else 0.0
+
+    def run(self):
+        self.started = time.monotonic()
+        try:
+            slot = 0
+            pending = self._submit(slot) if self._stage(self.camera.read(), slot) else None
+            while pending is not None and not self._stop_event.is_set():
+                # Capture into the next slot while the previous frame is inferred
+                slot = (slot + 1) % LANE_FRAME_SLOTS
+                staged = self._stage(self.camera.read(), slot)
+                waited = time.perf_counter()
+                result = self._wait(pending)
+                self.wait_seconds += time.perf_counter() - waited
+                if result is None:
+                    break
+                detections, seconds = result
+                self.infer_seconds += seconds
+                self._process(detections)
+                pending = self._submit(slot) if staged else None
+        except Exception as e:
+            self.error = e
+            logger.exception("Lane %s failed", self.lane)
+        finally:
+            self.stopped = time.monotonic()
+            if self._shared is not None:
+                self._shared.close()
+                self._shared = None
+
+    def _stage(self, frame, slot):
+        """Copy frame into a shared slot; False at the end of the camera"""
+        if frame is None:
+            return False
+        if self._shared is None:
+            self._shared = SharedFrames(frame.shape)
+        elif frame.shape != self._shared.shape:
+            raise ValueError(f"Frame size changed from {self._shared.shape} to {frame.shape}")
+        np.copyto(self._shared.frames[slot], frame)
+        release(frame)
+        return True
+
+    def _wait(self, pending):
+        """The pending (detections, seconds), or None if the lane was stopped first"""
+        while True:
+            try:
+                return pending.result(timeout=POLL_INTERVAL)
+            except ResultTimeout:
+                if self._stop_event.is_set():
+                    return None
+
+    def _submit(self, slot):
+        return self.pool.submit(self.lane, self._shared, slot, self.roi, self.conf)
+
+    def _process(self, detections):
+        self.frames += 1
+        if self.tracker is not None:
+            stable_items = self.tracker.update(detections.boxes, detections.categories,
+                                               detections.confidences)
+            recyclable, landfill, _ = stable_counts(stable_items).tolist()
+        else:
+            recyclable, landfill, _ = detections.counts.tolist()
+        self.engine.step(recyclable, landfill)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def open_lane_camera(camera):
+    """Camera of a LANES entry: /dev/video index, 'picamera2:N' or a replay path"""
+    if isinstance(camera, int) or str(camera).startswith('picamera2'):
+        return open_camera(device=camera)
+    source = ReplaySource(camera)
+    source.fps = source.native_fps  # Videos play in real time so the FSM timings hold
+    return source
+
+
+def run_lanes(lanes=None, workers=LANE_WORKERS, conf_threshold=0.25, replay=None,
+              backend=MODEL_BACKEND, int8=MODEL_INT8, model_loader=None, stop_event=None):
+    """Run every lane (LANES by default) until Ctrl+C, stop_event or all replays end
+
+    replay gives one image directory or video per lane in place of the
+    configured cameras; the servos are then mocked.
+    """
+    lanes = list(lanes or LANES)
+    if replay:
+        lanes = [{**lanes[i % len(lanes)], "name": f"lane{i + 1}", "camera": path}
+                 for i, path in enumerate(replay)]
+    mock_servos = bool(replay) or not GPIO_AVAILABLE
+    print(f"\n🛤️  MULTI-LANE DETECTION - {len(lanes)} lanes, {workers} inference workers")
+    if mock_servos:
+        print("(MOCK SERVOS)")
+    print("=" * 70)
+
+    pool = InferencePool(model_loader or functools.partial(load_detector, backend, int8), workers)
+    running, cameras, servos = [], [], []
+    try:
+        print("Starting inference workers...")
+        pool.start()
+        for config in lanes:
+            camera = open_lane_camera(config["camera"])
+            if camera is None:
+                raise RuntimeError(f"Could not open camera for {config['name']}")
+            cameras.append(camera)
+            pins = [pin for group in config["pins"].values() for pin in group]
+            controller = create_servo_controller(MockBackend(pins) if mock_servos else None,
+                                                 config["pins"])
+            servos.append(controller)
+            controller.move_all(CLOSED_ANGLES)
+            running.append(Lane(config["name"], camera, ServoActuator(controller), pool,
+                                config.get("roi"), conf_threshold))
+        for lane in running:
+            lane.start()
+        print(f"✓ {len(running)} lanes running. Press Ctrl+C to stop.\n")
+        while any(lane.is_alive() for lane in running):
+            if stop_event is not None and stop_event.is_set():
+                break
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        print("\n\n⚠️ Stopped by user")
+    finally:
+        for lane in running:
+            lane.stop()
+        for lane in running:
+            lane.join(timeout=5.0)
+        pool.close()
+        for controller in servos:
+            controller.move_all(CLOSED_ANGLES)
+            controller.close()
+        for camera in cameras:
+            camera.release()
+
+        for lane in running:
+            print(f"✓ {lane.lane}: {lane.frames} frames ({lane.fps:.1f} fps), "
+                  f"{lane.engine.items_sorted} items sorted, "
+                  f"{lane.wait_seconds / max(1, lane.frames) * 1000:.0f} ms/frame waiting on inference"
+                  + (f", failed: {lane.error}" if lane.error else ""))
+        print("✓ Multi-lane detection ended")
+    return running
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-lane waste sorting")
+    parser.add_argument('--workers', type=int, default=LANE_WORKERS)
+    parser.add_argument('--conf', type=float, default=0.25)
+    parser.add_argument('--backend', default=MODEL_BACKEND)
+    parser.add_argument('--int8', action='store_true', default=MODEL_INT8)
+    parser.add_argument('--replay', nargs='+', metavar='PATH',
+                        help="One image directory or video per lane, with mocked servos")
+    args = parser.parse_args()
+    run_lanes(workers=args.workers, conf_threshold=args.conf, replay=args.replay,
+              backend=args.backend, int8=args.int8)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""Deferred imports for the heavy native modules (cv2, numpy, picamera2, RPi.GPIO)
+
+lazy_import() returns a module object whose real import runs on the first
+attribute access, so the menu, the detector daemon's control client and
+the app server start without paying for OpenCV, NumPy or libcamera until a
+code path actually uses them.
+"""
+import importlib.util
+import sys
+
+
+def module_available(name):
+    """True if name can be imported, without importing it (parent packages aside)"""
+    if name in sys.modules:
+        return True
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def lazy_import(name):
+    """Module name, loaded on first attribute access; ImportError if it isn't installed"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,303 @@
+"""Lightweight metrics with a Prometheus text endpoint
+
+Counters, gauges and fixed-bucket histograms cost one lock and a few
+arithmetic operations per update, cheap enough to leave on in the detection
+loop. The registry is rendered in the Prometheus text format only when it is
+scraped, from a small HTTP server on its own thread:
+
+    registry = Registry()
+    stages = StageTimers(registry)
+    with stages.stage('inference'):
+        ...
+    start_http_server(registry, 9101)   # curl localhost:9101/metrics
+"""
+import asyncio
+import bisect
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from sorting_engine import GATE2_OPEN
+
+logger = logging.getLogger(__name__)
+
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+DWELL_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Child metric for these label values; keep it around on hot paths"""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {values}")
+        values = tuple(str(v) for v in values)
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _default(self):
+        return self.labels()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            children = sorted(self._children.items())
+        for values, child in children:
+            lines.extend(child.samples(self.name, self.labelnames, values))
+        return lines
+
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self.function = None
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self.value += amount
+
+    def set(self, value):
+        self.value = float(value)
+
+    def set_function(self, function):
+        """Read the value from function() at scrape time instead"""
+        self.function = function
+
+    def samples(self, name, labelnames, values):
+        value = self.function() if self.function is not None else self.value
+        yield f"{name}{_format_labels(labelnames, values)} {_format_value(value)}"
+
+
+class Counter(_Metric):
+    kind = "counter"
+    _new_child = _Value
+
+    def inc(self, amount=1.0):
+        self._default().inc(amount)
+
+    def set_function(self, function):
+        self._default().set_function(function)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+    _new_child = _Value
+
+    def set(self, value):
+        self._default().set(value)
+
+    def inc(self, amount=1.0):
+        self._default().inc(amount)
+
+    def set_function(self, function):
+        self._default().set_function(function)
+
+
+class _Timer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+class _HistogramValues:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self):
+        """Context manager observing the seconds spent in the block"""
+        return _Timer(self)
+
+    def samples(self, name, labelnames, values):
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            labels = _format_labels(labelnames, values, [("le", _format_value(bound))])
+            yield f"{name}_bucket{labels} {cumulative}"
+        labels = _format_labels(labelnames, values)
+        yield f"{name}_sum{labels} {_format_value(total)}"
+        yield f"{name}_count{labels} {cumulative}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=STAGE_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValues(self.buckets)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def _add(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._add(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self._add(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=STAGE_BUCKETS):
+        return self._add(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self):
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class StageTimers:
+    """Per-stage latency histogram, e.g. capture / inference / post_process"""
+
+    def __init__(self, registry, name="trashbin_stage_seconds"):
+        self.histogram = registry.histogram(name, "Seconds spent per pipeline stage", ("stage",))
+
+    def stage(self, stage):
+        return self.histogram.labels(stage).time()
+
+    def wrap(self, stage, function):
+        """function, with every call timed as stage"""
+        values = self.histogram.labels(stage)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                values.observe(time.perf_counter() - start)
+        return timed
+
+
+class SortingMetrics:
+    """FSM dwell-time histogram and sorted-item counter from transition_listeners"""
+
+    def __init__(self, registry):
+        self.dwell = registry.histogram("trashbin_fsm_dwell_seconds",
+                                        "Seconds spent in each sorting state before leaving it",
+                                        ("state",), DWELL_BUCKETS)
+        self.items = registry.counter("trashbin_items_sorted_total",
+                                      "Items sorted", ("waste_type",))
+        self.engine = None
+        self.entered = None
+
+    def attach(self, engine):
+        self.engine = engine
+        self.entered = engine.last_state_change
+        engine.transition_listeners.append(self.on_transition)
+        return self
+
+    def on_transition(self, old_state, new_state, now):
+        self.dwell.labels(old_state).observe(now - self.entered)
+        self.entered = now
+        if new_state == GATE2_OPEN:
+            self.items.labels(self.engine.detected_waste_type).inc()
+
+
+async def monitor_loop_lag(registry, interval=0.5, on_tick=None):
+    """Record how late the event loop wakes up; on_tick() runs on every wake-up
+
+    on_tick is the place to copy loop-owned state (client counts, queue
+    depths) into gauges, since scrapes come in on another thread.
+    """
+    lag = registry.histogram("trashbin_event_loop_lag_seconds",
+                             "Extra delay of a timer on the event loop", buckets=LAG_BUCKETS)
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag.observe(max(0.0, loop.time() - start - interval))
+        if on_tick is not None:
+            try:
+                on_tick()
+            except Exception:
+                logger.exception("Metrics update failed")
+
+
+def start_http_server(registry, port, host="127.0.0.1"):
+    """Serve registry at http://host:port/metrics from a daemon thread"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/metrics', '/'):
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Scrapes every few seconds would flood the log
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
@@ -0,0 +1,98 @@
+"""Export the YOLO model to CPU runtimes and load the fastest one available"""
+import importlib.util
+import platform
+from pathlib import Path
+
+# backend name -> (ultralytics export format, runtime module)
+BACKENDS = {
+    'ncnn': ('ncnn', 'ncnn'),
+    'openvino': ('openvino', 'openvino'),
+    'onnx': ('onnx', 'onnxruntime'),
+    'pytorch': (None, 'torch'),
+}
+
+# NCNN is the quickest runtime on the Pi's ARM cores, OpenVINO on x86
+if platform.machine().lower() in ('aarch64', 'arm64', 'armv7l'):
+    BACKEND_PREFERENCE = ['ncnn', 'openvino', 'onnx', 'pytorch']
+else:
+    BACKEND_PREFERENCE = ['openvino', 'onnx', 'ncnn', 'pytorch']
+
+INT8_BACKENDS = {'openvino', 'onnx'}
+# Backends that take several frames per call; NCNN exports have a fixed batch of 1
+DYNAMIC_BACKENDS = {'openvino', 'onnx', 'pytorch'}
+
+
+def available_backends():
+    """Backends whose runtime is installed, fastest first"""
+    return [name for name in BACKEND_PREFERENCE
+            if importlib.util.find_spec(BACKENDS[name][1]) is not None]
+
+
+def resolve_backend(backend='auto'):
+    if backend == 'auto':
+        available = available_backends()
+        return available[0] if available else 'pytorch'
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}' (choose from auto, {', '.join(BACKENDS)})")
+    return backend
+
+
+def exported_path(model_path, backend, int8=False):
+    """Where Ultralytics writes the exported model for this backend"""
+    model_path = Path(model_path)
+    stem = model_path.stem
+    if backend == 'pytorch':
+        return model_path
+    if backend == 'onnx':
+        return model_path.with_name(f"{stem}_int8.onnx" if int8 else f"{stem}.onnx")
+    if backend == 'openvino':
+        return model_path.with_name(f"{stem}_int8_openvino_model" if int8 else f"{stem}_openvino_model")
+    return model_path.with_name(f"{stem}_ncnn_model")
+
+
+def export_model(model_path, backend, int8=False, data=None):
+    """Export model_path for backend, optionally INT8-quantized, and return the new path"""
+    from ultralytics import YOLO
+
+    if int8 and backend not in INT8_BACKENDS:
+        print(f"⚠ INT8 not supported for {backend}, exporting FP32")
+        int8 = False
+
+    print(f"Exporting {model_path} -> {backend}{' (INT8)' if int8 else ''}...")
+    model = YOLO(str(model_path))
+    export_format = BACKENDS[backend][0]
+    # Dynamic input shapes keep batched inference working with the exported model
+    dynamic = backend in DYNAMIC_BACKENDS
+
+    if backend == 'openvino':
+        return Path(model.export(format=export_format, int8=int8, data=data, dynamic=dynamic))
+
+    path = Path(model.export(format=export_format, dynamic=dynamic))
+    if backend == 'onnx' and int8:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        target = exported_path(model_path, backend, int8=True)
+        quantize_dynamic(str(path), str(target), weight_type=QuantType.QUInt8)
+        path = target
+    return path
+
+
+def load_model(model_path, backend='auto', int8=False, data=None):
+    """Load the model on the requested backend, exporting it first if needed
+
+    Returns (model, backend_name). Falls back to the PyTorch weights if the
+    export fails.
+    """
+    from ultralytics import YOLO
+
+    backend = resolve_backend(backend)
+    path = exported_path(model_path, backend, int8 and backend in INT8_BACKENDS)
+    if backend != 'pytorch' and not path.exists():
+        try:
+            path = export_model(model_path, backend, int8, data)
+        except Exception as e:
+            print(f"⚠ Export to {backend} failed: {e}, using PyTorch weights")
+            backend, path = 'pytorch', Path(model_path)
+
+    print(f"✓ Model backend: {backend} ({path.name})")
+    return YOLO(str(path), task='detect'), backend
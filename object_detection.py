@@ -1,23 +1,26 @@
-from ultralytics import YOLO
-import cv2
+import argparse
+import functools
+import json
+from collections import namedtuple
 from pathlib import Path
 import time
 
-# Try to import picamera2 for Raspberry Pi camera support
-try:
-    from picamera2 import Picamera2
-    PICAMERA2_AVAILABLE = True
-except ImportError:
-    PICAMERA2_AVAILABLE = False
-    print("⚠ Warning: picamera2 not available, will try standard cv2")
-
-# Try to import GPIO for servo control
-try:
-    import RPi.GPIO as GPIO
-    GPIO_AVAILABLE = True
-except ImportError:
-    GPIO_AVAILABLE = False
-    print("⚠ Warning: RPi.GPIO not available, servo control disabled")
+from camera import FRAME_SIZE, ReplaySource, open_camera
+from event_bridge import EventPublisher, SortEventReporter
+from frame_buffers import AllocationMonitor, FrameRing, release
+from frame_writer import AsyncFrameWriter
+from lazy_imports import lazy_import
+from metrics import Registry, SortingMetrics, StageTimers, start_http_server
+from model_backends import BACKENDS, DYNAMIC_BACKENDS, load_model, resolve_backend
+from pipeline import InferenceWorker, LatestFrameGrabber
+from preprocessing import GatedInference, Letterbox, MotionGate, RegionOfInterest
+from rendering import FrameRenderer, LatestFrame, draw_box, draw_stats_panel
+from servo_controller import GPIO_AVAILABLE, GPIOBackend, MockBackend, ServoController, SETTLE_TIME
+from sorting_engine import SortingEngine, SortTimings, WAITING_GATE1
+from tracking import ItemTracker, stable_counts
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
 
 # GPIO Pin Configuration
 RECYCLABLE_SERVO_PIN_1 = 17  # Recyclable bin - Servo 1
@@ -46,336 +49,527 @@ BIN_OPEN_DURATION = 2.5  # Time bin stays open
 GATE_OPEN_DURATION = 2.0  # Time gate stays open
 CLEAR_WAIT_TIME = 1.5  # Wait time after detection clears
 IDLE_SLEEP_TIME = 3.0  # Sleep when both gates open but nothing detected
+GATE1_TIMEOUT = 5.0  # Close Gate 1 again if no bottle arrives
 
 # Model path
 MODEL_PATH = Path('/home/harry/Hackathon/best.pt')
+INFERENCE_BATCH_SIZE = 4  # Frames per model call in batched mode
+
+# Inference runtime: 'auto' picks the fastest installed (ncnn/openvino/onnx/pytorch)
+MODEL_BACKEND = 'auto'
+MODEL_INT8 = False  # INT8-quantize on export (openvino/onnx only)
+DATASET_YAML = Path(__file__).with_name('data.yaml')  # INT8 calibration data
+
+# Frame buffers: capture into reused arrays and letterbox into one persistent model input
+FRAME_POOL_SLOTS = 16  # Frames alive at once (queues, batches, display); 0 = new array per frame
+PERSISTENT_INPUT = True  # Skip Ultralytics' per-call letterbox allocations
+MODEL_IMGSZ = 640  # Model input size (square, as exported)
+ALLOC_REPORT_FRAMES = 0  # Print tracemalloc/GC stats every N frames; 0 = off (slows Python code)
+
+# Headless frame saving
+SAVE_DIR = 'detections'
+SAVE_JPEG_QUALITY = 80
+SAVE_SCALE = 1.0  # e.g. 0.5 saves 640x360 frames
+SAVE_MAX_DISK_MB = 500  # Oldest saved frames are deleted beyond this
+SAVE_QUEUE_SIZE = 8  # Frames waiting to be written before new ones are dropped
+
+# Temporal smoothing: the FSM acts on tracked items instead of raw per-frame counts
+TRACKING = True
+TRACK_IOU_THRESHOLD = 0.3  # Min overlap to match a detection to an existing item
+TRACK_WINDOW = 5  # Frames of category votes kept per item (M)
+TRACK_MIN_VOTES = 3  # Votes a category needs before the item counts (N)
+TRACK_MAX_MISSED = 3  # Frames an item survives without a detection
+
+# Chute region between Gate 1 and Gate 2 as (x1, y1, x2, y2) in capture pixels.
+# Only this crop is sent to the model; None uses the full frame.
+CHUTE_ROI = None
+
+# Motion gating: skip inference while the ROI is unchanged
+MOTION_GATING = True
+MOTION_PIXEL_THRESHOLD = 25  # Per-pixel grayscale change that counts as motion
+MOTION_MIN_CHANGED = 0.01  # Fraction of ROI pixels that must change
+MOTION_REFRESH_FRAMES = 30  # Run the model at least this often regardless
+
+# Sort events for SmartTrashBinAppServer.py (Unix datagram socket); None disables
+EVENT_SOCKET_PATH = '/tmp/trashbin-events.sock'
+
+# Prometheus text metrics on http://127.0.0.1:METRICS_PORT/metrics; None disables
+METRICS_PORT = 9101
 
 # Categories
 RECYCLABLE_ITEMS = ['bottle-glass', 'bottle-plastic', 'tin can', 'gym bottle']
 LANDFILL_ITEMS = ['cup-disposable', 'glass-wine', 'glass-normal', 'glass-mug', 'cup-handle']
 
 
+_RECYCLABLE_LOWER = frozenset(item.lower() for item in RECYCLABLE_ITEMS)
+_LANDFILL_LOWER = frozenset(item.lower() for item in LANDFILL_ITEMS)
+
+# Category indices used by the vectorized post-processing
+CATEGORY_RECYCLABLE, CATEGORY_LANDFILL, CATEGORY_UNKNOWN = 0, 1, 2
+CATEGORY_NAMES = ("RECYCLABLE", "LANDFILL", "UNKNOWN")
+CATEGORY_COLORS = ((0, 255, 0), (0, 0, 255), (255, 255, 0))
+
+# Per-frame detections as arrays: boxes (N, 4) int, categories (N,), confidences (N,),
+# counts (3,) indexed by CATEGORY_*
+Detections = namedtuple('Detections', ['boxes', 'categories', 'confidences', 'counts'])
+
+
 def classify_waste_type(class_name):
     """Classify detected object"""
     class_lower = class_name.lower()
-    if class_lower in [item.lower() for item in RECYCLABLE_ITEMS]:
+    if class_lower in _RECYCLABLE_LOWER:
         return "RECYCLABLE", (0, 255, 0)
-    elif class_lower in [item.lower() for item in LANDFILL_ITEMS]:
+    elif class_lower in _LANDFILL_LOWER:
         return "LANDFILL", (0, 0, 255)
     else:
         return "UNKNOWN", (255, 255, 0)
 
 
-def set_servo_angle(pwm, angle):
-    """Set servo to specific angle (0-180 degrees)"""
-    duty = 2.5 + (angle / 180.0) * 10.0
-    pwm.ChangeDutyCycle(duty)
-    time.sleep(0.5)
-    pwm.ChangeDutyCycle(0)
-
-
-def set_servo_pair(pwm1, pwm2, angle):
-    """Set a pair of servos to the same angle"""
-    set_servo_angle(pwm1, angle)
-    set_servo_angle(pwm2, angle)
-
-
-def run_detection(conf_threshold=0.25, headless=False, enable_servo=False):
-    """Run webcam detection with trained model"""
+def build_category_lookup(names):
+    """Map every model class id to a CATEGORY_* index, once per model"""
+    lookup = np.full(max(names) + 1, CATEGORY_UNKNOWN, dtype=np.intp)
+    for cls_id, class_name in names.items():
+        lookup[cls_id] = CATEGORY_NAMES.index(classify_waste_type(class_name)[0])
+    return lookup
+
+
+def summarize_detections(results, lookup, offset=(0, 0), letterbox=None):
+    """Pull all boxes of a frame out as arrays and count categories in one pass
+
+    letterbox maps boxes from a Letterbox input back to the (cropped) frame.
+    """
+    boxes, classes, confidences = [], [], []
+    for result in results:
+        if len(result.boxes):
+            boxes.append(result.boxes.xyxy.cpu().numpy())
+            classes.append(result.boxes.cls.cpu().numpy())
+            confidences.append(result.boxes.conf.cpu().numpy())
+
+    if not boxes:
+        return Detections(np.empty((0, 4), dtype=np.int32), np.empty(0, dtype=np.intp),
+                          np.empty(0, dtype=np.float32), np.zeros(3, dtype=np.intp))
+
+    boxes = np.concatenate(boxes)
+    if letterbox is not None:
+        boxes = letterbox.to_source(boxes)
+    boxes = boxes.astype(np.int32)
+    boxes += np.array([offset[0], offset[1], offset[0], offset[1]], dtype=np.int32)
+    categories = lookup[np.concatenate(classes).astype(np.intp)]
+    counts = np.bincount(categories, minlength=3)
+    return Detections(boxes, categories, np.concatenate(confidences), counts)
+
+
+def detections_to_record(timestamp, detections):
+    """One JSON-serializable line per frame, for offline replay of the FSM"""
+    return {
+        "t": round(timestamp, 4),
+        "boxes": detections.boxes.tolist(),
+        "categories": detections.categories.tolist(),
+        "confidences": [round(c, 3) for c in detections.confidences.tolist()],
+    }
+
+
+def build_overlay_lines(counts, conf, state, waste_type):
+    """Text lines for the stats panel as (text, color, scale)"""
+    recyclable, landfill, unknown = counts
+    lines = [
+        (f"Recyclable: {recyclable}", (0, 255, 0), 0.7),
+        (f"Landfill: {landfill}", (0, 0, 255), 0.7),
+        (f"Unknown: {unknown}", (255, 255, 0), 0.7),
+        (f"Conf: {conf:.2f}", (255, 255, 255), 0.7),
+        (f"State: {state}", (255, 165, 0), 0.6),
+    ]
+    if waste_type:
+        lines.append((f"Type: {waste_type}", (255, 255, 255), 0.6))
+    return lines
+
+
+def render_annotations(frame, detections, overlay_lines, roi=None):
+    """Draw boxes, the chute ROI and the stats panel onto frame in place"""
+    for box, category, confidence in zip(detections.boxes.tolist(),
+                                         detections.categories.tolist(),
+                                         detections.confidences.tolist()):
+        label = f"{CATEGORY_NAMES[category]} {confidence:.0%}"
+        draw_box(frame, box, label, CATEGORY_COLORS[category])
+    if roi is not None:
+        cv2.rectangle(frame, (roi.x1, roi.y1), (roi.x2, roi.y2), (255, 165, 0), 1)
+    draw_stats_panel(frame, overlay_lines)
+
+
+SERVO_GROUPS = {
+    "recycle": (RECYCLABLE_SERVO_PIN_1, RECYCLABLE_SERVO_PIN_2),
+    "landfill": (LANDFILL_SERVO_PIN_1, LANDFILL_SERVO_PIN_2),
+    "gate1": (GATE_PIN_1, GATE_PIN_2),
+    "gate2": (GATE_PIN_3, GATE_PIN_4),
+}
+
+# Multi-lane mode (lanes.py, menu option 8): one camera, servo pin map and FSM per
+# chute. camera is a /dev/video index, 'picamera2:N' or an image directory/video
+# to replay; pins maps the same groups as SERVO_GROUPS.
+LANES = [
+    {"name": "lane1", "camera": "picamera2:0", "pins": SERVO_GROUPS},
+    {"name": "lane2", "camera": "picamera2:1", "pins": {
+        "recycle": (12, 13),
+        "landfill": (20, 21),
+        "gate1": (25, 26),
+        "gate2": (27, 4),
+    }},
+]
+LANE_WORKERS = 2  # Inference processes shared by all lanes
+LANE_FRAME_SLOTS = 2  # Shared-memory frames per lane: one being inferred, one being captured
+
+CLOSED_ANGLES = {
+    "recycle": SERVO_CLOSED_ANGLE_RECYCLE,
+    "landfill": SERVO_CLOSED_ANGLE_LAND,
+    "gate1": GATE_CLOSED_ANGLE_G1,
+    "gate2": GATE_CLOSED_ANGLE_G2,
+}
+
+
+class ServoActuator:
+    """Maps SortingEngine commands onto the four servo pairs"""
+
+    def __init__(self, servos):
+        self.servos = servos
+
+    def open_gate1(self):
+        self.servos.move("gate1", GATE_OPEN_ANGLE_G1)
+
+    def close_gate1(self):
+        self.servos.move("gate1", GATE_CLOSED_ANGLE_G1)
+
+    def set_bins(self, recycle_open, landfill_open):
+        self.servos.move_all({
+            "recycle": SERVO_OPEN_ANGLE_RECYCLE if recycle_open else SERVO_CLOSED_ANGLE_RECYCLE,
+            "landfill": SERVO_OPEN_ANGLE_LAND if landfill_open else SERVO_CLOSED_ANGLE_LAND,
+        })
+
+    def open_gate2(self, delay=0.0):
+        self.servos.move("gate2", GATE_OPEN_ANGLE_G2, delay=delay)
+
+    def close_gate2(self):
+        self.servos.move("gate2", GATE_CLOSED_ANGLE_G2)
+
+
+def sort_timings():
+    """SortTimings from the module-level timing configuration"""
+    return SortTimings(bin_open_duration=BIN_OPEN_DURATION,
+                       gate_open_duration=GATE_OPEN_DURATION,
+                       clear_wait_time=CLEAR_WAIT_TIME,
+                       idle_sleep_time=IDLE_SLEEP_TIME,
+                       gate1_timeout=GATE1_TIMEOUT,
+                       bin_settle_time=SETTLE_TIME)
+
+
+def create_servo_controller(backend=None, groups=None):
+    """Build a ServoController with the four servo pairs (SERVO_GROUPS by default) registered"""
+    groups = groups or SERVO_GROUPS
+    if backend is None:
+        backend = GPIOBackend([pin for pins in groups.values() for pin in pins])
+    servos = ServoController(backend)
+    for name, pins in groups.items():
+        servos.add_group(name, pins)
+    return servos
+
+
+def init_servos():
+    """Set up all eight servos and move them to their closed positions; None if unavailable"""
+    if not GPIO_AVAILABLE:
+        print("❌ GPIO not available. Servo control disabled.")
+        return None
+    servos = None
+    try:
+        print("Initializing servos...")
+        servos = create_servo_controller()
+
+        # Initialize positions (all pairs move together)
+        print("Setting initial positions...")
+        servos.move_all(CLOSED_ANGLES)
+        servos.wait_idle()
+
+        print("✓ All 8 servos initialized!")
+        print(f"  Bins: GPIO {RECYCLABLE_SERVO_PIN_1},{RECYCLABLE_SERVO_PIN_2} (recycle: closed={SERVO_CLOSED_ANGLE_RECYCLE}°, open={SERVO_OPEN_ANGLE_RECYCLE}°)")
+        print(f"        GPIO {LANDFILL_SERVO_PIN_1},{LANDFILL_SERVO_PIN_2} (landfill: closed={SERVO_CLOSED_ANGLE_LAND}°, open={SERVO_OPEN_ANGLE_LAND}°)")
+        print(f"  Gates: GPIO {GATE_PIN_1},{GATE_PIN_2} (Gate 1: closed={GATE_CLOSED_ANGLE_G1}°, open={GATE_OPEN_ANGLE_G1}°)")
+        print(f"         GPIO {GATE_PIN_3},{GATE_PIN_4} (Gate 2: closed={GATE_CLOSED_ANGLE_G2}°, open={GATE_OPEN_ANGLE_G2}°)")
+        return servos
+    except Exception as e:
+        print(f"❌ Failed to initialize servos: {e}")
+        if servos is not None:
+            servos.close()
+        return None
+
+
+def warm_up(model, runs=2):
+    """Run the model on a blank frame so the first real one isn't slow; returns seconds taken"""
+    blank = np.zeros((FRAME_SIZE[1], FRAME_SIZE[0], 3), dtype=np.uint8)
+    image = Letterbox(MODEL_IMGSZ).tensor(blank) if PERSISTENT_INPUT else blank
+    start = time.perf_counter()
+    for _ in range(runs):
+        model(image, verbose=False)
+    return time.perf_counter() - start
+
+
+class DetectionMetrics:
+    """The detector's metrics, registered once and shared by every run
+
+    Whoever owns the process (the menu below, detector_daemon.py) creates
+    one, serves it with serve() and passes it to each run_detection() call,
+    so counters keep counting across runs and the endpoint stays bound.
+    """
+
+    def __init__(self, registry=None):
+        self.registry = registry if registry is not None else Registry()
+        self.stages = StageTimers(self.registry)
+        self.frames_total = self.registry.counter("trashbin_frames_total", "Frames processed")
+        self.registry.counter("trashbin_inference_skipped_total",
+                              "Frames the motion gate kept from the model").set_function(self._skipped)
+        self.sorting = SortingMetrics(self.registry)
+        self.gate = None  # The running GatedInference
+        self._skipped_before = 0
+
+    def _skipped(self):
+        gate = self.gate
+        return self._skipped_before + (gate.skipped if gate is not None else 0)
+
+    def end_run(self):
+        if self.gate is not None:
+            self._skipped_before += self.gate.skipped
+            self.gate = None
+
+    def serve(self, port=None):
+        """Start the /metrics endpoint on port (METRICS_PORT); None if disabled or taken"""
+        port = METRICS_PORT if port is None else port
+        if not port:
+            return None
+        try:
+            server = start_http_server(self.registry, port)
+        except OSError as e:
+            print(f"⚠ Metrics endpoint unavailable: {e}")
+            return None
+        print(f"✓ Metrics on http://127.0.0.1:{port}/metrics")
+        return server
+
+
+def run_detection(conf_threshold=0.25, headless=False, enable_servo=False, pipelined=False,
+                  batch_size=1, batch_window=0.1, backend=None, int8=None, record_path=None,
+                  model=None, camera=None, servos=None, stop_event=None, source=None,
+                  replay_fps=None, frame_listener=None, metrics=None, tracking=None,
+                  motion_gating=None, publish_events=True, save_dir=None):
+    """Run webcam detection with trained model
+
+    With pipelined=True, capture and inference run on their own threads so
+    frames keep flowing while the FSM waits on detections. Servo moves are
+    always queued on the ServoController and never block the loop.
+
+    batch_size > 1 (implies pipelined) groups up to batch_size frames, or
+    those captured within batch_window seconds, into one model call.
+
+    backend/int8 default to MODEL_BACKEND/MODEL_INT8; with model passed in,
+    backend names the runtime it was loaded on. Batching is refused on
+    backends without dynamic input shapes (NCNN). record_path writes
+    every frame's detections as JSON lines for benchmarks/replay_actuations.py.
+
+    model, camera and servos (an initialized ServoController) can be passed
+    in already set up; they are then left open for the caller, which is how
+    detector_daemon.py keeps them warm between runs. stop_event ends the
+    run when set.
+
+    source replays an image directory or video file (camera.ReplaySource,
+    paced to replay_fps) instead of opening the camera; the run ends with
+    the last frame. frame_listener(frame, detections, engine) is called for
+    every processed frame, which is how benchmarks/eval_replay.py scores it.
+
+    metrics (DetectionMetrics) collects the stage timings and counters; the
+    caller serves it. Without one the run records into a private registry.
+    tracking, motion_gating and save_dir default to TRACKING, MOTION_GATING
+    and SAVE_DIR; publish_events=False keeps sort events off
+    EVENT_SOCKET_PATH.
+    """
+    tracking = TRACKING if tracking is None else tracking
+    motion_gating = MOTION_GATING if motion_gating is None else motion_gating
+    if batch_size > 1:
+        pipelined = True
     print("\n📹 WASTE DETECTION - SEQUENTIAL GATE LOGIC")
     if headless:
         print("(HEADLESS MODE - Saving frames to disk)")
     if enable_servo:
         print("(SERVO MODE - Enabled)")
+    if pipelined:
+        print("(PIPELINED MODE - Capture/inference threads)")
+    if batch_size > 1:
+        print(f"(BATCHED INFERENCE - up to {batch_size} frames / {batch_window * 1000:.0f} ms)")
     print("=" * 70)
 
-    if not MODEL_PATH.exists():
-        print(f"❌ Model not found at {MODEL_PATH}")
-        return
-
-    print(f"✓ Using: {MODEL_PATH}\n")
-    model = YOLO(str(MODEL_PATH))
-
-    # Initialize servo variables
-    pwm_recycle1 = pwm_recycle2 = pwm_landfill1 = pwm_landfill2 = None
-    pwm_gate1 = pwm_gate2 = pwm_gate3 = pwm_gate4 = None
+    if model is None:
+        if not MODEL_PATH.exists():
+            print(f"❌ Model not found at {MODEL_PATH}")
+            return
 
-    if enable_servo:
-        if not GPIO_AVAILABLE:
-            print("❌ GPIO not available. Servo control disabled.")
-            enable_servo = False
-        else:
-            try:
-                print("Initializing servos...")
-                GPIO.setmode(GPIO.BCM)
-                GPIO.setwarnings(False)
-
-                # Setup all GPIO pins
-                for pin in [RECYCLABLE_SERVO_PIN_1, RECYCLABLE_SERVO_PIN_2,
-                            LANDFILL_SERVO_PIN_1, LANDFILL_SERVO_PIN_2,
-                            GATE_PIN_1, GATE_PIN_2, GATE_PIN_3, GATE_PIN_4]:
-                    GPIO.setup(pin, GPIO.OUT)
-
-                # Create PWM instances
-                pwm_recycle1 = GPIO.PWM(RECYCLABLE_SERVO_PIN_1, 50)
-                pwm_recycle2 = GPIO.PWM(RECYCLABLE_SERVO_PIN_2, 50)
-                pwm_landfill1 = GPIO.PWM(LANDFILL_SERVO_PIN_1, 50)
-                pwm_landfill2 = GPIO.PWM(LANDFILL_SERVO_PIN_2, 50)
-                pwm_gate1 = GPIO.PWM(GATE_PIN_1, 50)
-                pwm_gate2 = GPIO.PWM(GATE_PIN_2, 50)
-                pwm_gate3 = GPIO.PWM(GATE_PIN_3, 50)
-                pwm_gate4 = GPIO.PWM(GATE_PIN_4, 50)
-
-                # Start all PWM
-                for pwm in [pwm_recycle1, pwm_recycle2, pwm_landfill1, pwm_landfill2,
-                            pwm_gate1, pwm_gate2, pwm_gate3, pwm_gate4]:
-                    pwm.start(0)
-
-                # Initialize positions
-                print("Setting initial positions...")
-                set_servo_pair(pwm_recycle1, pwm_recycle2, SERVO_CLOSED_ANGLE_RECYCLE)
-                set_servo_pair(pwm_landfill1, pwm_landfill2, SERVO_CLOSED_ANGLE_LAND)
-                set_servo_pair(pwm_gate1, pwm_gate2, GATE_CLOSED_ANGLE_G1)
-                set_servo_pair(pwm_gate3, pwm_gate4, GATE_CLOSED_ANGLE_G2)
-                time.sleep(1)
-
-                print("✓ All 8 servos initialized!")
-                print(f"  Bins: GPIO {RECYCLABLE_SERVO_PIN_1},{RECYCLABLE_SERVO_PIN_2} (recycle: closed={SERVO_CLOSED_ANGLE_RECYCLE}°, open={SERVO_OPEN_ANGLE_RECYCLE}°)")
-                print(f"        GPIO {LANDFILL_SERVO_PIN_1},{LANDFILL_SERVO_PIN_2} (landfill: closed={SERVO_CLOSED_ANGLE_LAND}°, open={SERVO_OPEN_ANGLE_LAND}°)")
-                print(f"  Gates: GPIO {GATE_PIN_1},{GATE_PIN_2} (Gate 1: closed={GATE_CLOSED_ANGLE_G1}°, open={GATE_OPEN_ANGLE_G1}°)")
-                print(f"         GPIO {GATE_PIN_3},{GATE_PIN_4} (Gate 2: closed={GATE_CLOSED_ANGLE_G2}°, open={GATE_OPEN_ANGLE_G2}°)")
-            except Exception as e:
-                print(f"❌ Failed to initialize servos: {e}")
-                enable_servo = False
-                if pwm_recycle1:
-                    for pwm in [pwm_recycle1, pwm_recycle2, pwm_landfill1, pwm_landfill2,
-                                pwm_gate1, pwm_gate2, pwm_gate3, pwm_gate4]:
-                        if pwm:
-                            pwm.stop()
-                GPIO.cleanup()
+        print(f"✓ Using: {MODEL_PATH}")
+        model, backend = load_model(MODEL_PATH,
+                                    backend=backend or MODEL_BACKEND,
+                                    int8=MODEL_INT8 if int8 is None else int8,
+                                    data=str(DATASET_YAML))
+        print()
+    if batch_size > 1 and backend is not None and resolve_backend(backend) not in DYNAMIC_BACKENDS:
+        raise ValueError(f"Batched inference needs a dynamic-shape backend "
+                         f"({', '.join(sorted(DYNAMIC_BACKENDS))}), not {backend}")
+
+    owns_servos = servos is None
+    if not enable_servo:
+        servos = None
+    elif owns_servos:
+        servos = init_servos()
+        enable_servo = servos is not None
 
     # Initialize camera
-    picam2 = None
-    cap = None
-
-    if PICAMERA2_AVAILABLE:
-        try:
-            print("\nInitializing Picamera2...")
-            picam2 = Picamera2()
-            config = picam2.create_preview_configuration(
-                main={"size": (1280, 720), "format": "RGB888"}
-            )
-            picam2.configure(config)
-            picam2.start()
-            time.sleep(2)
-            print("✓ Picamera2 initialized")
-        except Exception as e:
-            print(f"⚠ Picamera2 failed: {e}")
-            picam2 = None
-
-    if picam2 is None:
-        print("Trying OpenCV VideoCapture...")
-        for device in [0, 1, 2]:
-            test_cap = cv2.VideoCapture(device, cv2.CAP_V4L2)
-            if test_cap.isOpened():
-                ret, frame = test_cap.read()
-                if ret and frame is not None:
-                    print(f"✓ Camera opened on device {device}")
-                    cap = test_cap
-                    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-                    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
-                    break
-                test_cap.release()
-
-        if cap is None:
-            print("❌ Could not open camera")
+    owns_camera = camera is None
+    if source is not None and owns_camera:
+        camera = ReplaySource(source, replay_fps)
+        print(f"✓ Replaying {len(camera)} frames from {source}")
+    elif owns_camera:
+        camera = open_camera(ring=FrameRing(FRAME_POOL_SLOTS) if FRAME_POOL_SLOTS else None)
+        if camera is None:
             return
+    frame_ring = camera.ring
+
+    # Per-stage timers stay on even without the endpoint, they cost a few µs per frame
+    if metrics is None:
+        metrics = DetectionMetrics()
+    stages = metrics.stages
 
     print("\nCONTROLS: q=Quit | s=Screenshot | +/-=Confidence")
+    writer = None
     if headless:
         print("Note: Running headless. Press Ctrl+C to stop.")
-        import os
-        os.makedirs('detections', exist_ok=True)
+        writer = AsyncFrameWriter(save_dir or SAVE_DIR, SAVE_QUEUE_SIZE, SAVE_JPEG_QUALITY,
+                                  SAVE_SCALE, SAVE_MAX_DISK_MB)
+        writer.start()
     print("=" * 70 + "\n")
 
     current_conf = conf_threshold
     frame_count = 0
 
-    # State machine variables
-    state = "WAITING_GATE1"
-    last_state_change = time.time()
-    last_detection_time = 0
-    detected_waste_type = None
-
+    # Only the inference thread calls run_model, so one input tensor is enough
+    letterbox = Letterbox(MODEL_IMGSZ, max(1, batch_size)) if PERSISTENT_INPUT else None
+
+    def run_model(image):
+        with stages.stage('inference'):
+            if letterbox is not None:
+                image = letterbox.tensor(image)
+            return model(image, conf=current_conf, verbose=False)
+
+    # ROI crop + motion gate in front of the model
+    roi = RegionOfInterest(*CHUTE_ROI) if CHUTE_ROI else None
+    motion_gate = None
+    if motion_gating:
+        motion_gate = MotionGate(MOTION_PIXEL_THRESHOLD, MOTION_MIN_CHANGED, MOTION_REFRESH_FRAMES)
+    infer = GatedInference(run_model, roi, motion_gate)
+    metrics.gate = infer
+    category_lookup = build_category_lookup(model.names)
+    tracker = None
+    if tracking:
+        tracker = ItemTracker(TRACK_IOU_THRESHOLD, TRACK_WINDOW, TRACK_MIN_VOTES, TRACK_MAX_MISSED)
+    record_file = open(record_path, 'w') if record_path else None
+    allocations = AllocationMonitor(ALLOC_REPORT_FRAMES).start() if ALLOC_REPORT_FRAMES else None
+
+    renderer = FrameRenderer(stages.wrap('render', render_annotations))
+    renderer.start()
+    displayed = LatestFrame()
+
+    # Pipelined mode: grab -> infer on worker threads
+    grabber = inference_worker = None
+    if pipelined:
+        grabber = LatestFrameGrabber(camera, stages)
+        inference_worker = InferenceWorker(grabber, infer, batch_size, batch_window)
+        grabber.start()
+        inference_worker.start()
+
+    # Sorting state machine, driven only when the servos are available
+    engine = None
+    if enable_servo and servos is not None:
+        engine = SortingEngine(ServoActuator(servos), sort_timings())
+    sort_events = None
+    if engine is not None and publish_events and EVENT_SOCKET_PATH:
+        sort_events = SortEventReporter(EventPublisher(EVENT_SOCKET_PATH)).attach(engine)
+    if engine is not None:
+        metrics.sorting.attach(engine)
+
+    def render_args():
+        state = engine.state if engine is not None else WAITING_GATE1
+        waste_type = engine.detected_waste_type if engine is not None else None
+        lines = build_overlay_lines((recyclable, landfill, unknown), current_conf,
+                                    state, waste_type)
+        return detections, lines, roi
+
+    frame = shown = None  # Held ring frames, released at the end of each iteration
     try:
-        while True:
-            # Get frame
-            if picam2 is not None:
-                frame = picam2.capture_array()
-                ret = True
+        while stop_event is None or not stop_event.is_set():
+            # Get frame and run detection
+            if pipelined:
+                item = inference_worker.get(timeout=1.0)
+                if item is None:
+                    if inference_worker.error is not None:
+                        raise inference_worker.error
+                    if not inference_worker.is_alive():
+                        print("Failed to grab frame")
+                        break
+                    continue
+                frame, results = item
             else:
-                ret, frame = cap.read()
-
-            if not ret or frame is None:
-                print("Failed to grab frame")
-                break
+                with stages.stage('capture'):
+                    frame = camera.read()
+                if frame is None:
+                    print("✓ Replay finished" if isinstance(camera, ReplaySource) else "Failed to grab frame")
+                    break
+                results = infer(frame)
 
             frame_count += 1
+            metrics.frames_total.inc()
             current_time = time.time()
 
-            # Run detection
-            recyclable = landfill = unknown = 0
-            results = model(frame, conf=current_conf, verbose=False)
-
-            for result in results:
-                for box in result.boxes:
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                    cls_id = int(box.cls[0])
-                    class_name = model.names[cls_id]
-                    confidence = float(box.conf[0])
-
-                    waste_type, color = classify_waste_type(class_name)
-
-                    if waste_type == "RECYCLABLE":
-                        recyclable += 1
-                    elif waste_type == "LANDFILL":
-                        landfill += 1
-                    else:
-                        unknown += 1
-
-                    # Draw box
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-                    label = f"{waste_type} {confidence:.0%}"
-                    (w, h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
-                    cv2.rectangle(frame, (x1, y1 - h - 8), (x1 + w + 4, y1), color, -1)
-                    cv2.putText(frame, label, (x1 + 2, y1 - 4),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+            with stages.stage('post_process'):
+                detections = summarize_detections(results, category_lookup, infer.offset, letterbox)
+                if tracker is not None:
+                    stable_items = tracker.update(detections.boxes, detections.categories,
+                                                  detections.confidences)
+                    recyclable, landfill, unknown = stable_counts(stable_items).tolist()
+                else:
+                    recyclable, landfill, unknown = detections.counts.tolist()
+            if record_file is not None:
+                record_file.write(json.dumps(detections_to_record(current_time, detections)) + "\n")
 
             # State machine logic
             is_object_detected = (recyclable > 0) or (landfill > 0)
-
-            if enable_servo and pwm_recycle1 is not None:
-
-                if state == "WAITING_GATE1":
-                    # Wait for detection to clear, then open Gate 1
-                    if is_object_detected:
-                        last_detection_time = current_time
-                    else:
-                        # No object detected, wait to ensure clear
-                        if current_time - last_detection_time > CLEAR_WAIT_TIME:
-                            print("🚪 Opening Gate 1 - ready for bottle")
-                            set_servo_pair(pwm_gate1, pwm_gate2, GATE_OPEN_ANGLE_G1)
-                            state = "GATE1_OPEN"
-                            last_state_change = current_time
-
-                elif state == "GATE1_OPEN":
-                    # Gate 1 is open, wait for bottle to enter
-                    if is_object_detected:
-                        # Bottle detected! Close Gate 1 and classify
-                        print("✓ Bottle detected! Closing Gate 1")
-                        set_servo_pair(pwm_gate1, pwm_gate2, GATE_CLOSED_ANGLE_G1)
-                        state = "CLASSIFYING"
-                        last_state_change = current_time
-                        detected_waste_type = None
-                    elif current_time - last_state_change > 5.0:
-                        # Gate been open too long with no bottle, close and wait
-                        print("⚠️  Gate 1 timeout - no bottle detected, closing")
-                        set_servo_pair(pwm_gate1, pwm_gate2, GATE_CLOSED_ANGLE_G1)
-                        state = "IDLE_SLEEP"
-                        last_state_change = current_time
-
-                elif state == "CLASSIFYING":
-                    # Classify the bottle and open appropriate bin
-                    if recyclable > 0 and landfill == 0:
-                        if detected_waste_type != "RECYCLABLE":
-                            print("♻️  RECYCLABLE detected! Opening bin (GPIO 17, 5)")
-                            set_servo_pair(pwm_recycle1, pwm_recycle2, SERVO_OPEN_ANGLE_RECYCLE)
-                            set_servo_pair(pwm_landfill1, pwm_landfill2, SERVO_CLOSED_ANGLE_LAND)
-                            detected_waste_type = "RECYCLABLE"
-                            last_detection_time = current_time
-
-                    elif landfill > 0 and recyclable == 0:
-                        if detected_waste_type != "LANDFILL":
-                            print("🗑️  LANDFILL detected! Opening bin (GPIO 18, 6)")
-                            set_servo_pair(pwm_landfill1, pwm_landfill2, SERVO_OPEN_ANGLE_LAND)
-                            set_servo_pair(pwm_recycle1, pwm_recycle2, SERVO_CLOSED_ANGLE_RECYCLE)
-                            detected_waste_type = "LANDFILL"
-                            last_detection_time = current_time
-
-                    elif recyclable > 0 and landfill > 0:
-                        if detected_waste_type != "BOTH":
-                            print("⚠️  Both types detected! Opening BOTH bins (GPIO 17, 18)")
-                            set_servo_pair(pwm_recycle1, pwm_recycle2, SERVO_OPEN_ANGLE_RECYCLE)
-                            set_servo_pair(pwm_landfill1, pwm_landfill2, SERVO_OPEN_ANGLE_LAND)
-                            detected_waste_type = "BOTH"
-                            last_detection_time = current_time
-
-                    # Wait for bin to stay open, then check if bottle is gone
-                    if detected_waste_type is not None:
-                        if current_time - last_detection_time > BIN_OPEN_DURATION:
-                            if not is_object_detected:
-                                # Bottle is gone, close bins and open Gate 2
-                                print("✓ Bottle sorted! Closing bins, opening Gate 2")
-                                set_servo_pair(pwm_recycle1, pwm_recycle2, SERVO_CLOSED_ANGLE_RECYCLE)
-                                set_servo_pair(pwm_landfill1, pwm_landfill2, SERVO_CLOSED_ANGLE_LAND)
-                                time.sleep(0.5)
-                                set_servo_pair(pwm_gate3, pwm_gate4, GATE_OPEN_ANGLE_G2)
-                                state = "GATE2_OPEN"
-                                last_state_change = current_time
-                            else:
-                                # Still detecting, keep waiting
-                                last_detection_time = current_time
-
-                elif state == "GATE2_OPEN":
-                    # Gate 2 is open, wait then close it
-                    if current_time - last_state_change > GATE_OPEN_DURATION:
-                        print("🚪 Closing Gate 2")
-                        set_servo_pair(pwm_gate3, pwm_gate4, GATE_CLOSED_ANGLE_G2)
-                        state = "WAITING_GATE1"
-                        last_state_change = current_time
-                        print("🔄 Ready for next bottle\n")
-
-                elif state == "IDLE_SLEEP":
-                    # Sleep when both gates open but nothing detected
-                    if current_time - last_state_change > IDLE_SLEEP_TIME:
-                        print("💤 Idle period complete, resuming...")
-                        state = "WAITING_GATE1"
-                        last_state_change = current_time
-
-            # Stats overlay
-            overlay = frame.copy()
-            cv2.rectangle(overlay, (0, 0), (300, 200), (0, 0, 0), -1)
-            cv2.addWeighted(overlay, 0.4, frame, 0.6, 0, frame)
-
-            cv2.putText(frame, f"Recyclable: {recyclable}", (10, 30),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            cv2.putText(frame, f"Landfill: {landfill}", (10, 60),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-            cv2.putText(frame, f"Unknown: {unknown}", (10, 90),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
-            cv2.putText(frame, f"Conf: {current_conf:.2f}", (10, 120),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-            cv2.putText(frame, f"State: {state}", (10, 150),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 165, 0), 2)
-            if detected_waste_type:
-                cv2.putText(frame, f"Type: {detected_waste_type}", (10, 180),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-
-            # Display or save
+            if engine is not None:
+                with stages.stage('actuation'):
+                    engine.step(recyclable, landfill)
+            if sort_events is not None:
+                sort_events.observe(detections.confidences)
+            if frame_listener is not None:
+                frame_listener(frame, detections, engine)
+
+            # Display or save; annotation is drawn on the renderer thread and
+            # only for frames that are actually shown or written
             if headless:
                 if is_object_detected or (frame_count % 30 == 0):
-                    filename = f'detections/frame_{frame_count:06d}.jpg'
-                    cv2.imwrite(filename, frame)
+                    filename = f'frame_{frame_count:06d}.jpg'
+                    renderer.submit(frame, render_args(),
+                                    lambda image, name=filename: writer.write(image, name))
                     if is_object_detected:
                         print(f"Frame {frame_count}: R={recyclable} L={landfill} - Saved")
             else:
-                cv2.imshow('Waste Detection', frame)
+                renderer.submit(frame, render_args(), displayed)
+                shown = displayed.get()
+                if shown is not None:
+                    cv2.imshow('Waste Detection', shown)
                 key = cv2.waitKey(1) & 0xFF
                 if key == ord('q') or key == 27:
                     break
-                elif key == ord('s'):
+                elif key == ord('s') and shown is not None:
                     filename = f'screenshot_{frame_count}.jpg'
-                    cv2.imwrite(filename, frame)
+                    cv2.imwrite(filename, shown)
                     print(f"✓ Screenshot saved: {filename}")
                 elif key == ord('+') or key == ord('='):
                     current_conf = min(0.95, current_conf + 0.05)
@@ -384,32 +578,88 @@ def run_detection(conf_threshold=0.25, headless=False, enable_servo=False):
                     current_conf = max(0.05, current_conf - 0.05)
                     print(f"Confidence: {current_conf:.2f}")
 
+            release(frame)
+            release(shown)
+            frame = shown = None
+            if allocations is not None:
+                allocations.frame_done()
+
     except KeyboardInterrupt:
         print("\n\n⚠️ Stopped by user")
     finally:
+        release(frame)
+        release(shown)
         # Cleanup
-        if enable_servo and pwm_recycle1 is not None:
+        if pipelined:
+            grabber.stop()
+            inference_worker.stop()
+            inference_worker.join(timeout=2.0)
+            grabber.join(timeout=2.0)
+        renderer.stop()
+        metrics.end_run()
+        if record_file is not None:
+            record_file.close()
+        if allocations is not None:
+            allocations.stop()
+        if frame_ring is not None:
+            stats = frame_ring.stats()
+            print(f"✓ Frame buffers: {stats['slots']} slots, {stats['reused']} reused, "
+                  f"{stats['overflow']} overflow")
+        if sort_events is not None:
+            sort_events.publisher.close()
+            print(f"✓ Sort events: {sort_events.publisher.sent} sent, "
+                  f"{sort_events.publisher.dropped} dropped")
+        if writer is not None:
+            writer.stop()
+            print(f"✓ Saved {writer.written} frames "
+                  f"(dropped {writer.dropped + renderer.dropped}, evicted {writer.evicted})")
+
+        if enable_servo and servos is not None:
             print("\nCleaning up servos...")
-            set_servo_pair(pwm_recycle1, pwm_recycle2, SERVO_CLOSED_ANGLE_RECYCLE)
-            set_servo_pair(pwm_landfill1, pwm_landfill2, SERVO_CLOSED_ANGLE_LAND)
-            set_servo_pair(pwm_gate1, pwm_gate2, GATE_CLOSED_ANGLE_G1)
-            set_servo_pair(pwm_gate3, pwm_gate4, GATE_CLOSED_ANGLE_G2)
-            time.sleep(1)
-            for pwm in [pwm_recycle1, pwm_recycle2, pwm_landfill1, pwm_landfill2,
-                        pwm_gate1, pwm_gate2, pwm_gate3, pwm_gate4]:
-                pwm.stop()
-            GPIO.cleanup()
+            servos.move_all(CLOSED_ANGLES)
+            if owns_servos:
+                servos.close()
             print("✓ Servos cleaned up")
 
-        if picam2 is not None:
-            picam2.stop()
-        if cap is not None:
-            cap.release()
-        cv2.destroyAllWindows()
+        if owns_camera:
+            camera.release()
+        if not headless:
+            cv2.destroyAllWindows()
+        if infer.skipped:
+            total = infer.inferred + infer.skipped
+            print(f"✓ Motion gate skipped inference on {infer.skipped}/{total} frames")
         print("✓ Detection ended")
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Raspberry Pi waste detection")
+    parser.add_argument('--backend', choices=['auto'] + list(BACKENDS), default=MODEL_BACKEND,
+                        help="Inference runtime (default: %(default)s)")
+    parser.add_argument('--int8', action='store_true', default=MODEL_INT8,
+                        help="Use an INT8-quantized export (openvino/onnx)")
+    parser.add_argument('--replay', metavar='PATH',
+                        help="Run headless on an image directory or video with mocked servos, then exit")
+    parser.add_argument('--replay-fps', type=float, default=None,
+                        help="Pace the replay like a camera (default: as fast as possible)")
+    args = parser.parse_args()
+    MODEL_BACKEND = args.backend
+    MODEL_INT8 = args.int8
+
+    # One registry and endpoint for every run started from here
+    metrics = DetectionMetrics()
+    metrics_server = metrics.serve()
+    detect = functools.partial(run_detection, metrics=metrics)
+
+    if args.replay:
+        mock_servos = create_servo_controller(
+            MockBackend([pin for pins in SERVO_GROUPS.values() for pin in pins]))
+        try:
+            detect(headless=True, enable_servo=True, servos=mock_servos,
+                   source=args.replay, replay_fps=args.replay_fps)
+        finally:
+            mock_servos.close()
+        raise SystemExit
+
     print("\n" + "=" * 70)
     print("RASPBERRY PI WASTE DETECTION - SEQUENTIAL GATE SYSTEM")
     print("=" * 70)
@@ -419,19 +669,32 @@ if __name__ == '__main__':
         print("2. Run detection (headless)")
         print("3. Run detection + servo control (with display)")
         print("4. Run detection + servo control (headless)")
+        print("5. Run pipelined detection + servo control (with display)")
+        print("6. Run pipelined detection + servo control (headless)")
+        print("7. Run batched detection + servo control (headless)")
+        print("8. Run multi-lane detection + servo control (headless, LANES)")
         print("0. Exit")
 
-        choice = input("\nChoice (0-4): ").strip()
+        choice = input("\nChoice (0-8): ").strip()
 
         try:
             if choice == '1':
-                run_detection(headless=False, enable_servo=False)
+                detect(headless=False, enable_servo=False)
             elif choice == '2':
-                run_detection(headless=True, enable_servo=False)
+                detect(headless=True, enable_servo=False)
             elif choice == '3':
-                run_detection(headless=False, enable_servo=True)
+                detect(headless=False, enable_servo=True)
             elif choice == '4':
-                run_detection(headless=True, enable_servo=True)
+                detect(headless=True, enable_servo=True)
+            elif choice == '5':
+                detect(headless=False, enable_servo=True, pipelined=True)
+            elif choice == '6':
+                detect(headless=True, enable_servo=True, pipelined=True)
+            elif choice == '7':
+                detect(headless=True, enable_servo=True, batch_size=INFERENCE_BATCH_SIZE)
+            elif choice == '8':
+                from lanes import run_lanes
+                run_lanes(backend=MODEL_BACKEND, int8=MODEL_INT8)
             elif choice == '0':
                 print("\nExiting...")
                 break
@@ -443,4 +706,8 @@ if __name__ == '__main__':
             print(f"\n❌ Error: {e}")
 
         if choice != '0':
-            input("\nPress ENTER to continue...")
\ No newline at end of file
+            input("\nPress ENTER to continue...")
+
+    if metrics_server is not None:
+        metrics_server.shutdown()
+        metrics_server.server_close()
\ No newline at end of file
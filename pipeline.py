@@ -0,0 +1,166 @@
+"""Capture / inference threads for pipelined detection"""
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+from frame_buffers import release
+
+
+class LatestFrameGrabber(threading.Thread):
+    """Reads the camera continuously and keeps only the newest frame
+
+    get() hands the frame's hold over to the caller; a frame nobody fetched
+    before the next one arrived is released here. With stages (a
+    metrics.StageTimers) every read is timed as 'capture'.
+    """
+
+    def __init__(self, camera, stages=None):
+        super().__init__(name="frame-grabber", daemon=True)
+        self.camera = camera
+        self.stages = stages
+        self.failed = False
+        self._stop_event = threading.Event()
+        self._cond = threading.Condition()
+        self._frame = None
+        self._seq = 0
+        self._done = False
+
+    def run(self):
+        try:
+            while not self._stop_event.is_set():
+                with self.stages.stage('capture') if self.stages is not None else nullcontext():
+                    frame = self.camera.read()
+                if frame is None:
+                    self.failed = True
+                    break
+                with self._cond:
+                    release(self._frame)
+                    self._frame = frame
+                    self._seq += 1
+                    self._cond.notify_all()
+        finally:
+            with self._cond:
+                self._done = True
+                if self._stop_event.is_set():
+                    self._discard()
+                self._cond.notify_all()
+
+    def get(self, last_seq, timeout=1.0):
+        """Wait for a frame newer than last_seq, return (seq, frame) or None"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > last_seq or not self.is_alive(),
+                                timeout=timeout)
+            if self._seq <= last_seq or self._frame is None:
+                return None
+            frame, self._frame = self._frame, None
+            return self._seq, frame
+
+    def stop(self):
+        self._stop_event.set()
+        with self._cond:
+            if self._done:
+                self._discard()
+
+    def _discard(self):
+        # Called with _cond held
+        release(self._frame)
+        self._frame = None
+
+
+class InferenceWorker(threading.Thread):
+    """Runs the model on grabbed frames and publishes per-frame results
+
+    With batch_size > 1, up to batch_size fresh frames (or whatever arrived
+    within batch_window seconds of the first one) are passed to the model in
+    a single call and the results are fanned back out one frame at a time.
+    """
+
+    def __init__(self, grabber, infer, batch_size=1, batch_window=0.1):
+        super().__init__(name="inference-worker", daemon=True)
+        self.grabber = grabber
+        self.infer = infer
+        self.batch_size = max(1, batch_size)
+        self.batch_window = batch_window
+        self.error = None
+        self._stop_event = threading.Event()
+        self._cond = threading.Condition()
+        self._items = deque()  # Up to batch_size (frame, results), oldest dropped first
+        self._done = False
+
+    def run(self):
+        frame_seq = 0
+        try:
+            while not self._stop_event.is_set():
+                frame_seq, frames = self._collect_batch(frame_seq)
+                if not frames:
+                    if not self.grabber.is_alive():
+                        break
+                    continue
+                if self.batch_size == 1:
+                    outputs = [self.infer(frames[0])]
+                else:
+                    outputs = [[result] for result in self.infer(frames)]
+                    if len(outputs) != len(frames):
+                        # A fixed-shape model answered for part of the batch only
+                        print(f"⚠ Model returned {len(outputs)} results for {len(frames)} "
+                              f"frames, falling back to one frame per call")
+                        self.batch_size = 1
+                        outputs = [self.infer(frame) for frame in frames]
+                with self._cond:
+                    for item in zip(frames, outputs):
+                        if len(self._items) >= self.batch_size:
+                            release(self._items.popleft()[0])
+                        self._items.append(item)
+                    self._cond.notify_all()
+        except Exception as e:
+            self.error = e
+        finally:
+            with self._cond:
+                self._done = True
+                if self._stop_event.is_set():
+                    self._discard()
+                self._cond.notify_all()
+
+    def _collect_batch(self, frame_seq):
+        frames = []
+        deadline = None
+        while len(frames) < self.batch_size and not self._stop_event.is_set():
+            if deadline is None:
+                timeout = 0.5
+            else:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+            got = self.grabber.get(frame_seq, timeout=timeout)
+            if got is None:
+                if not frames or not self.grabber.is_alive():
+                    break
+                continue
+            frame_seq, frame = got
+            frames.append(frame)
+            if deadline is None:
+                deadline = time.monotonic() + self.batch_window
+        return frame_seq, frames
+
+    def get(self, timeout=1.0):
+        """Wait for the next unseen (frame, results) pair, or None on timeout
+
+        The caller takes over the frame's hold.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._items or not self.is_alive(), timeout=timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def stop(self):
+        self._stop_event.set()
+        with self._cond:
+            if self._done:
+                self._discard()
+
+    def _discard(self):
+        # Called with _cond held
+        while self._items:
+            release(self._items.popleft()[0])
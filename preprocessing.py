@@ -0,0 +1,173 @@
+"""Frame preprocessing: chute region of interest and motion gating"""
+from lazy_imports import lazy_import
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+
+class RegionOfInterest:
+    """Rectangle (x1, y1, x2, y2) of the capture frame the model looks at"""
+
+    def __init__(self, x1, y1, x2, y2):
+        self.x1, self.y1, self.x2, self.y2 = int(x1), int(y1), int(x2), int(y2)
+
+    @property
+    def offset(self):
+        return self.x1, self.y1
+
+    def crop(self, frame):
+        """Return a view (no copy) of the ROI"""
+        return frame[self.y1:self.y2, self.x1:self.x2]
+
+
+class MotionGate:
+    """Cheap frame differencing: tells whether the ROI changed since the last inference
+
+    Frames are compared on a small grayscale thumbnail against the last frame
+    that was let through, so slow drift still triggers eventually. Inference
+    is forced every refresh_frames frames as a safety net.
+    """
+
+    def __init__(self, pixel_threshold=25, min_changed=0.01, refresh_frames=30,
+                 thumbnail_size=(160, 90)):
+        self.pixel_threshold = pixel_threshold
+        self.min_changed = min_changed
+        self.refresh_frames = refresh_frames
+        self.thumbnail_size = thumbnail_size
+        self._reference = None
+        self._frames_since_pass = 0
+
+    def should_infer(self, image):
+        thumb = cv2.resize(image, self.thumbnail_size, interpolation=cv2.INTER_AREA)
+        if thumb.ndim == 3:
+            thumb = cv2.cvtColor(thumb, cv2.COLOR_BGR2GRAY)
+
+        self._frames_since_pass += 1
+        if self._reference is not None and self._frames_since_pass < self.refresh_frames:
+            diff = cv2.absdiff(thumb, self._reference)
+            changed = np.count_nonzero(diff > self.pixel_threshold) / diff.size
+            if changed < self.min_changed:
+                return False
+
+        self._reference = thumb
+        self._frames_since_pass = 0
+        return True
+
+
+class GatedInference:
+    """Wraps a model call with ROI cropping and motion gating
+
+    Called with a single frame it returns the model's results list; called
+    with a list of frames it returns one Result per frame. Frames the motion
+    gate rejects reuse the previous result instead of running the model.
+    """
+
+    def __init__(self, infer, roi=None, motion_gate=None):
+        self.infer = infer
+        self.roi = roi
+        self.motion_gate = motion_gate
+        self.inferred = 0
+        self.skipped = 0
+        self._last = None
+
+    @property
+    def offset(self):
+        return self.roi.offset if self.roi is not None else (0, 0)
+
+    def __call__(self, frames):
+        if not isinstance(frames, list):
+            return self._run([frames], batched=False)[0]
+        return [results[0] for results in self._run(frames, batched=True)]
+
+    def _run(self, frames, batched):
+        crops = [self.roi.crop(frame) if self.roi is not None else frame for frame in frames]
+        outputs = [None] * len(crops)
+        pending = []
+        for i, image in enumerate(crops):
+            has_previous = i > 0 or self._last is not None
+            if (self.motion_gate is not None and not self.motion_gate.should_infer(image)
+                    and has_previous):
+                self.skipped += 1
+            else:
+                pending.append(i)
+
+        if pending:
+            if batched:
+                fresh = [[result] for result in self.infer([crops[i] for i in pending])]
+            else:
+                fresh = [self.infer(crops[pending[0]])]
+            for i, results in zip(pending, fresh):
+                outputs[i] = results
+            self.inferred += len(pending)
+
+        # Skipped frames repeat the most recent earlier result
+        for i in range(len(outputs)):
+            if outputs[i] is None:
+                outputs[i] = outputs[i - 1] if i > 0 else self._last
+        self._last = outputs[-1]
+        return outputs
+
+
+class Letterbox:
+    """Resizes frames into one persistent, padded model input tensor
+
+    The input is a float32 (batch, 3, size, size) RGB array in 0-1, reused on
+    every call, plus a uint8 canvas per batch slot whose padding is only
+    filled when the geometry changes. With torch installed, tensor() wraps
+    the same memory without copying. Not thread-safe: one caller at a time,
+    and each call overwrites the previous input.
+    """
+
+    def __init__(self, size=640, max_batch=1, pad_value=114):
+        self.size = size
+        self.max_batch = max_batch
+        self.pad_value = pad_value
+        self.input = np.empty((max_batch, 3, size, size), dtype=np.float32)
+        self.canvas = np.full((max_batch, size, size, 3), pad_value, dtype=np.uint8)
+        self.scale = 1.0
+        self.pad = (0, 0)
+        self._source_shape = None
+        self._torch_input = None
+
+    def __call__(self, images):
+        """Fill the input from a frame or a list of same-sized frames; returns the batch view"""
+        if not isinstance(images, list):
+            images = [images]
+        if len(images) > self.max_batch:
+            raise ValueError(f"Batch of {len(images)} exceeds max_batch={self.max_batch}")
+        self._set_geometry(images[0].shape[:2])
+        pad_x, pad_y = self.pad
+        height, width = self._resized
+        for i, image in enumerate(images):
+            region = self.canvas[i, pad_y:pad_y + height, pad_x:pad_x + width]
+            cv2.resize(image, (width, height), dst=region, interpolation=cv2.INTER_LINEAR)
+            # BGR HWC uint8 -> RGB CHW float32 in 0-1, written straight into the input
+            np.multiply(self.canvas[i, :, :, ::-1].transpose(2, 0, 1), np.float32(1 / 255),
+                        out=self.input[i], casting='unsafe')
+        return self.input[:len(images)]
+
+    def tensor(self, images):
+        """Same as calling, but as a torch tensor sharing the input's memory"""
+        import torch
+
+        batch = self(images)
+        if self._torch_input is None:
+            self._torch_input = torch.from_numpy(self.input)
+        return self._torch_input[:len(batch)]
+
+    def to_source(self, boxes):
+        """Map xyxy boxes from input coordinates back to the frame, in place"""
+        boxes[:, [0, 2]] -= self.pad[0]
+        boxes[:, [1, 3]] -= self.pad[1]
+        boxes /= self.scale
+        return boxes
+
+    def _set_geometry(self, shape):
+        if shape == self._source_shape:
+            return
+        self._source_shape = shape
+        height, width = shape
+        self.scale = min(self.size / height, self.size / width)
+        self._resized = (round(height * self.scale), round(width * self.scale))
+        self.pad = ((self.size - self._resized[1]) // 2, (self.size - self._resized[0]) // 2)
+        self.canvas.fill(self.pad_value)
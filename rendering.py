@@ -0,0 +1,98 @@
+"""Annotation rendering, done lazily and off the control loop"""
+import queue
+import threading
+
+from frame_buffers import release, retain
+from lazy_imports import lazy_import
+
+cv2 = lazy_import('cv2')
+
+FONT = 0  # cv2.FONT_HERSHEY_SIMPLEX, spelled out so importing doesn't load OpenCV
+PANEL_WIDTH, PANEL_HEIGHT = 300, 200
+PANEL_DARKEN = 0.6  # Same as blending a black box at 40% opacity
+
+
+def draw_box(frame, box, label, color):
+    x1, y1, x2, y2 = box
+    cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+    (w, h), _ = cv2.getTextSize(label, FONT, 0.6, 2)
+    cv2.rectangle(frame, (x1, y1 - h - 8), (x1 + w + 4, y1), color, -1)
+    cv2.putText(frame, label, (x1 + 2, y1 - 4), FONT, 0.6, (255, 255, 255), 2)
+
+
+def draw_stats_panel(frame, lines):
+    """Darken only the top-left stats panel in place and print lines on it
+
+    lines is a list of (text, color, scale).
+    """
+    panel = frame[:PANEL_HEIGHT, :PANEL_WIDTH]
+    cv2.convertScaleAbs(panel, dst=panel, alpha=PANEL_DARKEN)
+    for i, (text, color, scale) in enumerate(lines):
+        cv2.putText(frame, text, (10, 30 * (i + 1)), FONT, scale, color, 2)
+
+
+class FrameRenderer(threading.Thread):
+    """Renders annotated frames on a background thread
+
+    submit() hands over a frame (which the caller must not touch again), the
+    arguments for render(frame, *args) and a sink(frame) that receives the
+    annotated result. The queue is bounded; when it is full the frame is
+    dropped rather than stalling the control loop. A queued ring frame is
+    retained until its sink has run; sinks that keep it retain it themselves.
+    """
+
+    def __init__(self, render, max_pending=4):
+        super().__init__(name="frame-renderer", daemon=True)
+        self.render = render
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+
+    def submit(self, frame, args, sink):
+        retain(frame)
+        try:
+            self._queue.put_nowait((frame, args, sink))
+            return True
+        except queue.Full:
+            release(frame)
+            self.dropped += 1
+            return False
+
+    def run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            frame, args, sink = item
+            try:
+                self.render(frame, *args)
+                sink(frame)
+            except Exception as e:
+                print(f"❌ Rendering failed: {e}")
+            finally:
+                release(frame)
+
+    def stop(self):
+        """Render everything already queued, then exit"""
+        self._queue.put(None)
+        self.join()
+
+
+class LatestFrame:
+    """Single-slot sink holding the most recent rendered frame for display
+
+    get() returns the frame with a hold of its own; release() it after use.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._frame = None
+
+    def __call__(self, frame):
+        retain(frame)
+        with self._lock:
+            previous, self._frame = self._frame, frame
+        release(previous)
+
+    def get(self):
+        with self._lock:
+            return retain(self._frame)
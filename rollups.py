@@ -0,0 +1,210 @@
+"""Incremental minute/hour/day rollups of fill level, alerts and expenses
+
+Every reading and expense updates one bucket per resolution as it arrives, so
+summary queries (fill trends, readings at alert level, expense totals by
+category) cost O(buckets in the range) instead of a pass over the raw log.
+The buckets are snapshotted to JSON and reloaded on restart; readings logged
+after the snapshot can be replayed with add_reading().
+"""
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+RESOLUTIONS = {'minute': 60, 'hour': 3600, 'day': 86400}
+RETENTION = {'minute': 2 * 1440, 'hour': 90 * 24, 'day': 5 * 366}  # Buckets kept
+
+
+def to_timestamp(when):
+    """Unix time for epoch seconds, ISO-8601 text or a datetime"""
+    if isinstance(when, (int, float)):
+        return float(when)
+    if isinstance(when, str):
+        when = datetime.datetime.fromisoformat(when)
+    if not isinstance(when, datetime.datetime):
+        when = datetime.datetime.combine(when, datetime.time())
+    return when.timestamp()
+
+
+class Bucket:
+    __slots__ = ('count', 'total', 'min', 'max', 'last', 'high', 'medium', 'expenses')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.last = None
+        self.high = 0  # Readings at or above ALERT_HIGH
+        self.medium = 0  # Readings at or above ALERT_MEDIUM but below ALERT_HIGH
+        self.expenses = {}  # category -> [total, count]
+
+    def merge(self, other):
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+            self.last = other.last
+        self.count += other.count
+        self.total += other.total
+        self.high += other.high
+        self.medium += other.medium
+        for category, (total, count) in other.expenses.items():
+            entry = self.expenses.setdefault(category, [0.0, 0])
+            entry[0] += total
+            entry[1] += count
+
+    def to_list(self):
+        expenses = {category: list(entry) for category, entry in self.expenses.items()}
+        return [self.count, self.total, self.min, self.max, self.last, self.high, self.medium,
+                expenses]
+
+    @classmethod
+    def from_list(cls, values):
+        bucket = cls()
+        (bucket.count, bucket.total, bucket.min, bucket.max, bucket.last, bucket.high,
+         bucket.medium, bucket.expenses) = values
+        return bucket
+
+
+class RollupEngine:
+    """Per-minute, per-hour and per-day aggregates, safe to share between threads
+
+    Days start at local midnight (UTC offset taken at startup).
+    """
+
+    def __init__(self, alert_high=80, alert_medium=60, snapshot_path=None,
+                 snapshot_interval=300.0, retention=None, clock=time.time):
+        self.alert_high = alert_high
+        self.alert_medium = alert_medium
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.snapshot_interval = snapshot_interval
+        self.retention = {**RETENTION, **(retention or {})}
+        self.clock = clock
+        self.buckets = {name: {} for name in RESOLUTIONS}  # resolution -> {start: Bucket}
+        self.last_reading_time = 0.0
+        self._utc_offset = time.localtime().tm_gmtoff
+        self._lock = threading.Lock()
+        self._last_snapshot = clock()
+        if self.snapshot_path and self.snapshot_path.exists():
+            try:
+                self.load(self.snapshot_path)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Rollup snapshot {self.snapshot_path} unreadable, "
+                               f"starting empty: {e}")
+
+    def bucket_start(self, resolution, t):
+        size = RESOLUTIONS[resolution]
+        return int(t - (t + self._utc_offset) % size)
+
+    def add_reading(self, t, fill_percentage):
+        fill = float(fill_percentage)
+        with self._lock:
+            for resolution in RESOLUTIONS:
+                bucket = self._bucket(resolution, t)
+                bucket.count += 1
+                bucket.total += fill
+                bucket.min = fill if bucket.min is None else min(bucket.min, fill)
+                bucket.max = fill if bucket.max is None else max(bucket.max, fill)
+                bucket.last = fill
+                if fill >= self.alert_high:
+                    bucket.high += 1
+                elif fill >= self.alert_medium:
+                    bucket.medium += 1
+            self.last_reading_time = max(self.last_reading_time, float(t))
+        self._maybe_snapshot()
+
+    def add_expense(self, when, category, amount, count=1):
+        """Count an expense; remove one with add_expense(when, category, -amount, -1)"""
+        t = to_timestamp(when)
+        with self._lock:
+            for resolution in RESOLUTIONS:
+                entry = self._bucket(resolution, t).expenses.setdefault(category, [0.0, 0])
+                entry[0] += float(amount)
+                entry[1] += count
+        self._maybe_snapshot()
+
+    def clear_expenses(self):
+        """Drop all expense totals, e.g. before rebuilding them from the expense store"""
+        with self._lock:
+            for buckets in self.buckets.values():
+                for bucket in buckets.values():
+                    bucket.expenses = {}
+
+    def series(self, resolution='hour', start=None, end=None, group=1):
+        """(start, Bucket) in [start, end) oldest first
+
+        group merges that many consecutive periods (group=7 with 'day' gives
+        weeks counted from the first bucket in range).
+        """
+        start = -float('inf') if start is None else to_timestamp(start)
+        end = float('inf') if end is None else to_timestamp(end)
+        with self._lock:
+            selected = sorted((t, b) for t, b in self.buckets[resolution].items()
+                              if start <= t < end)
+            size = RESOLUTIONS[resolution] * group
+            merged = []
+            for t, bucket in selected:
+                group_start = t - (t - selected[0][0]) % size
+                if not merged or merged[-1][0] != group_start:
+                    merged.append((group_start, Bucket()))
+                merged[-1][1].merge(bucket)
+            return merged
+
+    def fill_trend(self, resolution='hour', start=None, end=None, group=1):
+        return [{"t": t, "average": b.total / b.count, "min": b.min, "max": b.max,
+                 "last": b.last, "readings": b.count}
+                for t, b in self.series(resolution, start, end, group) if b.count]
+
+    def alert_counts(self, resolution='day', start=None, end=None):
+        total = Bucket()
+        for _, bucket in self.series(resolution, start, end):
+            total.merge(bucket)
+        return {"high": total.high, "medium": total.medium, "readings": total.count}
+
+    def expense_totals(self, resolution='day', start=None, end=None):
+        total = Bucket()
+        for _, bucket in self.series(resolution, start, end):
+            total.merge(bucket)
+        return {category: {"total": round(amount, 2), "count": count}
+                for category, (amount, count) in total.expenses.items() if count}
+
+    def save(self, path=None):
+        """Write a snapshot atomically"""
+        path = Path(path or self.snapshot_path)
+        with self._lock:
+            data = {"last_reading_time": self.last_reading_time,
+                    "buckets": {name: {str(t): b.to_list() for t, b in buckets.items()}
+                                for name, buckets in self.buckets.items()}}
+            self._last_snapshot = self.clock()
+        tmp = path.with_name(path.name + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp, path)
+
+    def load(self, path):
+        with open(path) as f:
+            data = json.load(f)
+        with self._lock:
+            self.last_reading_time = data.get("last_reading_time", 0.0)
+            for name in RESOLUTIONS:
+                self.buckets[name] = {int(t): Bucket.from_list(values)
+                                      for t, values in data["buckets"].get(name, {}).items()}
+
+    def _bucket(self, resolution, t):
+        buckets = self.buckets[resolution]
+        key = self.bucket_start(resolution, t)
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = Bucket()
+            if len(buckets) > self.retention[resolution]:
+                del buckets[min(buckets)]
+        return bucket
+
+    def _maybe_snapshot(self):
+        if self.snapshot_path and self.clock() - self._last_snapshot >= self.snapshot_interval:
+            self.save()
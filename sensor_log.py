@@ -0,0 +1,180 @@
+"""Buffered, rotating sensor log with columnar history
+
+Readings are buffered in memory and appended to the current CSV segment in
+batches. A segment is closed when it grows past rotate_bytes or the day
+changes, and closed segments are compacted into NumPy blocks stored column by
+column (timestamps first, sorted). A history query only opens the blocks whose
+time span overlaps it, memory-mapped, and binary-searches the timestamps, so
+it never re-parses the whole log.
+"""
+import datetime
+import logging
+import os
+import threading
+import time
+import warnings
+from pathlib import Path
+
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('timestamp', 'distance_cm', 'fill_percentage', 'volume_liters')
+
+
+class SensorLog:
+    """Append readings, read back any time range as an (N, len(fields)) array
+
+    Readings are dicts with every name in fields, or sequences in that order;
+    the first field must be the Unix timestamp.
+    """
+
+    def __init__(self, directory="sensor_log", fields=FIELDS, flush_rows=60,
+                 flush_seconds=60.0, rotate_bytes=5 * 2**20, clock=time.time):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.fields = tuple(fields)
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.rotate_bytes = rotate_bytes
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._last_flush = clock()
+        self._segment = None  # Current CSV segment
+        self._segment_day = None
+        self._segment_span = None  # (first, last) timestamp written to the segment
+        self._blocks = []  # (first timestamp, last timestamp, path) of compacted segments
+
+        # Segments left by an earlier run are closed: compact them now
+        for path in sorted(self.directory.glob('sensor-*.csv')):
+            self._compact(path)
+        for path in sorted(self.directory.glob('sensor-*.npy')):
+            self._add_block(path)
+
+    def append(self, reading):
+        if isinstance(reading, dict):
+            row = tuple(float(reading[name]) for name in self.fields)
+        else:
+            row = tuple(float(value) for value in reading)
+        with self._lock:
+            self._buffer.append(row)
+            if (len(self._buffer) >= self.flush_rows
+                    or self.clock() - self._last_flush >= self.flush_seconds):
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        self.flush()
+
+    def read(self, start=None, end=None):
+        """Readings with start <= timestamp < end, oldest first"""
+        start = -np.inf if start is None else start
+        end = np.inf if end is None else end
+        with self._lock:
+            blocks = [path for first, last, path in self._blocks if last >= start and first < end]
+            span = self._segment_span
+            segment = self._segment if span and span[1] >= start and span[0] < end else None
+            buffered = list(self._buffer)
+
+        parts = []
+        for path in blocks:
+            columns = np.load(path, mmap_mode='r')
+            lo, hi = np.searchsorted(columns[0], [start, end], side='left')
+            if hi > lo:
+                parts.append(np.array(columns[:, lo:hi].T))
+        if segment is not None:
+            try:
+                parts.append(self._load_csv(segment))
+            except FileNotFoundError:
+                # Rotated since the snapshot: its rows are in the block that replaced it
+                block = segment.with_suffix('.npy')
+                if block.exists():
+                    parts.append(np.load(block).T)
+        if buffered:
+            parts.append(np.array(buffered, dtype=np.float64))
+
+        if not parts:
+            return np.empty((0, len(self.fields)))
+        rows = np.concatenate(parts)
+        rows = rows[(rows[:, 0] >= start) & (rows[:, 0] < end)]
+        return rows[np.argsort(rows[:, 0], kind='stable')]
+
+    def _flush(self):
+        self._last_flush = self.clock()
+        by_day = {}  # A batch can straddle midnight
+        for row in self._buffer:
+            day = datetime.date.fromtimestamp(row[0]).strftime('%Y%m%d')
+            by_day.setdefault(day, []).append(row)
+        for day, rows in sorted(by_day.items()):
+            self._write(day, rows)
+        self._buffer = []
+
+    def _write(self, day, rows):
+        if (self._segment is None or day != self._segment_day
+                or self._segment.stat().st_size >= self.rotate_bytes):
+            self._rotate(day)
+
+        with open(self._segment, 'a') as f:
+            f.writelines(','.join(repr(value) for value in row) + '\n' for row in rows)
+        timestamps = [row[0] for row in rows]
+        first, last = min(timestamps), max(timestamps)
+        if self._segment_span:
+            first, last = min(first, self._segment_span[0]), max(last, self._segment_span[1])
+        self._segment_span = (first, last)
+
+    def _rotate(self, day):
+        if self._segment is not None:
+            self._compact(self._segment)
+            block = self._segment.with_suffix('.npy')
+            if block.exists():
+                self._add_block(block)
+        index = len(list(self.directory.glob(f'sensor-{day}-*')))
+        self._segment = self.directory / f'sensor-{day}-{index:03d}.csv'
+        self._segment_day = day
+        self._segment_span = None
+        with open(self._segment, 'w') as f:
+            f.write(','.join(self.fields) + '\n')
+
+    def _load_csv(self, path):
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')  # Header-only segment
+                rows = np.loadtxt(path, delimiter=',', skiprows=1, ndmin=2)
+        except ValueError:
+            # Torn last line after a crash: keep every complete row
+            rows = []
+            with open(path) as f:
+                next(f, None)
+                for line in f:
+                    values = line.strip().split(',')
+                    try:
+                        if len(values) == len(self.fields):
+                            rows.append([float(v) for v in values])
+                    except ValueError:
+                        pass
+            rows = np.array(rows, dtype=np.float64)
+        return rows.reshape(-1, len(self.fields))
+
+    def _compact(self, csv_path):
+        """Rewrite a closed CSV segment as a column-major .npy block sorted by time"""
+        rows = self._load_csv(csv_path)
+        if len(rows):
+            rows = rows[np.argsort(rows[:, 0], kind='stable')]
+            block = csv_path.with_suffix('.npy')
+            tmp = block.with_suffix('.npy.tmp')
+            with open(tmp, 'wb') as f:
+                np.save(f, np.ascontiguousarray(rows.T))
+            os.replace(tmp, block)
+            logger.info(f"✓ Compacted {csv_path.name}: {len(rows)} readings")
+        csv_path.unlink()
+
+    def _add_block(self, path):
+        timestamps = np.load(path, mmap_mode='r')[0]
+        if len(timestamps):
+            self._blocks.append((float(timestamps[0]), float(timestamps[-1]), path))
@@ -0,0 +1,194 @@
+"""Non-blocking servo control: grouped moves on a timed command queue"""
+import heapq
+import threading
+import time
+
+from lazy_imports import lazy_import, module_available
+
+# GPIO for servo control, imported on first use
+GPIO_AVAILABLE = module_available('RPi.GPIO')
+if GPIO_AVAILABLE:
+    GPIO = lazy_import('RPi.GPIO')
+else:
+    print("⚠ Warning: RPi.GPIO not available, servo control disabled")
+
+PWM_FREQUENCY = 50  # Hz, standard for SG90 servos
+SETTLE_TIME = 0.5  # Time the pulse is held before PWM is released
+
+
+def angle_to_duty(angle):
+    """Convert a servo angle (0-180 degrees) to a duty cycle"""
+    return 2.5 + (angle / 180.0) * 10.0
+
+
+class GPIOBackend:
+    """Drives servos through RPi.GPIO software PWM"""
+
+    def __init__(self, pins):
+        GPIO.setmode(GPIO.BCM)
+        GPIO.setwarnings(False)
+        self.pwms = {}
+        try:
+            for pin in pins:
+                GPIO.setup(pin, GPIO.OUT)
+                pwm = GPIO.PWM(pin, PWM_FREQUENCY)
+                pwm.start(0)
+                self.pwms[pin] = pwm
+        except Exception:
+            self.cleanup()
+            raise
+
+    def set_duty(self, pin, duty):
+        self.pwms[pin].ChangeDutyCycle(duty)
+
+    def cleanup(self):
+        for pwm in self.pwms.values():
+            pwm.stop()
+        if self.pwms:
+            GPIO.cleanup(list(self.pwms))  # Only our pins: other lanes may still be running
+
+
+class MockBackend:
+    """Records duty-cycle changes instead of touching hardware"""
+
+    def __init__(self, pins, clock=time.monotonic):
+        self.pins = list(pins)
+        self.clock = clock
+        self.events = []  # (timestamp, pin, duty)
+        self.duty = {pin: 0 for pin in self.pins}
+        self._lock = threading.Lock()
+
+    def set_duty(self, pin, duty):
+        with self._lock:
+            self.duty[pin] = duty
+            self.events.append((self.clock(), pin, duty))
+
+    def cleanup(self):
+        pass
+
+
+class ServoController:
+    """Moves named servo groups in parallel without blocking the caller
+
+    Each move sets the duty cycle of every pin in the group at once, then a
+    release is queued SETTLE_TIME later. Moves can be delayed so sequences
+    (close bins, then open a gate) are expressed as timed commands.
+    """
+
+    def __init__(self, backend, settle_time=SETTLE_TIME):
+        self.backend = backend
+        self.settle_time = settle_time
+        self.groups = {}
+        self._queue = []  # heap of (due, seq, pins, duty)
+        self._seq = 0
+        self._pin_generation = {}
+        self._busy = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._worker = threading.Thread(target=self._run, name="servo-controller", daemon=True)
+        self._worker.start()
+
+    def add_group(self, name, pins):
+        self.groups[name] = tuple(pins)
+
+    def move(self, group, angle, delay=0.0):
+        """Queue a move of every servo in group to angle, delay seconds from now"""
+        pins = self.groups[group]
+        self._push(time.monotonic() + delay, pins, angle_to_duty(angle))
+
+    def move_all(self, angles, delay=0.0):
+        """Queue moves for several groups at once, e.g. {"gate1": 120, ...}"""
+        due = time.monotonic() + delay
+        for group, angle in angles.items():
+            self._push(due, self.groups[group], angle_to_duty(angle))
+
+    def wait_idle(self, timeout=None):
+        """Block until every queued move and release has been applied"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._busy,
+                                       timeout=timeout)
+
+    def close(self):
+        """Finish queued commands, stop the worker and release the backend"""
+        self.wait_idle()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join()
+        self.backend.cleanup()
+
+    def _push(self, due, pins, duty):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("ServoController is closed")
+            self._seq += 1
+            heapq.heappush(self._queue, (due, self._seq, pins, duty))
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        return
+                    if self._queue:
+                        wait = self._queue[0][0] - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+                due, seq, pins, duty = heapq.heappop(self._queue)
+                self._busy = True
+
+            try:
+                self._apply(seq, pins, duty)
+            except Exception as e:
+                print(f"❌ Servo command failed: {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _apply(self, seq, pins, duty):
+        if duty == 0:
+            # Release only pins that have not been moved again since
+            for pin in pins:
+                if self._pin_generation.get(pin) == seq:
+                    self.backend.set_duty(pin, 0)
+            return
+
+        for pin in pins:
+            self.backend.set_duty(pin, duty)
+        with self._cond:
+            self._seq += 1
+            release_seq = self._seq
+            for pin in pins:
+                self._pin_generation[pin] = release_seq
+            heapq.heappush(self._queue,
+                           (time.monotonic() + self.settle_time, release_seq, pins, 0))
+
+
+if __name__ == '__main__':
+    # Measure one sorting cycle on the mock backend
+    pins = {"recycle": (17, 5), "landfill": (18, 6), "gate1": (19, 16), "gate2": (22, 23)}
+    backend = MockBackend([pin for group in pins.values() for pin in group])
+    controller = ServoController(backend)
+    for name, group_pins in pins.items():
+        controller.add_group(name, group_pins)
+
+    start = time.monotonic()
+    controller.move("gate1", 180)
+    controller.move("gate1", 120, delay=SETTLE_TIME)
+    controller.move_all({"recycle": 110, "landfill": 65}, delay=SETTLE_TIME)
+    controller.move_all({"recycle": 90, "landfill": 65}, delay=2 * SETTLE_TIME)
+    controller.move("gate2", 0, delay=3 * SETTLE_TIME)
+    controller.move("gate2", 85, delay=4 * SETTLE_TIME)
+    submitted = time.monotonic() - start
+    controller.close()
+    cycle = backend.events[-1][0] - start
+
+    print(f"Caller blocked for {submitted * 1000:.2f} ms")
+    print(f"Servo cycle time: {cycle:.2f} s ({len(backend.events)} PWM changes)")
+    # Eight pair moves at two settles each, plus the pause before Gate 2
+    print(f"Sequential per-servo equivalent: {8 * 2 * SETTLE_TIME + SETTLE_TIME:.2f} s of blocking")
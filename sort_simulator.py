@@ -0,0 +1,243 @@
+"""Discrete-event simulator for the sorting engine
+
+Runs SortingEngine against a simulated chute and camera on a virtual clock,
+so thousands of items can be pushed through in seconds to tune the timing
+configuration without hardware.
+"""
+import heapq
+import random
+from dataclasses import dataclass, field
+
+from sorting_engine import SortingEngine, SortTimings
+
+RECYCLABLE, LANDFILL = 0, 1
+
+
+class VirtualClock:
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+
+@dataclass
+class ChuteModel:
+    """Physical timings and detector noise of the simulated sorter"""
+    servo_time: float = 0.5  # Command to fully moved
+    drop_time: float = 0.3  # Gate 1 open to item visible in the chute
+    fall_time: float = 0.3  # Bin lid open to item gone from view
+    feed_interval: float = 1.5  # Time between items dropping while Gate 1 stays open
+    fps: float = 10.0  # Camera/inference frame rate
+    miss_rate: float = 0.05  # Chance an item in view is not detected
+    flip_rate: float = 0.05  # Chance an item is detected as the other category
+    recyclable_share: float = 0.5
+    arrival_interval: float = None  # Mean seconds between arrivals; None = always queued
+    jam_timeout: float = 60.0  # Item stuck in view this long is cleared by hand
+
+
+@dataclass
+class SimulationResult:
+    items: int
+    sorted_correctly: int
+    missorted: int
+    double_feeds: int
+    jams: int
+    actuations: int
+    sim_seconds: float
+    timings: SortTimings = field(default_factory=SortTimings)
+
+    @property
+    def items_per_hour(self):
+        return self.items / self.sim_seconds * 3600 if self.sim_seconds else 0.0
+
+    @property
+    def accuracy(self):
+        return self.sorted_correctly / self.items if self.items else 0.0
+
+
+class SimulatedChute:
+    """Actuator and detection source for SortingEngine in one
+
+    Commands take effect servo_time later. Items queue above Gate 1, drop into
+    view while it is open and fall into whichever bin lid is open.
+    """
+
+    def __init__(self, clock, model, rng):
+        self.clock = clock
+        self.model = model
+        self.rng = rng
+        self.gate1_open = False
+        self.recycle_open = False
+        self.landfill_open = False
+        self.queued = 0 if model.arrival_interval else float('inf')
+        self.in_view = []  # categories of items between the gates
+        self.binned = []  # (true category, bin) for every item that left
+        self.double_feeds = 0
+        self.jams = 0
+        self.actuations = 0
+        self._events = []  # heap of (time, seq, action)
+        self._seq = 0
+        self._next_feed = None
+        self._next_arrival = self._arrival_gap() if model.arrival_interval else None
+
+    # Actuator interface used by SortingEngine
+    def open_gate1(self):
+        self._schedule(0.0, self._set_gate1, True)
+
+    def close_gate1(self):
+        self._schedule(0.0, self._set_gate1, False)
+
+    def set_bins(self, recycle_open, landfill_open):
+        self._schedule(0.0, self._set_bins, recycle_open, landfill_open)
+
+    def open_gate2(self, delay=0.0):
+        self._schedule(delay, lambda: None)
+
+    def close_gate2(self):
+        self._schedule(0.0, lambda: None)
+
+    # Detection source
+    def observe(self):
+        """Per-frame (recyclable, landfill) counts for the items in view"""
+        counts = [0, 0]
+        for category in self.in_view:
+            if self.rng.random() < self.model.miss_rate:
+                continue
+            if self.rng.random() < self.model.flip_rate:
+                category = 1 - category
+            counts[category] += 1
+        return counts
+
+    def advance(self, until):
+        """Apply every scheduled physical event up to time until"""
+        while True:
+            candidates = []
+            if self._events:
+                candidates.append(self._events[0][0])
+            if self._next_feed is not None:
+                candidates.append(self._next_feed)
+            if self._next_arrival is not None:
+                candidates.append(self._next_arrival)
+            if not candidates or min(candidates) > until:
+                break
+
+            t = min(candidates)
+            self.clock.now = max(self.clock.now, t)
+            if self._events and self._events[0][0] == t:
+                _, _, action = heapq.heappop(self._events)
+                action()
+            elif self._next_feed == t:
+                self._feed()
+            else:
+                self.queued += 1
+                self._next_arrival = t + self._arrival_gap()
+                if self.gate1_open and self._next_feed is None:
+                    self._next_feed = t
+        self.clock.now = until
+
+    def clear_jam(self):
+        """Operator removes items the FSM is stuck waiting on"""
+        self.jams += len(self.in_view)
+        self.binned.extend((category, None) for category in self.in_view)
+        self.in_view = []
+
+    def _schedule(self, delay, fn, *args):
+        self.actuations += 1
+        self._seq += 1
+        due = self.clock.now + delay + self.model.servo_time
+        heapq.heappush(self._events, (due, self._seq, lambda: fn(*args)))
+
+    def _arrival_gap(self):
+        return self.rng.expovariate(1.0 / self.model.arrival_interval)
+
+    def _set_gate1(self, is_open):
+        self.gate1_open = is_open
+        self._next_feed = self.clock.now if is_open and self.queued else None
+
+    def _feed(self):
+        self._next_feed = None
+        if not self.gate1_open or not self.queued:
+            return
+        self.queued -= 1
+        category = RECYCLABLE if self.rng.random() < self.model.recyclable_share else LANDFILL
+        self._schedule_raw(self.model.drop_time, self._enter_view, category)
+        self._next_feed = self.clock.now + self.model.feed_interval
+
+    def _enter_view(self, category):
+        if self.in_view:
+            self.double_feeds += 1
+        self.in_view.append(category)
+        self._maybe_fall()
+
+    def _set_bins(self, recycle_open, landfill_open):
+        self.recycle_open = recycle_open
+        self.landfill_open = landfill_open
+        self._maybe_fall()
+
+    def _maybe_fall(self):
+        if self.in_view and (self.recycle_open or self.landfill_open):
+            self._schedule_raw(self.model.fall_time, self._fall)
+
+    def _fall(self):
+        if not self.in_view or not (self.recycle_open or self.landfill_open):
+            return
+        if self.recycle_open and self.landfill_open:
+            target = None  # Both lids open: can't tell where it went
+        else:
+            target = RECYCLABLE if self.recycle_open else LANDFILL
+        for category in self.in_view:
+            self.binned.append((category, target))
+        self.in_view = []
+
+    def _schedule_raw(self, delay, fn, *args):
+        self._seq += 1
+        heapq.heappush(self._events, (self.clock.now + delay, self._seq, lambda: fn(*args)))
+
+
+def simulate(timings=None, items=1000, model=None, seed=0, tracker_factory=None,
+             max_seconds=None):
+    """Push items through SortingEngine on a virtual clock and measure throughput
+
+    tracker_factory, if given, returns an ItemTracker the per-frame counts go
+    through first, like run_detection with TRACKING enabled.
+    """
+    timings = timings or SortTimings()
+    model = model or ChuteModel()
+    rng = random.Random(seed)
+    clock = VirtualClock()
+    chute = SimulatedChute(clock, model, rng)
+    engine = SortingEngine(chute, timings, clock=clock, log=None)
+    tracker = tracker_factory() if tracker_factory else None
+    frame_period = 1.0 / model.fps
+    max_seconds = max_seconds or items * 60.0
+    binned, last_progress = 0, 0.0
+
+    while len(chute.binned) < items and clock.now < max_seconds:
+        chute.advance(clock.now + frame_period)
+        if len(chute.binned) != binned:
+            binned, last_progress = len(chute.binned), clock.now
+        elif chute.in_view and clock.now - last_progress > model.jam_timeout:
+            # e.g. an item slipped in while Gate 1 was closing and the FSM waits for it to clear
+            chute.clear_jam()
+        recyclable, landfill = chute.observe()
+        if tracker is not None:
+            boxes, categories = [], []
+            for category, count in ((RECYCLABLE, recyclable), (LANDFILL, landfill)):
+                for _ in range(count):
+                    boxes.append([100, 100 + 10 * len(boxes), 200, 300 + 10 * len(boxes)])
+                    categories.append(category)
+            stable = tracker.update(boxes, categories, [0.8] * len(boxes))
+            recyclable = sum(1 for item in stable if item.category == RECYCLABLE)
+            landfill = sum(1 for item in stable if item.category == LANDFILL)
+        engine.step(recyclable, landfill)
+
+    correct = sum(1 for category, target in chute.binned if category == target)
+    return SimulationResult(items=len(chute.binned),
+                            sorted_correctly=correct,
+                            missorted=len(chute.binned) - correct,
+                            double_feeds=chute.double_feeds,
+                            jams=chute.jams,
+                            actuations=chute.actuations,
+                            sim_seconds=clock.now,
+                            timings=timings)
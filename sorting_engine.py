@@ -0,0 +1,134 @@
+"""Sequential gate sorting state machine, independent of camera, model and clock
+
+The engine is stepped once per frame with the recyclable/landfill counts and
+drives an actuator with high-level commands. Time comes from an injectable
+clock, so the same logic runs against the Pi's servos, a recorded sequence
+or the discrete-event simulator in sort_simulator.py.
+"""
+import time
+from dataclasses import dataclass
+
+WAITING_GATE1 = "WAITING_GATE1"
+GATE1_OPEN = "GATE1_OPEN"
+CLASSIFYING = "CLASSIFYING"
+GATE2_OPEN = "GATE2_OPEN"
+IDLE_SLEEP = "IDLE_SLEEP"
+
+STATES = (WAITING_GATE1, GATE1_OPEN, CLASSIFYING, GATE2_OPEN, IDLE_SLEEP)
+
+
+@dataclass
+class SortTimings:
+    bin_open_duration: float = 2.5  # Time bin stays open
+    gate_open_duration: float = 2.0  # Time gate stays open
+    clear_wait_time: float = 1.5  # Wait time after detection clears
+    idle_sleep_time: float = 3.0  # Sleep when Gate 1 timed out with nothing detected
+    gate1_timeout: float = 5.0  # Max time Gate 1 waits open for a bottle
+    bin_settle_time: float = 0.5  # Pause between closing bins and opening Gate 2
+
+
+class SortingEngine:
+    """Dual-gate sorting FSM
+
+    actuator must provide open_gate1(), close_gate1(), set_bins(recycle_open,
+    landfill_open), open_gate2(delay) and close_gate2(); commands must not
+    block. log receives the human-readable progress messages (None to mute).
+    """
+
+    def __init__(self, actuator, timings=None, clock=time.time, log=print):
+        self.actuator = actuator
+        self.timings = timings or SortTimings()
+        self.clock = clock
+        self.log = log or (lambda message: None)
+        self.state = WAITING_GATE1
+        self.last_state_change = clock()
+        self.last_detection_time = 0
+        self.detected_waste_type = None
+        self.items_sorted = 0
+        self.transition_listeners = []  # called as fn(old_state, new_state, now)
+
+    def _enter(self, state, now):
+        old_state = self.state
+        self.state = state
+        self.last_state_change = now
+        for listener in self.transition_listeners:
+            listener(old_state, state, now)
+
+    def step(self, recyclable, landfill):
+        """Advance the FSM with one frame's counts; returns the current state"""
+        now = self.clock()
+        timings = self.timings
+        is_object_detected = (recyclable > 0) or (landfill > 0)
+
+        if self.state == WAITING_GATE1:
+            # Wait for detection to clear, then open Gate 1
+            if is_object_detected:
+                self.last_detection_time = now
+            elif now - self.last_detection_time > timings.clear_wait_time:
+                self.log("🚪 Opening Gate 1 - ready for bottle")
+                self.actuator.open_gate1()
+                self._enter(GATE1_OPEN, now)
+
+        elif self.state == GATE1_OPEN:
+            # Gate 1 is open, wait for bottle to enter
+            if is_object_detected:
+                self.log("✓ Bottle detected! Closing Gate 1")
+                self.actuator.close_gate1()
+                self.detected_waste_type = None
+                self._enter(CLASSIFYING, now)
+            elif now - self.last_state_change > timings.gate1_timeout:
+                self.log("⚠️  Gate 1 timeout - no bottle detected, closing")
+                self.actuator.close_gate1()
+                self._enter(IDLE_SLEEP, now)
+
+        elif self.state == CLASSIFYING:
+            # Classify the bottle and open appropriate bin
+            if recyclable > 0 and landfill == 0:
+                self._open_bins("RECYCLABLE", now)
+            elif landfill > 0 and recyclable == 0:
+                self._open_bins("LANDFILL", now)
+            elif recyclable > 0 and landfill > 0:
+                self._open_bins("BOTH", now)
+
+            # Wait for bin to stay open, then check if bottle is gone
+            if self.detected_waste_type is not None:
+                if now - self.last_detection_time > timings.bin_open_duration:
+                    if not is_object_detected:
+                        self.log("✓ Bottle sorted! Closing bins, opening Gate 2")
+                        self.actuator.set_bins(False, False)
+                        self.actuator.open_gate2(delay=timings.bin_settle_time)
+                        self.items_sorted += 1
+                        self._enter(GATE2_OPEN, now)
+                    else:
+                        # Still detecting, keep waiting
+                        self.last_detection_time = now
+
+        elif self.state == GATE2_OPEN:
+            # Gate 2 is open, wait then close it
+            if now - self.last_state_change > timings.gate_open_duration:
+                self.log("🚪 Closing Gate 2")
+                self.actuator.close_gate2()
+                self._enter(WAITING_GATE1, now)
+                self.log("🔄 Ready for next bottle\n")
+
+        elif self.state == IDLE_SLEEP:
+            if now - self.last_state_change > timings.idle_sleep_time:
+                self.log("💤 Idle period complete, resuming...")
+                self._enter(WAITING_GATE1, now)
+
+        return self.state
+
+    def _open_bins(self, waste_type, now):
+        if self.detected_waste_type == waste_type:
+            return
+        if waste_type == "RECYCLABLE":
+            self.log("♻️  RECYCLABLE detected! Opening recyclable bin")
+            self.actuator.set_bins(True, False)
+        elif waste_type == "LANDFILL":
+            self.log("🗑️  LANDFILL detected! Opening landfill bin")
+            self.actuator.set_bins(False, True)
+        else:
+            self.log("⚠️  Both types detected! Opening BOTH bins")
+            self.actuator.set_bins(True, True)
+        self.detected_waste_type = waste_type
+        self.last_detection_time = now
@@ -0,0 +1,70 @@
+"""Smoke test: the app server's serve() path end to end on localhost"""
+import asyncio
+import importlib
+import json
+import socket
+
+import pytest
+import websockets
+
+from event_bridge import EventPublisher
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # The module opens its log file in the working directory
+    return importlib.import_module('SmartTrashBinAppServer')
+
+
+def test_serve_pushes_status_and_sort_events(app, tmp_path):
+    (tmp_path / 'expenses.json').write_text(json.dumps([
+        {"id": "e1", "amount": 3.5, "category": "bags"}]))
+    cfg = app.Config(HOST='127.0.0.1', PORT=free_port(), SENSOR_SIMULATED=True,
+                     ENABLE_MDNS=False, METRICS_PORT=0, REPORT_INTERVAL=0.05,
+                     SENSOR_SAMPLE_RATE_HZ=50.0, SENSOR_READ_INTERVAL=0.05,
+                     LOG_DIR=str(tmp_path / 'sensor_log'),
+                     EXPENSE_DB_FILE=str(tmp_path / 'expenses.db'),
+                     EXPENSE_JSON_FILE=str(tmp_path / 'expenses.json'),
+                     ROLLUP_SNAPSHOT_FILE=str(tmp_path / 'rollups.json'),
+                     EVENT_SOCKET_PATH=str(tmp_path / 'events.sock'))
+
+    async def scenario():
+        stop = asyncio.Event()
+        server = asyncio.create_task(app.serve(cfg, stop=stop))
+        for _ in range(50):
+            try:
+                client = await websockets.connect(f"ws://127.0.0.1:{cfg.PORT}",
+                                                  subprotocols=["trashbin.json-delta"])
+                break
+            except OSError:
+                await asyncio.sleep(0.05)
+        async with client:
+            first = json.loads(await asyncio.wait_for(client.recv(), 5))
+            await client.send(json.dumps({"type": "resync"}))
+            publisher = EventPublisher(cfg.EVENT_SOCKET_PATH)
+            publisher.publish({"type": "sort", "waste_type": "RECYCLABLE"})
+            publisher.close()
+            received = []
+            # Keyed messages (status, throughput) arrive as a snapshot, then deltas
+            while not any(m.get("key") == "throughput" for m in received):
+                received.append(json.loads(await asyncio.wait_for(client.recv(), 5)))
+        stop.set()
+        await asyncio.wait_for(server, 5)
+        return first, received
+
+    first, received = asyncio.run(scenario())
+    status = first if first["type"] == "status" else first["data"]
+    assert status["bin_id"] == cfg.BIN_ID and 0 <= status["fill_percentage"] <= 100
+    assert status["expenses"]["today"] == {"bags": 3.5}
+    assert {"type": "sort", "waste_type": "RECYCLABLE"} in received
+    throughput = next(m for m in received if m.get("key") == "throughput")
+    assert throughput["type"] == "snapshot" and throughput["data"]["items_total"] == 1
+    # close() flushed the stores
+    assert (tmp_path / 'rollups.json').exists()
+    assert (tmp_path / 'expenses.json.migrated').exists()
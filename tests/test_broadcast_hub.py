@@ -0,0 +1,81 @@
+"""BroadcastHub delta encoding and per-client queueing, without a network"""
+import json
+
+from broadcast_hub import BroadcastHub, ClientChannel, Outgoing, apply_patch, json_patch
+
+
+class FakeSocket:
+    def __init__(self, subprotocol=None):
+        self.subprotocol = subprotocol
+
+
+def connect(hub, subprotocol="trashbin.json-delta"):
+    """A channel registered without its writer task; drain() plays the writer"""
+    channel = ClientChannel(FakeSocket(subprotocol), hub.max_queue)
+    hub.clients[channel.websocket] = channel
+    return channel
+
+
+def drain(channel):
+    sent = []
+    while channel.pending:
+        _, outgoing = channel.pending.popitem(last=False)
+        sent.append(json.loads(channel.payload(outgoing)))
+    return sent
+
+
+def test_patch_round_trip_with_escaped_keys():
+    old = {"bin": {"fill": 40, "a/b": 1, "x~y": [1, 2]}, "gone": True, "n": 1}
+    new = {"bin": {"fill": 45, "a/b": 2, "x~y": [1, 2, 3], "~/": None}, "n": 1.0}
+    ops = json_patch(old, new)
+    assert {"op": "remove", "path": "/gone"} in ops
+    assert {"op": "replace", "path": "/bin/a~1b", "value": 2} in ops
+    assert {"op": "add", "path": "/bin/~0~1", "value": None} in ops
+    assert apply_patch(json.loads(json.dumps(old)), ops) == new
+    assert json_patch(new, new) == []
+    assert apply_patch(old, json_patch(old, [1])) == [1]
+
+
+def test_offer_coalesces_by_key_and_drops_oldest():
+    channel = ClientChannel(FakeSocket(), max_queue=3)
+    channel.offer(Outgoing({"n": 1}, key="status"))
+    channel.offer(Outgoing({"event": "a"}))
+    channel.offer(Outgoing({"n": 2}, key="status"))
+    assert channel.coalesced == 1 and len(channel.pending) == 2
+
+    channel.offer(Outgoing({"event": "b"}))
+    channel.offer(Outgoing({"event": "c"}))
+    assert channel.dropped == 1
+    # The status went first: it was the oldest entry when the queue overflowed
+    assert drain(channel) == [{"event": "a"}, {"event": "b"}, {"event": "c"}]
+
+
+def test_stale_delta_client_gets_a_snapshot_of_an_unchanged_status():
+    hub = BroadcastHub()
+    current, stale = connect(hub), connect(hub)
+    hub.publish({"fill": 10}, key="status")
+    drain(current), drain(stale)
+    hub.publish({"fill": 20}, key="status")
+    assert drain(current)[0]["type"] == "delta"
+    stale.pending.clear()  # Lost before it was sent
+
+    assert hub.publish({"fill": 20}, key="status") == 2
+    assert not current.pending  # Already up to date
+    [message] = drain(stale)
+    assert message["type"] == "snapshot" and message["data"] == {"fill": 20}
+
+    hub.resync(current.websocket)
+    hub.publish({"fill": 30}, key="status")
+    assert drain(current)[0]["type"] == "snapshot"
+    assert drain(stale)[0]["type"] == "delta"
+
+
+def test_snapshot_forced_every_snapshot_every_deltas():
+    hub = BroadcastHub(snapshot_every=3)
+    delta, plain = connect(hub), connect(hub, subprotocol=None)
+    kinds = []
+    for fill in range(6):
+        hub.publish({"fill": fill}, key="status")
+        kinds.append(drain(delta)[0]["type"])
+        assert drain(plain) == [{"fill": fill}]
+    assert kinds == ["snapshot", "delta", "delta", "delta", "snapshot", "delta"]
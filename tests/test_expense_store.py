@@ -0,0 +1,57 @@
+"""ExpenseStore.migrate_json: the one-time import of the old expenses.json"""
+import json
+
+import pytest
+
+from expense_store import ExpenseStore
+
+OLD_EXPENSES = [
+    {"id": "a1", "amount": "12.5", "category": "bags", "date": "2026-01-03T10:00:00",
+     "receipt": "r-17"},
+    {"id": "a2", "amount": 4, "date": 1767225600},
+    "not a record",
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ExpenseStore(tmp_path / 'expenses.db', bin_id='bin-1')
+    yield store
+    store.close()
+
+
+def test_migrate_json_imports_once_and_renames(store, tmp_path):
+    path = tmp_path / 'expenses.json'
+    path.write_text(json.dumps({"expenses": OLD_EXPENSES}))
+
+    assert store.migrate_json(path) == 2
+    assert not path.exists() and (tmp_path / 'expenses.json.migrated').exists()
+    first = store.get('a1')
+    assert first["amount"] == 12.5 and first["receipt"] == "r-17" and first["bin_id"] == 'bin-1'
+    second = store.get('a2')
+    assert second["category"] == 'other' and second["date"].startswith('2026-01-0')
+
+    # A restored expenses.json is not imported a second time
+    path.write_text(json.dumps([{"id": "a3", "amount": 1}]))
+    assert store.migrate_json(path) == 0
+    assert store.count() == 2 and path.exists()
+
+
+def test_migrate_json_without_a_file(store, tmp_path):
+    assert store.migrate_json(tmp_path / 'missing.json') == 0
+    assert store.count() == 0
+
+
+def test_migrated_records_survive_reopening(store, tmp_path):
+    path = tmp_path / 'expenses.json'
+    path.write_text(json.dumps(OLD_EXPENSES))
+    store.migrate_json(path)
+    store.close()
+
+    reopened = ExpenseStore(tmp_path / 'expenses.db')
+    try:
+        assert reopened.summary()["total"] == 16.5
+        assert reopened.totals_by_category() == {"bags": {"total": 12.5, "count": 1},
+                                                 "other": {"total": 4.0, "count": 1}}
+    finally:
+        reopened.close()
@@ -0,0 +1,73 @@
+"""FrameRing lending: held buffers are never handed out twice"""
+import threading
+
+import numpy as np
+import pytest
+
+from frame_buffers import FrameRing, release, retain
+
+SHAPE = (4, 6, 3)
+
+
+def test_held_buffer_is_not_handed_out_again():
+    ring = FrameRing(max_slots=3)
+    first = ring.acquire(SHAPE)
+    second = ring.acquire(SHAPE)
+    assert first is not second
+
+    release(first)
+    assert ring.acquire(SHAPE) is first
+    assert ring.stats()["in_use"] == 2
+
+
+def test_every_hold_must_be_released():
+    ring = FrameRing(max_slots=2)
+    frame = ring.acquire(SHAPE)
+    retain(frame)  # e.g. queued for the writer
+    release(frame)
+    assert ring.acquire(SHAPE) is not frame
+
+    release(frame)
+    assert ring.stats()["in_use"] == 1
+    with pytest.raises(ValueError):
+        ring.release(frame)
+
+
+def test_overflow_and_foreign_arrays():
+    ring = FrameRing(max_slots=1)
+    held = ring.acquire(SHAPE)
+    spare = ring.acquire(SHAPE)
+    assert spare is not held and ring.stats()["overflow"] == 1
+    release(spare)  # Not a ring buffer: nothing to give back
+    release(np.zeros(SHAPE))
+    assert ring.stats()["in_use"] == 1
+
+
+def test_resolution_change_drops_held_buffers():
+    ring = FrameRing(max_slots=2)
+    old = ring.acquire(SHAPE)
+    new = ring.acquire((8, 8, 3))
+    release(old)
+    assert ring.stats() == {"slots": 1, "in_use": 1, "allocated": 2, "reused": 0, "overflow": 0}
+    assert new.shape == (8, 8, 3)
+
+
+def test_concurrent_holders_never_share_a_buffer():
+    ring = FrameRing(max_slots=4)
+    errors = []
+
+    def worker(marker):
+        for _ in range(500):
+            frame = ring.acquire(SHAPE)
+            frame.fill(marker)
+            if not (frame == marker).all():
+                errors.append(marker)
+            release(frame)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(1, 7)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert ring.stats()["in_use"] == 0
@@ -0,0 +1,44 @@
+"""InferencePool: a worker that dies fails its frame instead of hanging the lane"""
+import os
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from lanes import InferencePool, Lane, SharedFrames
+
+
+class ExitingModel:
+    """Loads fine, then kills its worker process on the first frame"""
+
+    names = {0: 'bottle-plastic'}
+
+    def __call__(self, image, conf=0.25, verbose=False):
+        os._exit(3)
+
+
+@pytest.fixture
+def pool():
+    pool = InferencePool(ExitingModel, workers=1, persistent_input=False).start(timeout=60)
+    yield pool
+    pool.close()
+
+
+def test_dead_worker_fails_in_flight_and_new_tasks(pool):
+    frames = SharedFrames((4, 4, 3))
+    try:
+        future = pool.submit("lane1", frames, 0)
+        with pytest.raises(RuntimeError, match="exited with code 3"):
+            future.result(timeout=10)
+        with pytest.raises(RuntimeError, match="Every inference worker"):
+            pool.submit("lane1", frames, 1)
+    finally:
+        frames.close()
+
+
+def test_stopped_lane_gives_up_waiting_on_a_result():
+    lane = Lane("lane1", camera=None, actuator=None, pool=None, tracking=False, log=None)
+    lane.stop()
+    start = time.monotonic()
+    assert lane._wait(Future()) is None  # A result that never comes
+    assert time.monotonic() - start < 1.5
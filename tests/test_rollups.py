@@ -0,0 +1,75 @@
+"""RollupEngine bucketing, queries and snapshots"""
+import datetime
+
+from rollups import RollupEngine
+
+NOON = datetime.datetime(2026, 4, 6, 12)
+T0 = RollupEngine().bucket_start('day', NOON.timestamp())  # That day's first bucket
+
+
+def test_readings_fill_minute_hour_and_day_buckets():
+    rollups = RollupEngine(alert_high=80, alert_medium=60)
+    for offset, fill in ((10, 50), (50, 70), (70, 90), (3600 + 5, 20)):
+        rollups.add_reading(T0 + offset, fill)
+
+    assert [row["readings"] for row in rollups.fill_trend('minute')] == [2, 1, 1]
+    first_hour, second_hour = rollups.fill_trend('hour')
+    assert first_hour == {"t": T0, "average": 70.0, "min": 50.0, "max": 90.0, "last": 90.0,
+                          "readings": 3}
+    assert second_hour["t"] == T0 + 3600
+    assert rollups.fill_trend('day')[0]["t"] == T0
+    assert rollups.alert_counts() == {"high": 1, "medium": 1, "readings": 4}
+    assert rollups.alert_counts('hour', start=T0 + 3600) == {"high": 0, "medium": 0,
+                                                             "readings": 1}
+
+
+def test_series_groups_days_into_weeks():
+    rollups = RollupEngine()
+    for day in range(10):
+        rollups.add_reading(T0 + day * 86400 + 60, day)
+    weeks = rollups.fill_trend('day', group=7)
+    assert [(row["t"], row["readings"], row["max"]) for row in weeks] == [
+        (T0, 7, 6.0), (T0 + 7 * 86400, 3, 9.0)]
+
+
+def test_expenses_add_and_remove():
+    rollups = RollupEngine()
+    rollups.add_expense(NOON.isoformat(), 'bags', 12.5)
+    rollups.add_expense(T0 + 100, 'bags', 2.5)
+    rollups.add_expense(NOON, 'repairs', 40)
+    rollups.add_expense(T0 + 100, 'bags', -2.5, -1)  # Deleted again
+    assert rollups.expense_totals() == {"bags": {"total": 12.5, "count": 1},
+                                        "repairs": {"total": 40.0, "count": 1}}
+    assert rollups.expense_totals(start=T0 + 86400) == {}
+
+    rollups.clear_expenses()
+    assert rollups.expense_totals() == {}
+
+
+def test_retention_drops_the_oldest_buckets():
+    rollups = RollupEngine(retention={'minute': 3})
+    for minute in range(5):
+        rollups.add_reading(T0 + minute * 60, minute)
+    assert [row["t"] for row in rollups.fill_trend('minute')] == [T0 + 120, T0 + 180, T0 + 240]
+    assert rollups.fill_trend('hour')[0]["readings"] == 5
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = tmp_path / 'rollups.json'
+    now = [T0]
+    rollups = RollupEngine(snapshot_path=path, snapshot_interval=60, clock=lambda: now[0])
+    rollups.add_reading(T0 + 5, 85)
+    assert not path.exists()
+    now[0] += 61
+    rollups.add_expense(T0 + 30, 'bags', 3)  # Interval passed: snapshots
+
+    restored = RollupEngine(snapshot_path=path)
+    assert restored.last_reading_time == T0 + 5
+    assert restored.alert_counts() == {"high": 1, "medium": 0, "readings": 1}
+    assert restored.expense_totals() == {"bags": {"total": 3.0, "count": 1}}
+
+
+def test_unreadable_snapshot_starts_empty(tmp_path):
+    path = tmp_path / 'rollups.json'
+    path.write_text('{"buckets": ')
+    assert RollupEngine(snapshot_path=path).fill_trend() == []
@@ -0,0 +1,51 @@
+"""SensorLog segments: day rotation, compaction and reads racing a rotation"""
+import datetime
+
+import numpy as np
+
+from sensor_log import SensorLog
+
+LATE = datetime.datetime(2026, 3, 1, 23, 59, 58).timestamp()
+
+
+def reading(t):
+    return (t, 40.0, 50.0, 20.0)
+
+
+def test_batch_across_midnight_splits_by_day(tmp_path):
+    log = SensorLog(tmp_path, flush_rows=100)
+    for t in (LATE, LATE + 1, LATE + 3, LATE + 4):
+        log.append(reading(t))
+    log.flush()
+    log.append(reading(LATE + 5))
+    log.flush()
+
+    # The first day's segment was closed and compacted when the second day began
+    assert [path.name for path in sorted(tmp_path.iterdir())] == [
+        'sensor-20260301-000.npy', 'sensor-20260302-000.csv']
+    assert list(np.load(tmp_path / 'sensor-20260301-000.npy')[0]) == [LATE, LATE + 1]
+    assert list(log.read()[:, 0]) == [LATE, LATE + 1, LATE + 3, LATE + 4, LATE + 5]
+    assert list(log.read(end=LATE + 2)[:, 0]) == [LATE, LATE + 1]
+
+
+def test_read_during_rotation_finds_the_compacted_block(tmp_path):
+    log = SensorLog(tmp_path, flush_rows=100, rotate_bytes=1)
+    log.append(reading(LATE - 10))
+    log.flush()
+
+    load_csv = log._load_csv
+    rotated = []
+
+    def rotate_first(path):
+        # read() has snapshotted the open segment; rotate it away before the load
+        if not rotated:
+            rotated.append(path)
+            log.append(reading(LATE - 5))
+            log.flush()
+        return load_csv(path)
+
+    log._load_csv = rotate_first
+    assert list(log.read()[:, 0]) == [LATE - 10]
+    assert not rotated[0].exists()
+    log._load_csv = load_csv
+    assert list(log.read()[:, 0]) == [LATE - 10, LATE - 5]
@@ -0,0 +1,64 @@
+"""ServoController timing, checked against the events MockBackend records"""
+import time
+
+import pytest
+
+from servo_controller import MockBackend, ServoController, angle_to_duty
+
+SETTLE = 0.1
+TOLERANCE = 0.03  # Scheduling slack for the worker thread
+
+
+@pytest.fixture
+def controller():
+    backend = MockBackend([17, 5, 19, 16])
+    servos = ServoController(backend, settle_time=SETTLE)
+    servos.add_group("recycle", (17, 5))
+    servos.add_group("gate1", (19, 16))
+    yield servos
+    servos.close()
+
+
+def events_for(backend, pin):
+    return [(t, duty) for t, p, duty in backend.events if p == pin]
+
+
+def test_group_moves_run_in_parallel(controller):
+    start = time.monotonic()
+    controller.move_all({"recycle": 110, "gate1": 180})
+    controller.wait_idle()
+
+    moves = [(t, pin) for t, pin, duty in controller.backend.events if duty != 0]
+    releases = [t for t, _, duty in controller.backend.events if duty == 0]
+    assert sorted(pin for _, pin in moves) == [5, 16, 17, 19]
+    # Every servo starts moving together, before any of them is released
+    assert max(t for t, _ in moves) - start < TOLERANCE
+    assert max(t for t, _ in moves) < min(releases)
+    assert events_for(controller.backend, 17)[0][1] == angle_to_duty(110)
+    assert events_for(controller.backend, 19)[0][1] == angle_to_duty(180)
+
+
+def test_delayed_move_fires_after_its_delay(controller):
+    start = time.monotonic()
+    controller.move("gate1", 180, delay=0.2)
+    controller.move("recycle", 110)
+    controller.wait_idle()
+
+    gate_set = events_for(controller.backend, 19)[0][0]
+    recycle_set = events_for(controller.backend, 17)[0][0]
+    assert gate_set - start >= 0.2
+    assert recycle_set - start < TOLERANCE
+    assert recycle_set < gate_set
+
+
+def test_pins_released_only_after_settle_time(controller):
+    controller.move("gate1", 180)
+    time.sleep(SETTLE / 2)
+    controller.move("gate1", 120)  # Moved again before settling: release waits for this one
+    controller.wait_idle()
+
+    for pin in (19, 16):
+        events = events_for(controller.backend, pin)
+        assert [duty for _, duty in events] == [angle_to_duty(180), angle_to_duty(120), 0]
+        (_, _), (second, _), (released, _) = events
+        assert released - second >= SETTLE
@@ -0,0 +1,101 @@
+"""SortingEngine FSM driven by a fake clock and a recording actuator"""
+import pytest
+
+from sorting_engine import (CLASSIFYING, GATE1_OPEN, GATE2_OPEN, IDLE_SLEEP, WAITING_GATE1,
+                            SortingEngine, SortTimings)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingActuator:
+    def __init__(self):
+        self.commands = []
+
+    def open_gate1(self):
+        self.commands.append("open_gate1")
+
+    def close_gate1(self):
+        self.commands.append("close_gate1")
+
+    def set_bins(self, recycle_open, landfill_open):
+        self.commands.append(("bins", recycle_open, landfill_open))
+
+    def open_gate2(self, delay):
+        self.commands.append(("open_gate2", delay))
+
+    def close_gate2(self):
+        self.commands.append("close_gate2")
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def engine(clock):
+    return SortingEngine(RecordingActuator(), SortTimings(), clock=clock, log=None)
+
+
+def step_at(engine, clock, seconds, recyclable=0, landfill=0):
+    clock.now += seconds
+    return engine.step(recyclable, landfill)
+
+
+def test_full_cycle_sorts_one_recyclable(engine, clock):
+    transitions = []
+    engine.transition_listeners.append(lambda old, new, now: transitions.append((old, new)))
+
+    assert step_at(engine, clock, 2.0) == GATE1_OPEN  # Chute clear for clear_wait_time
+    assert step_at(engine, clock, 0.5, recyclable=1) == CLASSIFYING
+    assert step_at(engine, clock, 0.1, recyclable=1) == CLASSIFYING
+    assert step_at(engine, clock, 1.0) == CLASSIFYING  # Bin still within bin_open_duration
+    assert step_at(engine, clock, 2.0) == GATE2_OPEN
+    assert step_at(engine, clock, 1.0) == GATE2_OPEN
+    assert step_at(engine, clock, 1.5) == WAITING_GATE1
+
+    assert engine.actuator.commands == ["open_gate1", "close_gate1", ("bins", True, False),
+                                        ("bins", False, False), ("open_gate2", 0.5),
+                                        "close_gate2"]
+    assert engine.items_sorted == 1 and engine.detected_waste_type == "RECYCLABLE"
+    assert transitions == [(WAITING_GATE1, GATE1_OPEN), (GATE1_OPEN, CLASSIFYING),
+                           (CLASSIFYING, GATE2_OPEN), (GATE2_OPEN, WAITING_GATE1)]
+
+
+def test_gate1_waits_for_the_chute_to_clear(engine, clock):
+    assert step_at(engine, clock, 2.0, landfill=1) == WAITING_GATE1
+    assert step_at(engine, clock, 1.0) == WAITING_GATE1
+    assert step_at(engine, clock, 1.0) == GATE1_OPEN
+
+
+def test_gate1_timeout_idles_then_resumes(engine, clock):
+    step_at(engine, clock, 2.0)
+    assert step_at(engine, clock, 5.5) == IDLE_SLEEP
+    assert engine.actuator.commands == ["open_gate1", "close_gate1"]
+    assert step_at(engine, clock, 2.0) == IDLE_SLEEP
+    assert step_at(engine, clock, 1.5) == WAITING_GATE1
+
+
+def test_bins_stay_open_while_the_item_is_seen(engine, clock):
+    step_at(engine, clock, 2.0)
+    step_at(engine, clock, 0.1, landfill=1)
+    step_at(engine, clock, 0.1, landfill=1)
+    assert step_at(engine, clock, 3.0, landfill=1) == CLASSIFYING  # Still there
+    assert step_at(engine, clock, 1.0) == CLASSIFYING
+    assert step_at(engine, clock, 2.0) == GATE2_OPEN
+    assert ("bins", False, True) in engine.actuator.commands
+
+
+def test_mixed_counts_open_both_bins_once(engine, clock):
+    step_at(engine, clock, 2.0)
+    step_at(engine, clock, 0.1, recyclable=1, landfill=1)
+    step_at(engine, clock, 0.1, recyclable=1, landfill=1)
+    step_at(engine, clock, 0.1, recyclable=1, landfill=1)
+    assert engine.actuator.commands.count(("bins", True, True)) == 1
+    assert engine.detected_waste_type == "BOTH"
@@ -0,0 +1,73 @@
+"""ItemTracker association and N-of-M category voting"""
+import numpy as np
+import pytest
+
+from tracking import ItemTracker, iou_matrix, stable_counts
+
+RECYCLABLE, LANDFILL = 0, 1
+BOX = [100, 100, 200, 200]
+OTHER_BOX = [400, 100, 500, 200]
+
+
+def feed(tracker, *detections):
+    """One frame of (box, category, confidence) detections"""
+    boxes = [d[0] for d in detections]
+    categories = [d[1] for d in detections]
+    confidences = [d[2] for d in detections]
+    return tracker.update(boxes, categories, confidences)
+
+
+def test_iou_matrix():
+    iou = iou_matrix([BOX, [0, 0, 10, 10]], [[150, 100, 250, 200], OTHER_BOX])
+    assert iou.shape == (2, 2)
+    assert iou[0, 0] == pytest.approx(1 / 3)
+    assert iou[0, 1] == 0 and iou[1, 0] == 0
+    assert iou_matrix(np.empty((0, 4)), [BOX]).shape == (0, 1)
+
+
+def test_item_reported_after_min_votes():
+    tracker = ItemTracker(window=5, min_votes=3)
+    assert feed(tracker, (BOX, LANDFILL, 0.9)) == []
+    assert feed(tracker, ([102, 101, 203, 199], LANDFILL, 0.8)) == []
+    [item] = feed(tracker, ([104, 102, 205, 201], LANDFILL, 0.7))
+    assert item.category == LANDFILL and item.track_id == 1
+    assert item.confidence == pytest.approx((0.9 + 0.8 + 0.7) / 5)
+    assert list(item.box) == [104, 102, 205, 201]
+
+
+def test_flicker_does_not_switch_category():
+    tracker = ItemTracker(window=5, min_votes=3)
+    for _ in range(3):
+        feed(tracker, (BOX, RECYCLABLE, 0.9))
+    [item] = feed(tracker, (BOX, LANDFILL, 0.9))
+    assert item.category == RECYCLABLE
+    [item] = feed(tracker, (BOX, LANDFILL, 0.9))
+    assert item.category == RECYCLABLE  # Landfill has no quorum yet
+    # The window now holds two recyclable votes and three landfill ones
+    [item] = feed(tracker, (BOX, LANDFILL, 0.9))
+    assert item.category == LANDFILL
+
+
+def test_missed_frames_keep_then_drop_the_item():
+    tracker = ItemTracker(window=5, min_votes=2, max_missed=2)
+    feed(tracker, (BOX, RECYCLABLE, 0.9))
+    feed(tracker, (BOX, RECYCLABLE, 0.9))
+    assert len(feed(tracker)) == 1
+    assert len(feed(tracker)) == 1
+    assert feed(tracker) == []
+    assert tracker.tracks == []
+
+
+def test_separate_items_and_counts():
+    tracker = ItemTracker(window=3, min_votes=2)
+    for _ in range(2):
+        items = feed(tracker, (BOX, RECYCLABLE, 0.9), (OTHER_BOX, LANDFILL, 0.6))
+    assert sorted((item.track_id, item.category) for item in items) == [(1, RECYCLABLE),
+                                                                        (2, LANDFILL)]
+    assert stable_counts(items).tolist() == [1, 1, 0]
+
+    # A far-away detection starts a new track instead of joining one
+    feed(tracker, ([800, 500, 900, 600], RECYCLABLE, 0.9))
+    assert [track.track_id for track in tracker.tracks] == [1, 2, 3]
+    tracker.reset()
+    assert feed(tracker, (BOX, RECYCLABLE, 0.9)) == []
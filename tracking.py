@@ -0,0 +1,115 @@
+"""Temporal smoothing of detections: IoU tracking with N-of-M category votes"""
+from collections import Counter, deque, namedtuple
+
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+
+# A tracked item the FSM can act on: category is the voted CATEGORY_* index and
+# confidence the share of recent frames that agreed, weighted by detector score
+StableItem = namedtuple('StableItem', ['track_id', 'box', 'category', 'confidence'])
+
+
+def iou_matrix(a, b):
+    """Pairwise IoU between boxes a (N, 4) and b (M, 4) in xyxy format"""
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+class _Track:
+    def __init__(self, track_id, box, window):
+        self.track_id = track_id
+        self.box = box
+        self.votes = deque(maxlen=window)  # (category, confidence) or None when missed
+        self.category = None
+        self.missed = 0
+
+    def vote(self, category, confidence, min_votes):
+        self.votes.append((category, confidence))
+        self.missed = 0
+        tally = Counter(v[0] for v in self.votes if v is not None)
+        leader, count = tally.most_common(1)[0]
+        # Switch category only when the challenger has a quorum of its own
+        if count >= min_votes and (self.category is None or count > tally[self.category]):
+            self.category = leader
+
+    def confidence(self):
+        scores = [v[1] for v in self.votes if v is not None and v[0] == self.category]
+        return sum(scores) / self.votes.maxlen
+
+
+class ItemTracker:
+    """Associates detections across frames and emits stable per-item classes
+
+    A detection joins the existing track it overlaps most (IoU above
+    iou_threshold). A track is reported once one category has min_votes of
+    the last window frames, and keeps being reported for up to max_missed
+    frames without a detection, so single flickering frames change nothing.
+    """
+
+    def __init__(self, iou_threshold=0.3, window=5, min_votes=3, max_missed=3):
+        self.iou_threshold = iou_threshold
+        self.window = window
+        self.min_votes = min_votes
+        self.max_missed = max_missed
+        self.tracks = []
+        self._next_id = 1
+
+    def update(self, boxes, categories, confidences):
+        """Feed one frame of detections, return the list of StableItem"""
+        boxes = np.asarray(boxes).reshape(-1, 4)
+        unmatched = set(range(len(boxes)))
+        matched_tracks = set()
+
+        if self.tracks and len(boxes):
+            iou = iou_matrix([t.box for t in self.tracks], boxes)
+            # Greedy assignment, best overlaps first
+            for flat in np.argsort(iou, axis=None)[::-1]:
+                ti, di = np.unravel_index(flat, iou.shape)
+                if iou[ti, di] < self.iou_threshold:
+                    break
+                if di not in unmatched or ti in matched_tracks:
+                    continue
+                track = self.tracks[ti]
+                track.box = boxes[di]
+                track.vote(int(categories[di]), float(confidences[di]), self.min_votes)
+                matched_tracks.add(ti)
+                unmatched.discard(di)
+
+        survivors = []
+        for ti, track in enumerate(self.tracks):
+            if ti not in matched_tracks:
+                track.missed += 1
+                track.votes.append(None)
+            if track.missed <= self.max_missed:
+                survivors.append(track)
+        self.tracks = survivors
+
+        for di in sorted(unmatched):
+            track = _Track(self._next_id, boxes[di], self.window)
+            track.vote(int(categories[di]), float(confidences[di]), self.min_votes)
+            self._next_id += 1
+            self.tracks.append(track)
+
+        return [StableItem(t.track_id, t.box, t.category, t.confidence())
+                for t in self.tracks if t.category is not None]
+
+    def reset(self):
+        self.tracks = []
+
+
+def stable_counts(items, num_categories=3):
+    """Count stable items per category, like Detections.counts"""
+    counts = np.zeros(num_categories, dtype=np.intp)
+    for item in items:
+        counts[item.category] += 1
+    return counts